@@ -10,6 +10,7 @@ interface MenuCardProps {
   item: string;
   onClick?: () => void;
   disabled?: boolean;
+  soldOut?: boolean;
 }
 
 const MenuCard: FC<MenuCardProps> = ({ 
@@ -20,15 +21,16 @@ const MenuCard: FC<MenuCardProps> = ({
   course, 
   item, 
   onClick,
-  disabled 
+  disabled,
+  soldOut
 }) => {
   return (
     <div
       className={cn(
         "bg-white rounded-lg shadow-sm overflow-hidden hover:shadow-md transition-shadow cursor-pointer h-56 flex flex-col",
-        disabled && "opacity-50 cursor-not-allowed pointer-events-none"
+        (disabled || soldOut) && "opacity-50 cursor-not-allowed pointer-events-none"
       )}
-      onClick={disabled ? undefined : onClick}
+      onClick={disabled || soldOut ? undefined : onClick}
     >
       {/* Image section - fixed height */}
       <div className="h-24">
@@ -78,6 +80,9 @@ const MenuCard: FC<MenuCardProps> = ({
           <span className="text-sm font-semibold text-gray-900 tabular-nums">
             {formatCurrency(price)}
           </span>
+          {soldOut && (
+            <span className="ml-2 text-xs font-medium text-red-600">Sold out</span>
+          )}
         </div>
       </div>
     </div>
@@ -1,5 +1,7 @@
-import { useEffect, useMemo } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 import { usePOSStore } from '../store/pos-store';
+import { getMenuAvailability, subscribeMenuAvailability } from '../lib/menu-api';
+import { subscribe } from '../lib/realtime';
 import MenuCard from './MenuCard';
 import { Spinner } from './ui/spinner';
 import { cn } from '../lib/utils';
@@ -18,13 +20,49 @@ const MenuList: React.FC<MenuListProps> = ({ onItemClick }) => {
     quickFilter,
     fetchMenuItems,
     isMenuInteractionDisabled,
-    isOrderInteractionDisabled
+    isOrderInteractionDisabled,
+    posProfile
   } = usePOSStore();
+  const [soldOut, setSoldOut] = useState<Set<string>>(new Set());
 
   useEffect(() => {
     fetchMenuItems();
   }, [fetchMenuItems]);
 
+  // Grey out dishes the branch has run out of, kept current from pushed deltas
+  useEffect(() => {
+    if (!posProfile?.branch) return;
+    let unsubscribe: (() => void) | undefined;
+    let cancelled = false;
+    const refresh = () =>
+      getMenuAvailability()
+        .then((items) => !cancelled && setSoldOut(new Set(items)))
+        .catch((e) => console.error('Menu availability unavailable:', e));
+    refresh();
+    Promise.all([
+      subscribeMenuAvailability(posProfile.branch, (delta) => {
+        setSoldOut((prev) => {
+          const next = new Set(delta.reset ? [] : prev);
+          delta.sold_out?.forEach((item) => next.add(item));
+          delta.available?.forEach((item) => next.delete(item));
+          return next;
+        });
+      }),
+      // Deltas pushed while the socket was down are lost, so reload on reconnect
+      subscribe('connect', refresh),
+    ])
+      .then((offs) => {
+        const off = () => offs.forEach((stop) => stop());
+        if (cancelled) off();
+        else unsubscribe = off;
+      })
+      .catch((e) => console.error('Menu availability updates unavailable:', e));
+    return () => {
+      cancelled = true;
+      unsubscribe?.();
+    };
+  }, [posProfile?.branch]);
+
   const filteredItems = useMemo(() => {
     return menuItems.filter(item => {
       const searchTerm = searchQuery.toLowerCase();
@@ -78,6 +116,7 @@ const MenuList: React.FC<MenuListProps> = ({ onItemClick }) => {
                 item={item.item}
                 onClick={() => onItemClick(item)}
                 disabled={isInteractionDisabled}
+                soldOut={soldOut.has(item.item)}
               />
             ))}
           </div>
@@ -4,7 +4,7 @@ import { usePOSStore } from '../store/pos-store';
 import { Dialog, DialogContent } from './ui/dialog';
 import { Button } from './ui/button';
 import { cn } from '../lib/utils';
-import { getRooms, getTables, Room, Table } from '../lib/table-api';
+import { getFloorState, getRooms, Room, subscribeTableUpdates, Table } from '../lib/table-api';
 import { Badge } from './ui/badge';
 import { Spinner } from './ui/spinner';
 import { TableShapeIcon } from './TableShapeIcon';
@@ -77,7 +77,7 @@ const TableSelectionDialog: React.FC<Props> = ({ onClose }) => {
       }
       setLoadingTables(true);
       try {
-        const fetchedTables = await getTables(selectedRoom);
+        const { tables: fetchedTables } = await getFloorState(selectedRoom);
         const sortedTables = sortTables(fetchedTables);
         setTables(sortedTables);
         setTablesCache(prev => ({ ...prev, [selectedRoom]: fetchedTables }));
@@ -91,6 +91,30 @@ const TableSelectionDialog: React.FC<Props> = ({ onClose }) => {
     fetchTables();
   }, [selectedRoom]);
 
+  // Keep the open room and cached rooms current from pushed table rows
+  useEffect(() => {
+    if (!posProfile?.branch) return;
+    let unsubscribe: (() => void) | undefined;
+    let cancelled = false;
+    subscribeTableUpdates(posProfile.branch, (table) => {
+      const merge = (list: Table[]) =>
+        list.map((current) => (current.name === table.name ? { ...current, ...table } : current));
+      setTables((prev) => (prev.some((t) => t.name === table.name) ? merge(prev) : prev));
+      setTablesCache((prev) =>
+        prev[table.restaurant_room] ? { ...prev, [table.restaurant_room]: merge(prev[table.restaurant_room]) } : prev
+      );
+    })
+      .then((off) => {
+        if (cancelled) off();
+        else unsubscribe = off;
+      })
+      .catch((e) => console.error('Table updates unavailable:', e));
+    return () => {
+      cancelled = true;
+      unsubscribe?.();
+    };
+  }, [posProfile?.branch]);
+
   // Clear cache when modal closes
   useEffect(() => {
     if (!selectedRoom) {
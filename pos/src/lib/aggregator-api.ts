@@ -1,4 +1,4 @@
-import { call } from './frappe-sdk';
+import { bootstrapSession } from './bootstrap-api';
 
 export interface Aggregator {
   customer: string;
@@ -10,10 +10,8 @@ export interface GetAggregatorsResponse {
 
 export async function getAggregators(): Promise<Aggregator[]> {
   try {
-    const response = await call.get<GetAggregatorsResponse>(
-      'ury.ury_pos.api.getAggregator'
-    );
-    return response.message;
+    const { aggregators } = await bootstrapSession();
+    return aggregators;
   } catch (error: any) {
     if (error._server_messages) {
       const messages = JSON.parse(error._server_messages);
@@ -0,0 +1,83 @@
+import type { PosProfileFull, PosProfileLimited } from './pos-profile-api';
+import { Room, Table } from './table-api';
+import { storage } from './storage';
+
+const BOOTSTRAP_KEY = 'pos_bootstrap';
+
+export interface BootstrapSession {
+  etag: string;
+  pos_profile: PosProfileLimited;
+  profile: Pick<
+    PosProfileFull,
+    'name' | 'company' | 'customer' | 'warehouse' | 'restaurant' | 'branch' | 'currency' | 'paid_limit'
+  > & {
+    role_allowed_for_billing: { role: string }[];
+    role_restricted_for_table_order: { role: string }[];
+    transfer_role_permissions: { role: string }[];
+    view_all_status: number;
+    remove_items: number;
+    show_image: number;
+    custom_daily_pos_close: number;
+  };
+  currency_symbol: string | null;
+  roles: string[];
+  branch: string;
+  rooms: Room[];
+  room: string | null;
+  tables: Table[];
+  mode_of_payments: { mode_of_payment: string; opening_amount: number }[];
+  aggregators: { customer: string }[];
+  room_cashier: string | null;
+  pos_opening: number;
+  pos_close: string;
+  menu: {
+    items: unknown[];
+    modified_time: string;
+    name: string;
+  };
+}
+
+const sessions = new Map<string, Promise<BootstrapSession>>();
+
+// One round trip for the startup state, shared by every caller for the page
+// load; when nothing changed the server answers 304 and the copy from the
+// previous load is reused.
+export function bootstrapSession(room?: string | null): Promise<BootstrapSession> {
+  const key = room || '';
+  let session = sessions.get(key);
+  if (!session) {
+    session = fetchBootstrapSession(room);
+    sessions.set(key, session);
+    session.catch(() => sessions.delete(key));
+  }
+  return session;
+}
+
+async function fetchBootstrapSession(room?: string | null): Promise<BootstrapSession> {
+  const cached = storage.getItem(BOOTSTRAP_KEY);
+  const previous: BootstrapSession | null = cached ? JSON.parse(cached) : null;
+
+  const params = new URLSearchParams();
+  if (room) params.set('room', room);
+
+  const headers: Record<string, string> = { Accept: 'application/json' };
+  if (previous?.etag && (!room || previous.room === room)) {
+    headers['If-None-Match'] = previous.etag;
+  }
+
+  const response = await fetch(
+    `/api/method/ury.ury_pos.api.bootstrap_session?${params.toString()}`,
+    { credentials: 'include', headers }
+  );
+
+  if (response.status === 304 && previous) {
+    return previous;
+  }
+  if (!response.ok) {
+    throw new Error(`Failed to load POS session (${response.status})`);
+  }
+
+  const { message } = await response.json();
+  storage.setItem(BOOTSTRAP_KEY, JSON.stringify(message));
+  return message;
+}
@@ -34,13 +34,14 @@ interface GetPOSInvoicesResponse {
   message: {
     data: POSInvoice[];
     next: boolean;
+    cursor: [string, string] | null;
   };
 }
 
 interface GetPOSInvoicesParams {
   status: POSInvoice['status'];
   limit?: number;
-  limit_start?: number;
+  cursor?: [string, string] | null;
   paid_limit?: number;
 }
 
@@ -51,7 +52,7 @@ interface GetPOSInvoiceItemsResponse {
 export async function getPOSInvoices({ 
   status, 
   limit, 
-  limit_start,
+  cursor,
   paid_limit
 }: GetPOSInvoicesParams) {
   try {
@@ -63,13 +64,14 @@ export async function getPOSInvoices({
       {
         status,
         limit: actualLimit,
-        limit_start
+        ...(cursor && { cursor: JSON.stringify(cursor) })
       }
     );
 
     return {
       invoices: response.message.data,
-      hasMore: response.message.next
+      hasMore: response.message.next,
+      cursor: response.message.cursor
     };
   } catch (error) {
     console.error('Error fetching POS invoices:', error);
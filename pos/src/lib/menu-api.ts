@@ -1,4 +1,5 @@
 import { call } from './frappe-sdk';
+import { subscribe } from './realtime';
 
 export interface MenuItem {
   item: string;
@@ -61,4 +62,21 @@ export const getAggregatorMenu = async (aggregator: string) => {
     }
     throw error;
   }
-}; 
\ No newline at end of file
+};
+
+export interface MenuAvailabilityDelta {
+  sold_out?: string[];
+  available?: string[];
+  reset?: 1;
+}
+
+export const getMenuAvailability = async (): Promise<string[]> => {
+  const response = await call.get<{ message: { sold_out: string[] } }>(
+    'ury.ury.api.ury_menu_availability.get_menu_availability'
+  );
+  return response.message.sold_out;
+};
+
+export function subscribeMenuAvailability(branch: string, handler: (delta: MenuAvailabilityDelta) => void) {
+  return subscribe<MenuAvailabilityDelta>(`menu_availability_${branch}`, handler);
+}
@@ -1,13 +1,4 @@
-import { call } from './frappe-sdk';
-
-interface PaymentMode {
-  mode_of_payment: string;
-  opening_amount: number;
-}
-
-interface PaymentModeResponse {
-  message: PaymentMode[];
-}
+import { bootstrapSession } from './bootstrap-api';
 
 export const getPaymentModes = async (): Promise<string[]> => {
   // Check session storage first
@@ -17,9 +8,9 @@ export const getPaymentModes = async (): Promise<string[]> => {
   }
 
   try {
-    const response = await call.get<PaymentModeResponse>("ury.ury_pos.api.getModeOfPayment");
+    const { mode_of_payments } = await bootstrapSession();
 
-    const paymentModes = response.message.map((mode:PaymentMode) => mode.mode_of_payment);
+    const paymentModes = mode_of_payments.map((mode) => mode.mode_of_payment);
     
     // Cache in session storage
     sessionStorage.setItem('payment_modes', JSON.stringify(paymentModes));
@@ -1,4 +1,4 @@
-import { call } from './frappe-sdk';
+import { bootstrapSession } from './bootstrap-api';
 
 export interface POSOpeningResponse {
   message: number;
@@ -10,27 +10,19 @@ export interface POSCloseValidationResponse {
 
 export const checkPOSOpening = async (): Promise<POSOpeningResponse> => {
   try {
-    const response = await call.get<POSOpeningResponse>(
-      'ury.ury_pos.api.posOpening'
-    );
-    
-    return response;
+    const { pos_opening } = await bootstrapSession();
+    return { message: pos_opening };
   } catch (error) {
     console.error('Error checking POS opening status:', error);
     throw error;
   }
 };
 
-export const validatePOSClose = async (posProfile: string): Promise<POSCloseValidationResponse> => {
+// The close check of the branch's POS Profile, which is the only one a user has
+export const validatePOSClose = async (_posProfile: string): Promise<POSCloseValidationResponse> => {
   try {
-    const response = await call.get<POSCloseValidationResponse>(
-      'ury.ury_pos.api.validate_pos_close',
-      {
-        pos_profile: posProfile
-      }
-    );
-    
-    return response;
+    const { pos_close } = await bootstrapSession();
+    return { message: pos_close };
   } catch (error) {
     console.error('Error validating POS close status:', error);
     throw error;
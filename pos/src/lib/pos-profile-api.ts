@@ -1,5 +1,4 @@
-import { DOCTYPES } from '../data/doctypes';
-import { call, db } from './frappe-sdk';
+import { bootstrapSession } from './bootstrap-api';
 
 // Limited fields response
 export interface PosProfileLimited {
@@ -99,27 +98,14 @@ export interface PosProfileFullResponse {
   message: PosProfileFull;
 }
 
-export async function getPosProfileLimitedFields(): Promise<PosProfileLimited> {
-  const res = await call.get('ury.ury_pos.api.getPosProfile');
-  return res.message;
-}
-
-export async function getPosProfileFull(posProfileName: string): Promise<PosProfileFull> {
-  const doc = await db.getDoc(DOCTYPES.POS_PROFILE, posProfileName);
-  return doc;
-}
-
 export async function getCombinedPosProfile(): Promise<PosProfileCombined> {
-  // Get limited fields first
-  const limitedProfile = await getPosProfileLimitedFields();
-  console.log('limitedProfile', limitedProfile);
-  
-  // Get full profile using the pos_profile name from limited profile
-  const fullProfile = await getPosProfileFull(limitedProfile.pos_profile);
-  
+  // Session details and the profile settings both come from the bootstrap payload
+  const session = await bootstrapSession();
+  const limitedProfile = session.pos_profile;
+
   // Merge both profiles
   const combinedProfile: PosProfileCombined = {
-    ...fullProfile,
+    ...(session.profile as unknown as PosProfileFull),
     waiter: limitedProfile.waiter,
     cashier: limitedProfile.cashier,
     print_format: limitedProfile.print_format,
@@ -137,8 +123,3 @@ export async function getCombinedPosProfile(): Promise<PosProfileCombined> {
 
   return combinedProfile;
 }
-
-export async function getCurrencyInfo(currencyCode: string): Promise<Currency> {
-  const doc = await db.getDoc(DOCTYPES.CURRENCY, currencyCode);
-  return doc;
-}
\ No newline at end of file
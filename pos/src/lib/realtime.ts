@@ -0,0 +1,48 @@
+// Minimal socket.io subscription against the Frappe realtime server.
+// The client script is served by the realtime server itself, so no extra npm dependency is needed.
+
+interface RealtimeSocket {
+  on: (event: string, handler: (data: unknown) => void) => void;
+  off: (event: string, handler?: (data: unknown) => void) => void;
+}
+
+declare global {
+  interface Window {
+    io?: (url: string, options?: Record<string, unknown>) => RealtimeSocket;
+  }
+}
+
+let socketPromise: Promise<RealtimeSocket> | null = null;
+
+function loadSocketClient(): Promise<void> {
+  if (window.io) return Promise.resolve();
+  return new Promise((resolve, reject) => {
+    const script = document.createElement('script');
+    script.src = '/socket.io/socket.io.js';
+    script.onload = () => resolve();
+    script.onerror = () => reject(new Error('Failed to load socket.io client'));
+    document.head.appendChild(script);
+  });
+}
+
+export function getSocket(): Promise<RealtimeSocket> {
+  if (!socketPromise) {
+    socketPromise = (async () => {
+      await loadSocketClient();
+      const response = await fetch('/api/method/ury.ury.api.ury_kot_display.get_site_name');
+      const data = await response.json();
+      return window.io!(`${window.location.origin}/${data.message.site_name}`, { withCredentials: true });
+    })();
+    socketPromise.catch(() => {
+      socketPromise = null;
+    });
+  }
+  return socketPromise;
+}
+
+export async function subscribe<T>(channel: string, handler: (data: T) => void) {
+  const socket = await getSocket();
+  const listener = (data: unknown) => handler(data as T);
+  socket.on(channel, listener);
+  return () => socket.off(channel, listener);
+}
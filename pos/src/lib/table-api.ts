@@ -1,5 +1,7 @@
 import { DOCTYPES } from '../data/doctypes';
+import { bootstrapSession } from './bootstrap-api';
 import { db } from './frappe-sdk';
+import { subscribe } from './realtime';
 
 export interface Room {
   name: string;
@@ -27,13 +29,8 @@ export async function getRestaurantMenu(posProfile: string, room?: string | null
 }
 
 export async function getRooms(branch: string): Promise<Room[]> {
-  const rooms = await db.getDocList(DOCTYPES.URY_ROOM, {
-    fields: ['name', 'branch'],
-    filters: [['branch', 'like', branch]],
-    limit: "*" as unknown as number,
-    asDict: true,
-  });
-  return rooms as Room[];
+  const { rooms } = await bootstrapSession();
+  return rooms.filter((room) => room.branch === branch);
 }
 
 export async function getTables(room: string): Promise<Table[]> {
@@ -42,6 +39,36 @@ export async function getTables(room: string): Promise<Table[]> {
   return res.message as Table[];
 } 
 
+// Floor-plan row: a table plus its open invoice and KOT progress
+export interface FloorTable extends Table {
+  invoice: string | null;
+  grand_total: number | null;
+  rounded_total: number | null;
+  pax: number | null;
+  waiter: string | null;
+  invoice_time: string | null;
+  elapsed_minutes: number | null;
+  attention: number;
+  pending_kots: number;
+  served_kots: number;
+}
+
+export interface FloorState {
+  tables: FloorTable[];
+  table_attention_time: number | null;
+  server_time: string;
+}
+
+export async function getFloorState(room: string): Promise<FloorState> {
+  const { call } = await import('./frappe-sdk');
+  const res = await call.get('ury.ury.api.ury_floor.get_floor_state', { room });
+  return res.message as FloorState;
+}
+
+export function subscribeTableUpdates(branch: string, handler: (table: FloorTable) => void) {
+  return subscribe<FloorTable>(`ury_table_${branch}`, handler);
+}
+
 export async function getTableCount(room: string, branch?: string): Promise<number> {
   const filters = [
     ['restaurant_room', '=', room],
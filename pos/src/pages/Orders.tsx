@@ -13,6 +13,8 @@ import { useNavigate } from 'react-router-dom';
 import PaymentDialog from '../components/PaymentDialog';
 import { printOrder } from '../lib/print';
 import { call } from '../lib/frappe-sdk';
+import { subscribe } from '../lib/realtime';
+import { InvoiceDelta } from '../store/slices/orders-slice';
 
 export default function Orders() {
   const { 
@@ -32,7 +34,8 @@ export default function Orders() {
     goToPreviousPage,
     selectOrder,
     clearSelectedOrder,
-    orderSearchQuery
+    orderSearchQuery,
+    applyInvoiceDelta
   } = useRootStore();
 
   const posStore = usePOSStore();
@@ -49,6 +52,24 @@ export default function Orders() {
     fetchOrders();
   }, [fetchOrders]);
 
+  // Merge invoice changes pushed by the server instead of refetching the list
+  const branch = posStore.posProfile?.branch;
+  useEffect(() => {
+    if (!branch) return;
+    let unsubscribe: (() => void) | undefined;
+    let cancelled = false;
+    subscribe<InvoiceDelta>(`pos_invoice_${branch}`, applyInvoiceDelta)
+      .then((off) => {
+        if (cancelled) off();
+        else unsubscribe = off;
+      })
+      .catch((error) => console.error('Failed to subscribe to invoice updates:', error));
+    return () => {
+      cancelled = true;
+      unsubscribe?.();
+    };
+  }, [branch, applyInvoiceDelta]);
+
   useEffect(() => {
     if (!mounted.current) {
       mounted.current = true;
@@ -2,7 +2,8 @@ import { create } from 'zustand';
 import { v4 as uuidv4 } from 'uuid';
 import { storage } from '../lib/storage';
 import { getRestaurantMenu, getAggregatorMenu, MenuItem as APIMenuItem } from '../lib/menu-api';
-import { getCurrencyInfo, PosProfileCombined, getCombinedPosProfile } from '../lib/pos-profile-api';
+import { PosProfileCombined, getCombinedPosProfile } from '../lib/pos-profile-api';
+import { bootstrapSession } from '../lib/bootstrap-api';
 import { getMenuCourses } from '../lib/menu-course-api';
 import { getCustomerGroups, getCustomerTerritories } from '../lib/customer-api';
 import { DEFAULT_ORDER_TYPE, OrderType } from '../data/order-types';
@@ -271,10 +272,9 @@ export const usePOSStore = create<POSStore>((set, get) => ({
 
   fetchCurrencySymbol: async () => {
     try {
-      const currency = get().currency;
-      const response = await getCurrencyInfo(currency);
-      const { symbol } = response;
-      
+      const { currency_symbol } = await bootstrapSession();
+      const symbol = currency_symbol || get().currency;
+
       set({ currencySymbol: symbol });
       storage.setItem('currencySymbol', symbol);
     } catch (error) {
@@ -22,6 +22,11 @@ export interface POSInvoice {
   order_type: OrderType;
 }
 
+// Row pushed on the per-branch `pos_invoice_<branch>` realtime channel
+export interface InvoiceDelta extends POSInvoice {
+  list_status: POSInvoice['status'];
+}
+
 export interface OrdersState {
   orders: POSInvoice[];
   orderLoading: boolean;
@@ -30,6 +35,8 @@ export interface OrdersState {
     currentPage: number;
     hasNextPage: boolean;
     itemsPerPage: number;
+    // cursors[n] is the keyset cursor that starts page n + 1
+    cursors: ([string, string] | null)[];
   };
   selectedStatus: 'Draft' | 'Unbilled' | 'Recently Paid' | 'Paid' | 'Consolidated' | 'Return';
   selectedOrder: POSInvoice | null;
@@ -49,6 +56,7 @@ export interface OrdersActions {
   selectOrder: (order: POSInvoice) => Promise<void>;
   clearSelectedOrder: () => void;
   setOrderSearchQuery: (query: string) => void;
+  applyInvoiceDelta: (row: InvoiceDelta) => void;
 }
 
 export type OrdersSlice = OrdersState & OrdersActions;
@@ -69,6 +77,7 @@ export const createOrdersSlice: StateCreator<
     currentPage: 1,
     hasNextPage: false,
     itemsPerPage: ITEMS_PER_PAGE,
+    cursors: [null],
   },
   selectedStatus: 'Draft',
   selectedOrder: null,
@@ -98,18 +107,19 @@ export const createOrdersSlice: StateCreator<
             currentPage: 1,
             hasNextPage: false,
             itemsPerPage: ITEMS_PER_PAGE,
+            cursors: [null],
           },
           orderLoading: false
         });
         return;
       }
       // Default fetch
-      const limitStart = (page - 1) * ITEMS_PER_PAGE;
+      const cursors = page === 1 ? [null] : get().pagination.cursors.slice(0, page);
       const status = selectedStatus;
-      const { invoices, hasMore } = await getPOSInvoices({
+      const { invoices, hasMore, cursor } = await getPOSInvoices({
         status,
         limit: ITEMS_PER_PAGE,
-        limit_start: limitStart,
+        cursor: cursors[page - 1],
         paid_limit: paidLimit
       });
       set({ 
@@ -118,6 +128,7 @@ export const createOrdersSlice: StateCreator<
           currentPage: page,
           hasNextPage: hasMore,
           itemsPerPage: ITEMS_PER_PAGE,
+          cursors: [...cursors, cursor],
         },
         orderLoading: false 
       });
@@ -129,6 +140,21 @@ export const createOrdersSlice: StateCreator<
     }
   },
 
+  applyInvoiceDelta: (row) => {
+    const { orders, selectedStatus, pagination, orderSearchQuery, selectedOrder } = get();
+    if (orderSearchQuery) return;
+
+    const remaining = orders.filter((order) => order.name !== row.name);
+    const { list_status, ...invoice } = row;
+    // Lists are ordered by modified desc, so changed rows move to the top of page one
+    const belongs = list_status === selectedStatus && pagination.currentPage === 1;
+
+    set({
+      orders: belongs ? [invoice, ...remaining] : remaining,
+      ...(selectedOrder?.name === row.name && { selectedOrder: { ...selectedOrder, ...invoice } }),
+    });
+  },
+
   goToNextPage: async () => {
     const { pagination, orderLoading } = get();
     if (!orderLoading && pagination.hasNextPage) {
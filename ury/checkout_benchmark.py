@@ -0,0 +1,160 @@
+import statistics
+import time
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import flt
+
+from ury.ury.api.ury_print import print_pos_page
+from ury.ury.doctype.ury_order.ury_order import make_invoice, quick_checkout, sync_order
+
+# Times a take-away checkout through quick_checkout against the calls the POS
+# made before it: sync_order, the bill print and make_invoice. Each call is
+# committed on its own, as separate requests would be, so the legacy flow pays
+# for three transactions and quick_checkout for one. Run it on a test site,
+# the orders it settles are kept:
+#
+#   bench --site <site> ury-benchmark-checkout --pos-profile POS-1 \
+#       --customer Walk-in --item "Masala Dosa"
+#
+# Nothing is printed: bills are queued under a throwaway print queue that is
+# dropped afterwards, print_<branch> events are not published, and network
+# bill and KOT printing are skipped, so printer round trips are not timed.
+
+ORDER_TYPE = "Take Away"
+PRINT_QUEUE_KEY = "ury_print_jobs_benchmark"
+
+
+def run(pos_profile, customer, item, qty=1, runs=20):
+    """Median, p95 and mean milliseconds of both checkout flows over `runs` orders."""
+    runs = int(runs)
+    profile = frappe.get_cached_doc("POS Profile", pos_profile)
+    mode_of_payment = profile.payments[0].mode_of_payment
+    items = [{
+        "item": item,
+        "item_name": frappe.db.get_value("Item", item, "item_name"),
+        "qty": flt(qty),
+        "comment": "",
+    }]
+    order = frappe._dict(
+        items=items,
+        customer=customer,
+        cashier=frappe.session.user,
+        owner=frappe.session.user,
+        waiter=frappe.session.user,
+        pos_profile=pos_profile,
+        mode_of_payment=mode_of_payment,
+        print_format=profile.print_format,
+    )
+
+    with isolated_printing():
+        return benchmark(order, runs)
+
+
+def benchmark(order, runs):
+    # Warms the caches and prices the order for quick_checkout's payment
+    invoice = legacy_checkout(order)
+    amount = frappe.db.get_value("POS Invoice", invoice, "rounded_total") or frappe.db.get_value(
+        "POS Invoice", invoice, "grand_total"
+    )
+    order.payments = [{"mode_of_payment": order.mode_of_payment, "amount": amount}]
+    quick_checkout_order(order)
+
+    legacy = {"sync_order": [], "print": [], "make_invoice": [], "total": []}
+    quick = []
+    # Interleaved so drift in the site's load hits both flows alike
+    for _ in range(runs):
+        steps = {}
+        legacy_checkout(order, steps)
+        for step, elapsed in steps.items():
+            legacy[step].append(elapsed)
+        legacy["total"].append(sum(steps.values()))
+
+        started = time.perf_counter()
+        quick_checkout_order(order)
+        quick.append((time.perf_counter() - started) * 1000)
+
+    result = {
+        "runs": runs,
+        "legacy": {step: summarize(timings) for step, timings in legacy.items()},
+        "quick_checkout": summarize(quick),
+    }
+    result["speedup"] = round(result["legacy"]["total"]["median_ms"] / result["quick_checkout"]["median_ms"], 2)
+    return result
+
+
+@contextmanager
+def isolated_printing():
+    """Keep the benchmark's bills and KOTs off the branch's printers."""
+    publish_realtime = frappe.publish_realtime
+    enqueue = frappe.enqueue
+
+    def publish(event=None, *args, **kwargs):
+        if not (event or "").startswith("print_"):
+            return publish_realtime(event, *args, **kwargs)
+
+    def enqueue_job(method, *args, **kwargs):
+        if method != "ury.ury.api.ury_print.select_network_printer":
+            return enqueue(method, *args, **kwargs)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch("ury.ury.api.ury_print.get_print_queue_key", return_value=PRINT_QUEUE_KEY))
+        stack.enter_context(patch.object(frappe, "publish_realtime", publish))
+        stack.enter_context(patch.object(frappe, "enqueue", enqueue_job))
+        stack.enter_context(patch("ury.ury.doctype.ury_kot.ury_kot.print_by_server"))
+        try:
+            yield
+        finally:
+            frappe.cache().delete_value(PRINT_QUEUE_KEY)
+
+
+def legacy_checkout(order, steps=None):
+    """sync_order, print and make_invoice, each in its own transaction."""
+    steps = {} if steps is None else steps
+
+    started = time.perf_counter()
+    invoice = sync_order(
+        order.items, order.cashier, order.owner, order.mode_of_payment, order.customer,
+        1, None, order.waiter, order.pos_profile, order_type=ORDER_TYPE,
+    )
+    frappe.db.commit()
+    steps["sync_order"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    print_pos_page("POS Invoice", invoice["name"], order.print_format)
+    frappe.db.commit()
+    steps["print"] = (time.perf_counter() - started) * 1000
+
+    amount = invoice["rounded_total"] or invoice["grand_total"]
+    started = time.perf_counter()
+    make_invoice(
+        customer=order.customer,
+        payments=[{"mode_of_payment": order.mode_of_payment, "amount": amount}],
+        cashier=order.cashier,
+        pos_profile=order.pos_profile,
+        owner=order.owner,
+        invoice=invoice["name"],
+    )
+    frappe.db.commit()
+    steps["make_invoice"] = (time.perf_counter() - started) * 1000
+
+    return invoice["name"]
+
+
+def quick_checkout_order(order):
+    result = quick_checkout(
+        order.items, order.customer, order.payments, order.cashier, order.owner,
+        order.waiter, order.pos_profile, order_type=ORDER_TYPE,
+    )
+    frappe.db.commit()
+    return result
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "mean_ms": round(statistics.mean(timings), 2),
+    }
@@ -0,0 +1,59 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("ury-rebuild-customer-item-stats")
+@pass_context
+def rebuild_customer_item_stats(context):
+	"Rebuild URY Customer Item Stats from submitted POS Invoices"
+	import frappe
+
+	from ury.ury.api.ury_customer_item_stats import rebuild_customer_item_stats
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		rebuild_customer_item_stats()
+	finally:
+		frappe.destroy()
+
+
+@click.command("ury-rebuild-customer-stats")
+@pass_context
+def rebuild_customer_stats(context):
+	"Rebuild URY Customer Stats from submitted POS Invoices"
+	import frappe
+
+	from ury.ury.api.ury_customer_stats import rebuild_customer_stats
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		rebuild_customer_stats()
+	finally:
+		frappe.destroy()
+
+
+@click.command("ury-benchmark-checkout")
+@click.option("--pos-profile", required=True, help="POS Profile to place the orders on")
+@click.option("--customer", required=True, help="Customer of the orders")
+@click.option("--item", required=True, help="Menu item to order")
+@click.option("--qty", default=1, type=float, help="Quantity of the item per order")
+@click.option("--runs", default=20, type=int, help="Orders to time per flow")
+@pass_context
+def benchmark_checkout(context, pos_profile, customer, item, qty=1, runs=20):
+	"Time quick_checkout against sync_order, print and make_invoice (settles real orders)"
+	import frappe
+
+	from ury.checkout_benchmark import run
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		frappe.set_user("Administrator")
+		click.echo(frappe.as_json(run(pos_profile, customer, item, qty=qty, runs=runs)))
+	finally:
+		frappe.destroy()
+
+
+commands = [rebuild_customer_item_stats, rebuild_customer_stats, benchmark_checkout]
@@ -125,26 +125,91 @@ doc_events = {
             "ury.ury.api.ury_kot_order_number.set_order_number",
             "ury.ury.hooks.ury_pos_invoice.after_insert"
         ],
+        "on_update": [
+            "ury.ury.api.ury_search_index.on_update",
+            "ury.ury.api.ury_invoice_events.publish_invoice_delta"
+        ],
         "before_submit": "ury.ury.hooks.ury_pos_invoice.before_submit",
-        "on_update_after_submit": "ury.ury.hooks.ury_pos_invoice.on_update_after_submit",
-        "on_cancel": "ury.ury.hooks.ury_pos_invoice.on_trash",
-        "on_trash": "ury.ury.hooks.ury_pos_invoice.on_trash",
+        "on_submit": [
+            "ury.ury.api.ury_customer_item_stats.on_submit",
+            "ury.ury.api.ury_recommendation.on_submit",
+            "ury.ury.api.ury_customer_stats.on_submit",
+            "ury.ury.api.ury_floor.publish_invoice_table"
+        ],
+        "on_update_after_submit": [
+            "ury.ury.hooks.ury_pos_invoice.on_update_after_submit",
+            "ury.ury.api.ury_invoice_events.publish_invoice_delta"
+        ],
+        "on_cancel": [
+            "ury.ury.hooks.ury_pos_invoice.on_trash",
+            "ury.ury.api.ury_customer_item_stats.on_cancel",
+            "ury.ury.api.ury_customer_stats.on_cancel",
+            "ury.ury.api.ury_invoice_events.publish_invoice_delta"
+        ],
+        "on_trash": [
+            "ury.ury.hooks.ury_pos_invoice.on_trash",
+            "ury.ury.api.ury_search_index.on_trash"
+        ],
     },
     "POS Profile": {"validate": "ury.ury.hooks.ury_pos_profile.validate"},
+    "URY Table": {
+        "on_update": "ury.ury.api.ury_table_occupancy.on_table_update",
+        "on_trash": "ury.ury.api.ury_table_occupancy.on_table_update",
+        },
     "Sales Invoice": {
         "before_insert": "ury.ury.hooks.ury_sales_invoice.before_insert",
         "on_update":"ury.ury.hooks.ury_sales_invoice.on_update",
         },
+    "BOM": {
+        "on_submit": [
+            "ury.ury.api.ury_bom_cache.on_bom_change",
+            "ury.ury.api.ury_menu_availability.on_bom_change"
+        ],
+        "on_update_after_submit": [
+            "ury.ury.api.ury_bom_cache.on_bom_change",
+            "ury.ury.api.ury_menu_availability.on_bom_change"
+        ],
+        "on_cancel": [
+            "ury.ury.api.ury_bom_cache.on_bom_change",
+            "ury.ury.api.ury_menu_availability.on_bom_change"
+        ],
+        "on_trash": [
+            "ury.ury.api.ury_bom_cache.on_bom_change",
+            "ury.ury.api.ury_menu_availability.on_bom_change"
+        ],
+        },
+    "Stock Ledger Entry": {
+        "on_submit": "ury.ury.api.ury_menu_availability.on_stock_ledger_entry",
+        },
+    "URY Menu": {
+        "on_update": "ury.ury.api.ury_menu_availability.on_menu_change",
+        "on_trash": "ury.ury.api.ury_menu_availability.on_menu_change",
+        },
+    "URY Restaurant": {
+        "on_update": "ury.ury.api.ury_menu_availability.on_menu_change",
+        },
     "Customer": {"before_save": "ury.ury.hooks.ury_customer.before_insert"},
     "Item": {"validate": "ury.ury.hooks.ury_item.validate"},
     "POS Opening Entry": {
         "validate":"ury.ury.hooks.ury_pos_opening_entry.set_cashier_room",
         "before_save": "ury.ury.hooks.ury_pos_opening_entry.before_save",
         "before_insert":"ury.ury.api.ury_kot_order_number.set_last_invoice_in_pos_open",
+        "on_submit": "ury.ury.api.ury_pos_session.on_opening_entry_change",
+        "on_update_after_submit": "ury.ury.api.ury_pos_session.on_opening_entry_change",
+        "on_cancel": "ury.ury.api.ury_pos_session.on_opening_entry_change",
         },
     "POS Closing Entry": {
         "before_save": "ury.ury.hooks.ury_pos_closing_entry.before_save",
-        "validate":"ury.ury.hooks.ury_pos_closing_entry.validate"
+        "validate":"ury.ury.hooks.ury_pos_closing_entry.validate",
+        "on_submit": [
+            "ury.ury.api.ury_pos_session.on_closing_entry_change",
+            "ury.ury.api.ury_consumption_journal.post_closing_consumption"
+        ],
+        "on_cancel": "ury.ury.api.ury_pos_session.on_closing_entry_change",
+        },
+    "Sub POS Closing": {
+        "on_submit": "ury.ury.api.ury_pos_session.on_closing_entry_change",
+        "on_cancel": "ury.ury.api.ury_pos_session.on_closing_entry_change",
         },
     "URY Menu Course": {
 		"validate": "ury.ury.api.ury_menu_course_validation.validate_priority",
@@ -158,8 +223,20 @@ scheduler_events = {
     "cron":{
 		"* * * * *":[
 			"ury.ury.api.ury_kot_validation.kotValidationThread"
+		],
+		"*/5 * * * *":[
+			"ury.ury.api.ury_table_occupancy.reconcile_occupancy"
+		],
+		"*/15 * * * *":[
+			"ury.ury.api.ury_consumption_journal.post_consumption"
 		]
-	}
+	},
+	"daily": [
+		"ury.ury.api.ury_recommendation.rebuild_item_recommendations"
+	],
+	"hourly": [
+		"ury.ury.api.ury_stock_forecast.rebuild_ingredient_forecast"
+	],
 # 	"all": [
 # 		"ury.tasks.all"
 # 	],
@@ -205,6 +282,9 @@ scheduler_events = {
 
 # ignore_links_on_delete = ["Communication", "ToDo"]
 
+# Reversal lines of the consumption journal keep pointing at deleted orders
+ignore_links_on_delete = ["URY Consumption Journal"]
+
 # Request Events
 # ----------------
 # before_request = ["ury.utils.before_request"]
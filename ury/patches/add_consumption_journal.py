@@ -0,0 +1,8 @@
+import frappe
+
+from ury.ury.setup.inventory_setup import create_pos_profile_deferred_posting_field
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_consumption_journal")
+    create_pos_profile_deferred_posting_field()
@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+    # Pending lines of a warehouse in ury.ury.api.ury_consumption_journal.claim_pending_lines
+    frappe.db.add_index(
+        "URY Consumption Journal",
+        ["posted", "warehouse"],
+        index_name="ury_consumption_journal_pending_index",
+    )
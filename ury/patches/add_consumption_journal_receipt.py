@@ -0,0 +1,15 @@
+import frappe
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_consumption_journal")
+
+    # stock_entry used to hold the receipt when a run posted no issue
+    frappe.db.sql(
+        """
+        UPDATE `tabURY Consumption Journal` j
+        INNER JOIN `tabStock Entry` se ON se.name = j.stock_entry
+        SET j.receipt_entry = j.stock_entry, j.stock_entry = NULL
+        WHERE se.purpose = 'Material Receipt'
+        """
+    )
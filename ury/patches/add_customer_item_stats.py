@@ -0,0 +1,13 @@
+import frappe
+
+from ury.ury.api.ury_customer_item_stats import rebuild_customer_item_stats
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_customer_item_stats")
+    frappe.db.add_index(
+        "URY Customer Item Stats",
+        ["customer", "qty"],
+        index_name="ury_customer_qty_index",
+    )
+    rebuild_customer_item_stats()
@@ -0,0 +1,13 @@
+import frappe
+
+from ury.ury.api.ury_customer_stats import rebuild_customer_stats
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_customer_stats")
+    frappe.db.add_index(
+        "URY Customer Stats",
+        ["customer", "branch"],
+        index_name="ury_customer_branch_index",
+    )
+    rebuild_customer_stats()
@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+    # Lookups of a table's open invoice and its KOTs in ury.ury.api.ury_floor.get_table_rows
+    frappe.db.add_index(
+        "POS Invoice",
+        ["restaurant_table", "docstatus", "invoice_printed"],
+        index_name="ury_restaurant_table_open_index",
+    )
+    frappe.db.add_index("URY KOT", ["invoice", "docstatus"], index_name="ury_kot_invoice_index")
@@ -0,0 +1,8 @@
+import frappe
+
+from ury.ury.api.ury_stock_forecast import rebuild_ingredient_forecast
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_ingredient_forecast")
+    rebuild_ingredient_forecast()
@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+    # The index is filled by ury.patches.rebuild_invoice_search_tokens
+    frappe.reload_doc("ury", "doctype", "ury_invoice_search_token")
+    frappe.db.add_index(
+        "URY Invoice Search Token",
+        ["token", "branch", "invoice"],
+        index_name="ury_token_branch_invoice_index",
+    )
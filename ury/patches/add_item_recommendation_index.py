@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_item_recommendation")
+    frappe.db.add_index(
+        "URY Item Recommendation",
+        ["branch", "item", "lift"],
+        index_name="ury_branch_item_lift_index",
+    )
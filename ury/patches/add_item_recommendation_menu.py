@@ -0,0 +1,13 @@
+import frappe
+
+from ury.ury.api.ury_recommendation import rebuild_item_recommendations
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_item_recommendation")
+    frappe.db.add_index(
+        "URY Item Recommendation",
+        ["branch", "menu", "item", "lift"],
+        index_name="ury_branch_menu_item_lift_index",
+    )
+    rebuild_item_recommendations()
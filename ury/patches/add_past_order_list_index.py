@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+    # Supports ury.ury.api.pos_extend.overrided_past_order_list
+    frappe.db.add_index(
+        "POS Invoice",
+        ["branch", "custom_restaurant_room", "status", "invoice_printed", "modified"],
+        index_name="ury_branch_room_status_printed_index",
+    )
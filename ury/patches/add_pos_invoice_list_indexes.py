@@ -0,0 +1,15 @@
+import frappe
+
+
+def execute():
+    # Covering indexes for the cashier invoice lists in ury.ury_pos.api.get_invoice_list
+    frappe.db.add_index(
+        "POS Invoice",
+        ["branch", "status", "cashier", "modified", "name"],
+        index_name="ury_branch_status_cashier_modified_index",
+    )
+    frappe.db.add_index(
+        "POS Invoice",
+        ["branch", "status", "modified", "name"],
+        index_name="ury_branch_status_modified_index",
+    )
@@ -0,0 +1,8 @@
+import frappe
+
+from ury.ury.setup.inventory_setup import create_stock_entry_consumption_field
+
+
+def execute():
+    frappe.reload_doc("ury", "doctype", "ury_ingredient_consumption")
+    create_stock_entry_consumption_field()
@@ -0,0 +1,6 @@
+from ury.ury.api.ury_search_index import rebuild_search_index
+
+
+def execute():
+    # Mobile numbers are now indexed as trigrams instead of suffixes
+    rebuild_search_index()
@@ -46,24 +46,44 @@ frappe.pages["point-of-sale"].on_page_load = function (wrapper) {
       refresh_list() {
         frappe.dom.freeze();
         this.events.reset_summary();
+        this.$invoices_container.html("");
+        this.cursor = null;
+        this.bind_infinite_scroll();
+
+        return this.load_invoices();
+      }
+      load_invoices() {
         const search_term = this.search_field.get_value();
         const status = this.status_field.get_value();
-
-        this.$invoices_container.html("");
+        const cursor = this.cursor;
+        this.loading = true;
 
         return frappe.call({
           method: "ury.ury.api.pos_extend.overrided_past_order_list",
-          freeze: true,
-          args: { search_term, status },
+          freeze: !cursor,
+          args: { search_term, status, cursor: cursor && JSON.stringify(cursor) },
           callback: (response) => {
             frappe.dom.unfreeze();
-            response.message.forEach((invoice) => {
+            this.loading = false;
+            this.cursor = response.message.cursor;
+            response.message.data.forEach((invoice) => {
               const invoice_html = this.get_invoice_html(invoice);
               this.$invoices_container.append(invoice_html);
             });
           },
         });
       }
+      bind_infinite_scroll() {
+        if (this.infinite_scroll_bound) return;
+        this.infinite_scroll_bound = true;
+
+        this.$invoices_container.on("scroll", () => {
+          const container = this.$invoices_container.get(0);
+          const near_bottom =
+            container.scrollTop + container.clientHeight >= container.scrollHeight - 50;
+          if (near_bottom && this.cursor && !this.loading) this.load_invoices();
+        });
+      }
     };
 
     erpnext.PointOfSale.Controller = class MyPosController extends (
@@ -165,8 +165,8 @@ frappe.ui.form.on('POS Invoice', {
                         },
                         callback: function (r) {
                             $('.standard-actions').addClass('hidden-xs hidden-md');
-                            cur_frm.set_value('invoice_printed', 1);
-                            frappe.show_alert({ message: __('Invoice Printed'), indicator: 'green' });
+                            // invoice_printed is set by the server once the print page acknowledges the job
+                            frappe.show_alert({ message: __('Invoice sent to printer'), indicator: 'green' });
                             frappe.ui.toolbar.clear_cache()
                             frappe.dom.unfreeze();
                         }
@@ -190,23 +190,30 @@ def get_food_cost_analysis(from_date=None, to_date=None):
 def get_inventory_status():
     """Get current inventory status and alerts"""
     try:
-        # Get low stock items
+        # Get low stock items (live stock against the forecast reorder point,
+        # or the item's safety stock where nothing has been forecast yet)
         low_stock_items = frappe.db.sql("""
             SELECT 
                 b.item_code,
                 i.item_name,
                 b.actual_qty,
                 i.stock_uom,
-                COALESCE(i.safety_stock, 0) as safety_stock,
+                COALESCE(f.reorder_point, i.safety_stock, 10) as reorder_point,
+                f.lead_time_days,
+                f.days_of_cover,
                 b.warehouse
             FROM `tabBin` b
             INNER JOIN `tabItem` i ON b.item_code = i.item_code
-            WHERE b.actual_qty <= COALESCE(i.safety_stock, 10)
+            LEFT JOIN `tabURY Ingredient Forecast` f
+                ON f.item_code = b.item_code AND f.warehouse = b.warehouse
+            WHERE b.actual_qty <= COALESCE(f.reorder_point, i.safety_stock, 10)
             AND i.is_stock_item = 1
             AND b.actual_qty >= 0
-            ORDER BY b.actual_qty ASC
+            ORDER BY f.days_of_cover IS NULL, f.days_of_cover ASC, b.actual_qty ASC
             LIMIT 20
         """, as_dict=True)
+        for item in low_stock_items:
+            item.critical = is_critical_stock(item)
         
         # Get total inventory value
         inventory_value = frappe.db.sql("""
@@ -220,24 +227,19 @@ def get_inventory_status():
             AND b.actual_qty > 0
         """, as_dict=True)[0]
         
-        # Get fast moving items (high consumption)
+        # Get fast moving items (30 days at the forecast daily consumption)
         fast_moving = frappe.db.sql("""
             SELECT 
-                sei.item_code,
-                sei.item_name,
-                SUM(sei.qty) as total_consumed,
-                sei.uom,
-                COUNT(DISTINCT se.custom_pos_invoice) as frequency
-            FROM `tabStock Entry` se
-            INNER JOIN `tabStock Entry Detail` sei ON se.name = sei.parent
-            WHERE se.posting_date >= %s
-            AND se.stock_entry_type = 'Material Issue'
-            AND se.custom_pos_invoice IS NOT NULL
-            AND se.docstatus = 1
-            GROUP BY sei.item_code
-            ORDER BY total_consumed DESC
+                f.item_code,
+                f.item_name,
+                SUM(f.avg_daily_consumption) as avg_daily_consumption,
+                SUM(f.avg_daily_consumption) * 30 as total_consumed,
+                f.stock_uom as uom
+            FROM `tabURY Ingredient Forecast` f
+            GROUP BY f.item_code, f.item_name, f.stock_uom
+            ORDER BY avg_daily_consumption DESC
             LIMIT 10
-        """, (add_days(today(), -30),), as_dict=True)
+        """, as_dict=True)
         
         return {
             "low_stock_items": low_stock_items,
@@ -255,6 +257,17 @@ def get_inventory_status():
         return {}
 
 
+def is_critical_stock(item):
+    """Whether a low stock row runs out before a reorder placed now would arrive.
+
+    Without a forecast row there is no days of cover, so half the reorder
+    point counts as critical.
+    """
+    if item.days_of_cover is None:
+        return flt(item.actual_qty) <= flt(item.reorder_point) / 2
+    return item.days_of_cover < item.lead_time_days
+
+
 @frappe.whitelist()
 def get_top_selling_items(from_date=None, to_date=None, limit=10):
     """Get top selling menu items with profitability"""
@@ -371,31 +384,40 @@ def get_stock_alerts():
     try:
         alerts = []
         
-        # Low stock alerts
+        # Low stock alerts: live stock at or below the forecast reorder point,
+        # or the item's safety stock where nothing has been forecast yet
         low_stock = frappe.db.sql("""
             SELECT 
                 b.item_code,
                 i.item_name,
+                b.warehouse,
                 b.actual_qty,
                 i.stock_uom,
-                COALESCE(i.safety_stock, 0) as safety_stock
+                COALESCE(f.reorder_point, i.safety_stock, 5) as reorder_point,
+                f.lead_time_days,
+                f.days_of_cover
             FROM `tabBin` b
             INNER JOIN `tabItem` i ON b.item_code = i.item_code
-            WHERE b.actual_qty <= COALESCE(i.safety_stock, 5)
+            LEFT JOIN `tabURY Ingredient Forecast` f
+                ON f.item_code = b.item_code AND f.warehouse = b.warehouse
+            WHERE b.actual_qty <= COALESCE(f.reorder_point, i.safety_stock, 5)
             AND i.is_stock_item = 1
             AND b.actual_qty >= 0
-            ORDER BY b.actual_qty ASC
+            ORDER BY f.days_of_cover IS NULL, f.days_of_cover ASC, b.actual_qty ASC
             LIMIT 10
         """, as_dict=True)
         
         for item in low_stock:
+            cover = f", {item.days_of_cover} days of cover" if item.days_of_cover is not None else ""
             alerts.append({
                 "type": "low_stock",
-                "severity": "high" if item.actual_qty <= item.safety_stock / 2 else "medium",
-                "message": f"Low stock: {item.item_name} ({item.actual_qty} {item.stock_uom} remaining)",
+                "severity": "high" if is_critical_stock(item) else "medium",
+                "message": f"Low stock: {item.item_name} ({item.actual_qty} {item.stock_uom} remaining{cover})",
                 "item_code": item.item_code,
+                "warehouse": item.warehouse,
                 "current_qty": item.actual_qty,
-                "safety_stock": item.safety_stock
+                "reorder_point": item.reorder_point,
+                "days_of_cover": item.days_of_cover
             })
         
         # High food cost items
@@ -561,7 +583,9 @@ def get_realtime_metrics():
             SELECT COUNT(*) as count
             FROM `tabBin` b
             INNER JOIN `tabItem` i ON b.item_code = i.item_code
-            WHERE b.actual_qty <= COALESCE(i.safety_stock, 10)
+            LEFT JOIN `tabURY Ingredient Forecast` f
+                ON f.item_code = b.item_code AND f.warehouse = b.warehouse
+            WHERE b.actual_qty <= COALESCE(f.reorder_point, i.safety_stock, 10)
             AND i.is_stock_item = 1
             AND b.actual_qty >= 0
         """, as_dict=True)[0]
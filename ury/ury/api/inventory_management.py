@@ -5,6 +5,12 @@ Handles automatic ingredient deduction based on recipes (BOMs)
 
 import frappe
 from frappe import _
+from frappe.utils import flt
+
+from ury.ury.api.ury_stock_snapshot import get_actual_qty, get_stock_snapshot
+
+# Read-only stock checks may reuse a Bin snapshot this many seconds old
+STOCK_SNAPSHOT_TTL = 5
 
 @frappe.whitelist()
 def get_bom_ingredients(item_code):
@@ -49,13 +55,14 @@ def check_ingredient_stock(item_code, warehouse, required_qty):
     Check if sufficient stock is available for an ingredient
     """
     try:
-        available_qty = frappe.db.get_value("Bin", 
-            {"item_code": item_code, "warehouse": warehouse}, 
-            "actual_qty") or 0
+        required_qty = flt(required_qty)
+        stock = get_stock_snapshot([item_code], warehouse, cache_seconds=STOCK_SNAPSHOT_TTL)
+        available_qty = get_actual_qty(stock, item_code)
         
         return {
             "item_code": item_code,
             "available_qty": available_qty,
+            "projected_qty": stock.get(item_code, {}).get("projected_qty", 0),
             "required_qty": required_qty,
             "sufficient": available_qty >= required_qty,
             "shortage": max(0, required_qty - available_qty)
@@ -108,20 +115,32 @@ def simulate_ingredient_deduction(pos_invoice_name):
         
         simulation_results = []
         
+        boms = {}
         for item in pos_invoice.items:
             bom = frappe.db.get_value("BOM", 
                 {"item": item.item_code, "is_active": 1, "is_default": 1, "docstatus": 1}, 
                 "name")
             
             if bom:
-                bom_doc = frappe.get_doc("BOM", bom)
+                boms[item.item_code] = frappe.get_doc("BOM", bom)
+        
+        # Available stock of every ingredient in one query
+        stock = get_stock_snapshot(
+            [bom_item.item_code for bom_doc in boms.values() for bom_item in bom_doc.items],
+            warehouse,
+            cache_seconds=STOCK_SNAPSHOT_TTL,
+        )
+        
+        for item in pos_invoice.items:
+            bom_doc = boms.get(item.item_code)
+            
+            if bom_doc:
+                bom = bom_doc.name
                 item_ingredients = []
                 
                 for bom_item in bom_doc.items:
                     required_qty = (bom_item.qty / bom_doc.quantity) * item.qty
-                    available_qty = frappe.db.get_value("Bin", 
-                        {"item_code": bom_item.item_code, "warehouse": warehouse}, 
-                        "actual_qty") or 0
+                    available_qty = get_actual_qty(stock, bom_item.item_code)
                     
                     item_ingredients.append({
                         "ingredient_code": bom_item.item_code,
@@ -382,17 +401,24 @@ def validate_bom_ingredients_stock(bom_name, production_qty=1, warehouse=None):
         validation_results = []
         all_sufficient = True
         
+        # Available stock and stock UOM of every ingredient in one query each
+        ingredient_codes = [item.item_code for item in bom_doc.items]
+        stock = get_stock_snapshot(ingredient_codes, warehouse, cache_seconds=STOCK_SNAPSHOT_TTL)
+        stock_uoms = dict(frappe.get_all(
+            "Item",
+            fields=["name", "stock_uom"],
+            filters={"name": ("in", ingredient_codes)},
+            as_list=True,
+        ))
+        
         for item in bom_doc.items:
-            required_qty = (item.qty / bom_doc.quantity) * production_qty
+            required_qty = (item.qty / bom_doc.quantity) * flt(production_qty)
             
             # Get available stock
-            available_qty = frappe.db.get_value("Bin", {
-                "item_code": item.item_code,
-                "warehouse": warehouse
-            }, "actual_qty") or 0
+            available_qty = get_actual_qty(stock, item.item_code)
             
             # Check if UOM conversion is needed
-            stock_uom = frappe.db.get_value("Item", item.item_code, "stock_uom")
+            stock_uom = stock_uoms.get(item.item_code)
             if stock_uom != item.uom:
                 # Convert required qty to stock UOM
                 conversion_result = convert_uom_quantity(required_qty, item.uom, stock_uom, item.item_code)
@@ -18,9 +18,11 @@ def validate_search_input(search_term):
     return search_term
 
 @frappe.whitelist()
-def overrided_past_order_list(search_term, status, limit=20):
+def overrided_past_order_list(search_term, status, limit=20, cursor=None):
     user = frappe.session.user
     search_term = validate_search_input(search_term)
+    limit = int(limit)
+    branch_name = room_name = None
     if user != "Administrator":
         sql_query = """
             SELECT b.branch,a.room
@@ -46,67 +48,66 @@ def overrided_past_order_list(search_term, status, limit=20):
         "restaurant_table",
         "invoice_printed",
     ]
-    invoice_list = []
-    updated_list = []
-
-    if search_term and status:
-        invoices_by_customer = frappe.db.get_all(
-            "POS Invoice",
-            filters={
-                "customer": ["like", "%{}%".format(frappe.db.escape(search_term))],
-                "status": status,
-            },
-            fields=fields,
+
+    if not status:
+        return {"data": [], "cursor": None}
+
+    if search_term:
+        from ury.ury.api.ury_search_index import search_invoices
+
+        invoices = search_invoices(
+            search_term,
+            fields,
+            branch=branch_name,
+            conditions=["inv.status = %(status)s"],
+            values={"status": status},
+            limit=limit,
         )
-        invoices_by_name = frappe.db.get_all(
-            "POS Invoice",
-            filters={"name": ["like", "%{}%".format(frappe.db.escape(search_term))], "status": status},
-            fields=fields,
+        return {"data": invoices, "cursor": None}
+
+    values = {"limit": limit + 1}
+    conditions = []
+
+    if branch_name:
+        values.update({"branch": branch_name, "room": room_name})
+        conditions += ["branch = %(branch)s", "custom_restaurant_room = %(room)s"]
+
+    if status == "To Bill":
+        values["status"] = "Draft"
+        conditions += [
+            "status = %(status)s",
+            "COALESCE(restaurant_table, '') != ''",
+            "invoice_printed = 0",
+        ]
+    else:
+        values["status"] = status
+        conditions += [
+            "status = %(status)s",
+            "(COALESCE(restaurant_table, '') = '' OR invoice_printed = 1)",
+        ]
+
+    cursor = frappe.parse_json(cursor) if cursor else None
+    if cursor:
+        values["cursor_modified"], values["cursor_name"] = cursor
+        conditions.append(
+            "(modified < %(cursor_modified)s OR (modified = %(cursor_modified)s AND name < %(cursor_name)s))"
         )
-        print("invoices by customer",invoices_by_customer)
-        invoice_list = invoices_by_customer + invoices_by_name
-        updated_list = invoice_list
-    elif status:
-        if user != "Administrator":
-            if status == "To Bill":
-                invoice_list = frappe.db.get_all(
-                    "POS Invoice",
-                    filters={"status": "Draft", "branch": branch_name,"custom_restaurant_room": room_name},
-                    fields=fields,
-                )
-                for invoice in invoice_list:
-                    if invoice.restaurant_table and invoice.invoice_printed == 0:
-                        updated_list.append(invoice)
-
-            else:
-                invoice_list = frappe.db.get_all(
-                    "POS Invoice",
-                    filters={"status": status, "branch": branch_name,"custom_restaurant_room":room_name},
-                    fields=fields,
-                )
-                for invoice in invoice_list:
-                    if not invoice.restaurant_table or invoice.invoice_printed == 1:
-                        updated_list.append(invoice)
-
-        else:
-            if status == "To Bill":
-                invoice_list = frappe.db.get_all(
-                    "POS Invoice",
-                    filters={"status": "Draft"},
-                    fields=fields,
-                )
-                for invoice in invoice_list:
-                    if invoice.restaurant_table and invoice.invoice_printed == 0:
-                        updated_list.append(invoice)
-
-            else:
-                invoice_list = frappe.db.get_all(
-                    "POS Invoice",
-                    filters={"status": status},
-                    fields=fields,
-                )
-                for invoice in invoice_list:
-                    if not invoice.restaurant_table or invoice.invoice_printed == 1:
-                        updated_list.append(invoice)
-
-    return updated_list
+
+    invoices = frappe.db.sql(
+        """
+        SELECT {fields}, modified
+        FROM `tabPOS Invoice`
+        WHERE {conditions}
+        ORDER BY modified DESC, name DESC
+        LIMIT %(limit)s
+        """.format(fields=", ".join(fields), conditions=" AND ".join(conditions)),
+        values,
+        as_dict=True,
+    )
+
+    next_cursor = None
+    if len(invoices) > limit:
+        invoices.pop()
+        next_cursor = [str(invoices[-1].modified), invoices[-1].name]
+
+    return {"data": invoices, "cursor": next_cursor}
@@ -0,0 +1,83 @@
+import frappe
+from frappe.utils import flt
+
+# Ingredient requirements of menu items. The default BOM of every item is kept
+# as one cached map, and the fully exploded ingredients of a BOM are cached per
+# (BOM, company) for one unit of output, so deduction scales a stored vector
+# instead of walking the BOM tree for every invoice line. Any BOM change drops
+# both, as a sub-assembly change alters every BOM that explodes through it.
+
+DEFAULT_BOM_CACHE_KEY = "ury_default_boms"
+EXPLODED_BOM_CACHE_KEY = "ury_exploded_bom"
+
+
+def get_default_boms():
+    """{item_code: bom} of every active, submitted default BOM."""
+
+    def generator():
+        return dict(
+            frappe.get_all(
+                "BOM",
+                fields=["item", "name"],
+                filters={"is_active": 1, "is_default": 1, "docstatus": 1},
+                as_list=True,
+            )
+        )
+
+    return frappe.cache().get_value(DEFAULT_BOM_CACHE_KEY, generator=generator)
+
+
+def get_default_bom(item_code):
+    return get_default_boms().get(item_code)
+
+
+def get_exploded_bom(bom, company):
+    """Exploded ingredients of one unit of `bom` as {item_code: row}.
+
+    A row holds item_name, qty, uom and rate.
+    """
+
+    def generator():
+        from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+
+        return {
+            item_code: {
+                "item_name": row.item_name,
+                "qty": flt(row.qty),
+                "uom": row.uom,
+                "rate": flt(row.rate),
+            }
+            for item_code, row in get_bom_items_as_dict(
+                bom=bom, company=company, qty=1, fetch_exploded=1, fetch_scrap_items=0
+            ).items()
+        }
+
+    return frappe.cache().hget(
+        EXPLODED_BOM_CACHE_KEY, "{0}::{1}".format(bom, company), generator=generator
+    )
+
+
+def get_item_ingredients(item_code, company, qty):
+    """Ingredients consumed by `qty` of a menu item, or None if it has no BOM."""
+    bom = get_default_bom(item_code)
+    if not bom:
+        return None
+
+    return {
+        ingredient: frappe._dict(row, qty=row["qty"] * flt(qty))
+        for ingredient, row in get_exploded_bom(bom, company).items()
+    }
+
+
+def clear_bom_cache():
+    def clear():
+        frappe.cache().delete_value(DEFAULT_BOM_CACHE_KEY)
+        frappe.cache().delete_value(EXPLODED_BOM_CACHE_KEY)
+
+    clear()
+    # Drop again once committed, in case a concurrent read cached the old BOM
+    frappe.db.after_commit.add(clear)
+
+
+def on_bom_change(doc, method):
+    clear_bom_cache()
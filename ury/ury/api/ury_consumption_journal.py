@@ -0,0 +1,357 @@
+import frappe
+from frappe.utils import flt, now
+
+from ury.ury.api.ury_bom_cache import get_default_bom, get_item_ingredients
+from ury.ury.api.ury_stock_snapshot import get_actual_qty, get_stock_snapshot
+
+# Deferred ingredient consumption. With "Defer Inventory Posting" set on the
+# POS Profile an order only records its menu lines in URY Consumption Journal;
+# post_consumption() runs on a schedule and at shift close, explodes the
+# pending lines and submits one Material Issue per company and warehouse.
+# Lines are claimed (marked posted) in a short transaction of their own before
+# the entries are submitted, and released again if posting fails.
+# Unposted lines of a deleted order are dropped and posted lines are reversed
+# with negative quantities, so cancellations net out before stock moves. Lines
+# needing an ingredient that is short in stock stay pending until it is
+# restocked. The order path then never touches Bin rows.
+
+JOURNAL_DOCTYPE = "URY Consumption Journal"
+JOURNAL_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "pos_invoice", "pos_invoice_item", "menu_item", "menu_item_name", "qty",
+    "company", "branch", "warehouse", "posted",
+]
+
+
+def is_deferred(pos_profile):
+    return frappe.db.get_value("POS Profile", pos_profile, "custom_defer_inventory_posting")
+
+
+def record_lines(pos_invoice, warehouse, lines):
+    """Journal `lines` of (item_code, item_name, qty, invoice item row) for posting.
+
+    Lines of items without a BOM consume nothing and are left out.
+    """
+    timestamp = now()
+    values = [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp,
+            frappe.session.user, frappe.session.user,
+            pos_invoice.name, row_name, item_code, item_name, flt(qty),
+            pos_invoice.company, pos_invoice.branch, warehouse, 0,
+        )
+        for item_code, item_name, qty, row_name in lines
+        if flt(qty) and get_default_bom(item_code)
+    ]
+    if values:
+        frappe.db.bulk_insert(JOURNAL_DOCTYPE, JOURNAL_FIELDS, values)
+
+
+def record_invoice(pos_invoice, warehouse):
+    record_lines(
+        pos_invoice,
+        warehouse,
+        [(item.item_code, item.item_name, item.qty, item.name) for item in pos_invoice.items],
+    )
+
+
+def record_invoice_changes(pos_invoice, warehouse):
+    """Journal the difference between an order's lines and what is journaled.
+
+    Orders with nothing journaled (never deducted, or split off another
+    order) are left alone.
+    """
+    journaled = {
+        (row.pos_invoice_item, row.menu_item): row
+        for row in frappe.db.sql(
+            """
+            SELECT pos_invoice_item, menu_item, menu_item_name, SUM(qty) AS qty
+            FROM `tabURY Consumption Journal`
+            WHERE pos_invoice = %s
+            GROUP BY pos_invoice_item, menu_item, menu_item_name
+            """,
+            pos_invoice.name,
+            as_dict=True,
+        )
+    }
+    if not journaled:
+        return
+
+    lines = []
+    for item in pos_invoice.items:
+        row = journaled.pop((item.name, item.item_code), None)
+        lines.append((item.item_code, item.item_name, flt(item.qty) - flt(row.qty if row else 0), item.name))
+    # Lines no longer on the order
+    for row in journaled.values():
+        lines.append((row.menu_item, row.menu_item_name, -flt(row.qty), row.pos_invoice_item))
+
+    record_lines(pos_invoice, warehouse, [line for line in lines if flt(line[2], 9)])
+
+
+def reverse_invoice(pos_invoice):
+    """Net out the journal of a cancelled or deleted order."""
+    frappe.db.delete(JOURNAL_DOCTYPE, {"pos_invoice": pos_invoice.name, "posted": 0})
+
+    posted = frappe.db.sql(
+        """
+        SELECT pos_invoice_item, menu_item, menu_item_name, warehouse, SUM(qty) AS qty
+        FROM `tabURY Consumption Journal`
+        WHERE pos_invoice = %s AND posted = 1
+        GROUP BY pos_invoice_item, menu_item, menu_item_name, warehouse
+        HAVING SUM(qty) != 0
+        """,
+        pos_invoice.name,
+        as_dict=True,
+    )
+    for warehouse in {row.warehouse for row in posted}:
+        record_lines(
+            pos_invoice,
+            warehouse,
+            [
+                (row.menu_item, row.menu_item_name, -row.qty, row.pos_invoice_item)
+                for row in posted
+                if row.warehouse == warehouse
+            ],
+        )
+
+
+def post_consumption(branch=None):
+    """Post every pending journal line, one company and warehouse at a time."""
+    filters = {"posted": 0}
+    if branch:
+        filters["branch"] = branch
+
+    for company, warehouse in frappe.get_all(
+        JOURNAL_DOCTYPE,
+        fields=["company", "warehouse"],
+        filters=filters,
+        distinct=True,
+        as_list=True,
+    ):
+        lines = claim_pending_lines(company, warehouse, branch)
+        if not lines:
+            continue
+        try:
+            post_warehouse_consumption(company, warehouse, lines)
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            release_lines([line.name for line in lines])
+            frappe.db.commit()
+            frappe.log_error(
+                title="Ingredient Consumption Posting Error",
+                message=f"{company} / {warehouse}\n{frappe.get_traceback()}",
+            )
+
+
+def claim_pending_lines(company, warehouse, branch=None):
+    """Mark the pending lines of a warehouse posted and commit, returning them.
+
+    The rows are locked only for this short transaction, so orders can keep
+    journaling while the Stock Entries are submitted; a concurrent run finds
+    nothing left to post.
+    """
+    values = {"company": company, "warehouse": warehouse, "branch": branch}
+    lines = frappe.db.sql(
+        """
+        SELECT name, pos_invoice, pos_invoice_item, menu_item, menu_item_name, qty
+        FROM `tabURY Consumption Journal`
+        WHERE posted = 0 AND warehouse = %(warehouse)s AND company = %(company)s
+            {branch_condition}
+        FOR UPDATE
+        """.format(branch_condition="AND branch = %(branch)s" if branch else ""),
+        values,
+        as_dict=True,
+    )
+    if lines:
+        frappe.db.sql(
+            "UPDATE `tabURY Consumption Journal` SET posted = 1 WHERE name IN %(names)s",
+            {"names": tuple(line.name for line in lines)},
+        )
+    frappe.db.commit()
+    return lines
+
+
+def release_lines(names):
+    """Return claimed lines to pending for the next run."""
+    if names:
+        frappe.db.sql(
+            "UPDATE `tabURY Consumption Journal` SET posted = 0 WHERE name IN %(names)s",
+            {"names": tuple(names)},
+        )
+
+
+def post_warehouse_consumption(company, warehouse, lines):
+    """Submit the Stock Entries of claimed journal `lines`."""
+    # Net each invoice line first, so an order cancelled before posting
+    # consumes nothing
+    netted = {}
+    for line in lines:
+        key = (line.pos_invoice, line.pos_invoice_item, line.menu_item)
+        if key in netted:
+            netted[key].qty += line.qty
+        else:
+            netted[key] = frappe._dict(line)
+
+    ingredients = {
+        key: (get_item_ingredients(line.menu_item, company, line.qty) or {}) if flt(line.qty) else {}
+        for key, line in netted.items()
+    }
+    stock = get_stock_snapshot(
+        {item_code for rows in ingredients.values() for item_code in rows}, warehouse
+    )
+
+    # Lines that need an ingredient short in stock stay pending for the next
+    # run, whole, so none of their ingredients is issued twice
+    held = set()
+    shortages = set()
+    while True:
+        attribution, required = get_required_ingredients(netted, ingredients, held)
+        short = {
+            item_code
+            for item_code, row in required.items()
+            if row.qty > 0 and get_actual_qty(stock, item_code) < row.qty
+        }
+        holding = {
+            key
+            for key, line in netted.items()
+            if key not in held and line.qty > 0 and short.intersection(ingredients[key])
+        }
+        if not holding:
+            break
+        held |= holding
+        shortages |= short
+
+    if held:
+        frappe.log_error(
+            f"Insufficient stock for {', '.join(sorted(shortages))} in {warehouse}. "
+            f"{len(held)} order line(s) left pending.",
+            "Insufficient Stock Warning",
+        )
+
+    issue = make_consumption_entry(
+        company, warehouse, "Material Issue",
+        {item_code: row for item_code, row in required.items() if row.qty > 0},
+        attribution,
+    )
+    receipt = make_consumption_entry(
+        company, warehouse, "Material Receipt",
+        {item_code: frappe._dict(row, qty=-row.qty) for item_code, row in required.items() if row.qty < 0},
+        attribution,
+    )
+
+    release_lines([
+        line.name
+        for line in lines
+        if (line.pos_invoice, line.pos_invoice_item, line.menu_item) in held
+    ])
+    names = tuple(
+        line.name
+        for line in lines
+        if (line.pos_invoice, line.pos_invoice_item, line.menu_item) not in held
+    )
+    if names:
+        frappe.db.sql(
+            """
+            UPDATE `tabURY Consumption Journal`
+            SET stock_entry = %(issue)s, receipt_entry = %(receipt)s
+            WHERE name IN %(names)s
+            """,
+            {"issue": issue, "receipt": receipt, "names": names},
+        )
+
+
+def get_required_ingredients(netted, ingredients, held):
+    """(attribution, {item_code: net ingredient row}) of the netted lines not held."""
+    attribution = []
+    required = {}
+    for key, line in netted.items():
+        if key in held:
+            continue
+        for item_code, ingredient in ingredients[key].items():
+            attribution.append((line, item_code, ingredient))
+            if item_code in required:
+                required[item_code].qty += ingredient.qty
+            else:
+                required[item_code] = frappe._dict(ingredient)
+    return attribution, required
+
+
+def make_consumption_entry(company, warehouse, purpose, required, attribution, pos_invoice=None):
+    """Submit a Material Issue or Receipt of `required` {item_code: row}.
+
+    `attribution` is a list of (journal line, item_code, ingredient) whose
+    signed quantities fill the consumption table. Ingredients short in stock
+    are skipped on issue. Returns the entry name, or None if nothing posted.
+    """
+    if not required:
+        return None
+
+    stock_entry = frappe.new_doc("Stock Entry")
+    stock_entry.stock_entry_type = purpose
+    stock_entry.purpose = purpose
+    stock_entry.company = company
+    if pos_invoice:
+        stock_entry.custom_pos_invoice = pos_invoice
+    warehouse_field = "s_warehouse" if purpose == "Material Issue" else "t_warehouse"
+    stock = get_stock_snapshot(required, warehouse) if purpose == "Material Issue" else {}
+
+    for item_code, ingredient in required.items():
+        if purpose == "Material Issue":
+            available_qty = get_actual_qty(stock, item_code)
+            if available_qty < ingredient.qty:
+                frappe.log_error(
+                    f"Insufficient stock for {ingredient.item_name} ({item_code}). "
+                    f"Required: {ingredient.qty}, Available: {available_qty}. "
+                    f"Warehouse: {warehouse}",
+                    "Insufficient Stock Warning",
+                )
+                continue
+
+        stock_entry.append("items", {
+            "item_code": item_code,
+            "item_name": ingredient.item_name,
+            "qty": ingredient.qty,
+            "uom": ingredient.uom,
+            warehouse_field: warehouse,
+            "basic_rate": ingredient.rate or 0,
+            "allow_zero_valuation_rate": 1,
+        })
+
+    if not stock_entry.items:
+        return None
+
+    posted = {item.item_code for item in stock_entry.items}
+    invoices = set()
+    for line, item_code, ingredient in attribution:
+        if item_code in posted:
+            invoices.add(line.pos_invoice)
+            stock_entry.append("custom_ury_consumption", {
+                "pos_invoice": line.pos_invoice,
+                "pos_invoice_item": line.pos_invoice_item,
+                "menu_item": line.menu_item,
+                "menu_item_name": line.menu_item_name,
+                "menu_qty": line.qty,
+                "item_code": item_code,
+                "item_name": ingredient.item_name,
+                "qty": ingredient.qty,
+                "uom": ingredient.uom,
+            })
+    stock_entry.remarks = f"Ingredient consumption of {len(invoices)} POS Invoice(s)"
+
+    stock_entry.flags.ignore_permissions = True
+    stock_entry.insert()
+    stock_entry.submit()
+    return stock_entry.name
+
+
+def post_closing_consumption(doc, method):
+    """Post the pending consumption of a branch when its shift is closed."""
+    branch = frappe.db.get_value("POS Profile", doc.pos_profile, "branch")
+    if branch:
+        frappe.enqueue(
+            "ury.ury.api.ury_consumption_journal.post_consumption",
+            queue="long",
+            branch=branch,
+            enqueue_after_commit=True,
+        )
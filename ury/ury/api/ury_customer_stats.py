@@ -0,0 +1,122 @@
+import hashlib
+
+import frappe
+
+# Lifetime metrics per (customer, branch), maintained on POS Invoice submit and
+# cancel so customer reports join one row per customer instead of rescanning
+# the invoice history for every day in the range.
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def get_stats_name(customer, branch):
+    # Must match the MD5(CONCAT(...)) used by rebuild_customer_stats
+    return hashlib.md5("{}::{}".format(customer, branch).encode()).hexdigest()
+
+
+def on_submit(doc, method):
+    if not doc.customer or not doc.branch or doc.is_return:
+        return
+
+    visit_time = "{} {}".format(doc.posting_date, doc.posting_time)
+    frappe.db.sql(
+        """
+        INSERT INTO `tabURY Customer Stats`
+            (name, customer, branch, first_visit, last_visit, visits, lifetime_spend, avg_bill,
+            creation, modified, owner, modified_by)
+        VALUES
+            (%(name)s, %(customer)s, %(branch)s, %(visit_time)s, %(visit_time)s, 1, %(spend)s, %(spend)s,
+            NOW(), NOW(), %(user)s, %(user)s)
+        ON DUPLICATE KEY UPDATE
+            first_visit = LEAST(COALESCE(first_visit, VALUES(first_visit)), VALUES(first_visit)),
+            last_visit = GREATEST(COALESCE(last_visit, VALUES(last_visit)), VALUES(last_visit)),
+            visits = visits + 1,
+            lifetime_spend = lifetime_spend + VALUES(lifetime_spend),
+            avg_bill = lifetime_spend / visits,
+            modified = NOW()
+        """,
+        {
+            "name": get_stats_name(doc.customer, doc.branch),
+            "customer": doc.customer,
+            "branch": doc.branch,
+            "visit_time": visit_time,
+            "spend": doc.grand_total,
+            "user": frappe.session.user,
+        },
+    )
+
+
+def on_cancel(doc, method):
+    if not doc.customer or not doc.branch or doc.is_return:
+        return
+
+    # First and last visit can't be decremented, re-read them for this customer only
+    visits = frappe.db.sql(
+        """
+        SELECT MIN(TIMESTAMP(posting_date, posting_time)), MAX(TIMESTAMP(posting_date, posting_time))
+        FROM `tabPOS Invoice`
+        WHERE customer = %s AND branch = %s AND docstatus = 1 AND is_return = 0 AND name != %s
+        """,
+        (doc.customer, doc.branch, doc.name),
+    )
+    first_visit, last_visit = visits[0] if visits else (None, None)
+
+    frappe.db.sql(
+        """
+        UPDATE `tabURY Customer Stats`
+        SET
+            visits = GREATEST(visits - 1, 0),
+            lifetime_spend = lifetime_spend - %(spend)s,
+            avg_bill = IF(visits > 0, lifetime_spend / visits, 0),
+            first_visit = %(first_visit)s,
+            last_visit = %(last_visit)s,
+            modified = NOW()
+        WHERE name = %(name)s
+        """,
+        {
+            "name": get_stats_name(doc.customer, doc.branch),
+            "spend": doc.grand_total,
+            "first_visit": first_visit,
+            "last_visit": last_visit,
+        },
+    )
+
+
+def rebuild_customer_stats(chunk_size=BACKFILL_CHUNK_SIZE):
+    """Recompute the stats from submitted POS Invoices, a chunk of customers at a time."""
+    frappe.db.sql("DELETE FROM `tabURY Customer Stats`")
+
+    last_customer = ""
+    while True:
+        customers = frappe.db.sql_list(
+            """
+            SELECT DISTINCT customer
+            FROM `tabPOS Invoice`
+            WHERE docstatus = 1 AND customer > %s
+            ORDER BY customer
+            LIMIT %s
+            """,
+            (last_customer, chunk_size),
+        )
+        if not customers:
+            break
+
+        frappe.db.sql(
+            """
+            INSERT INTO `tabURY Customer Stats`
+                (name, customer, branch, first_visit, last_visit, visits, lifetime_spend, avg_bill,
+                creation, modified, owner, modified_by)
+            SELECT
+                MD5(CONCAT(customer, '::', branch)), customer, branch,
+                MIN(TIMESTAMP(posting_date, posting_time)), MAX(TIMESTAMP(posting_date, posting_time)),
+                COUNT(*), SUM(grand_total), SUM(grand_total) / COUNT(*),
+                NOW(), NOW(), 'Administrator', 'Administrator'
+            FROM `tabPOS Invoice`
+            WHERE docstatus = 1 AND is_return = 0 AND COALESCE(branch, '') != ''
+                AND customer IN %(customers)s
+            GROUP BY customer, branch
+            """,
+            {"customers": tuple(customers)},
+        )
+        frappe.db.commit()
+        last_customer = customers[-1]
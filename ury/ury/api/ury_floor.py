@@ -0,0 +1,121 @@
+import frappe
+from frappe.utils import flt, get_datetime, now_datetime
+
+from ury.ury_pos.api import getBranch
+
+# Live floor plan: every table of a room with its open (unprinted draft)
+# invoice, running total, pax, time since the order and KOT progress, built in
+# one grouped query. Changed tables are pushed as the same rows on
+# `ury_table_<branch>` after commit so captain screens don't poll getTable.
+
+KOT_ORDER_TYPES = ("New Order", "Order Modified")
+
+
+def get_table_channel(branch):
+    return "{}_{}".format("ury_table", branch)
+
+
+def get_table_rows(branch, room=None, tables=None):
+    conditions = ["t.branch = %(branch)s"]
+    values = {"branch": branch, "kot_types": KOT_ORDER_TYPES}
+    if room:
+        conditions.append("t.restaurant_room = %(room)s")
+        values["room"] = room
+    if tables:
+        conditions.append("t.name IN %(tables)s")
+        values["tables"] = tuple(tables)
+
+    rows = frappe.db.sql(
+        """
+        SELECT
+            t.name, t.occupied, t.latest_invoice_time, t.is_take_away,
+            t.restaurant_room, t.table_shape, t.no_of_seats,
+            inv.name AS invoice, inv.grand_total, inv.rounded_total,
+            inv.no_of_pax AS pax, inv.waiter, inv.creation AS invoice_time,
+            COUNT(CASE WHEN kot.order_status = 'Ready For Prepare' THEN kot.name END) AS pending_kots,
+            COUNT(CASE WHEN kot.order_status = 'Served' THEN kot.name END) AS served_kots
+        FROM `tabURY Table` t
+        LEFT JOIN `tabPOS Invoice` inv
+            ON inv.restaurant_table = t.name
+            AND inv.docstatus = 0
+            AND inv.status = 'Draft'
+            AND inv.invoice_printed = 0
+        LEFT JOIN `tabURY KOT` kot
+            ON kot.invoice = inv.name
+            AND kot.docstatus = 1
+            AND kot.type IN %(kot_types)s
+        WHERE {conditions}
+        GROUP BY t.name, inv.name
+        ORDER BY t.name, inv.creation
+        """.format(conditions=" AND ".join(conditions)),
+        values,
+        as_dict=True,
+    )
+
+    # A table should have at most one open invoice; if not, the latest one wins
+    return list({row.name: row for row in rows}.values())
+
+
+def get_attention_time(branch):
+    return frappe.db.get_value("POS Profile", {"branch": branch}, "table_attention_time")
+
+
+def set_elapsed_time(rows, attention_time):
+    now = now_datetime()
+    for row in rows:
+        row.elapsed_minutes = None
+        row.attention = 0
+        if row.invoice_time:
+            row.elapsed_minutes = int(
+                (now - get_datetime(row.invoice_time)).total_seconds() // 60
+            )
+            row.attention = int(bool(attention_time) and row.elapsed_minutes > flt(attention_time))
+    return rows
+
+
+@frappe.whitelist()
+def get_floor_state(room):
+    branch = getBranch()
+    attention_time = get_attention_time(branch)
+    return {
+        "tables": set_elapsed_time(get_table_rows(branch, room=room), attention_time),
+        "table_attention_time": attention_time,
+        "server_time": now_datetime(),
+    }
+
+
+def publish_table_state(*tables):
+    """Push the floor row of each given table once the transaction commits.
+
+    Rows are read after commit, so a table changed several times in one
+    request is published once, with its final state.
+    """
+    tables = {table for table in tables if table}
+    if not tables:
+        return
+
+    frappe.flags.setdefault("ury_floor_tables", set()).update(tables)
+    frappe.db.after_commit.add(flush_table_state)
+
+
+def flush_table_state():
+    tables = frappe.flags.pop("ury_floor_tables", None)
+    if not tables:
+        return
+
+    for branch in frappe.get_all(
+        "URY Table", filters={"name": ("in", list(tables))}, pluck="branch", distinct=True
+    ):
+        if not branch:
+            continue
+        rows = set_elapsed_time(get_table_rows(branch, tables=tables), get_attention_time(branch))
+        for row in rows:
+            frappe.publish_realtime(get_table_channel(branch), row)
+
+
+def publish_invoice_table(doc, method=None):
+    publish_table_state(doc.restaurant_table)
+
+
+def publish_kot_table(kot):
+    publish_table_state(frappe.db.get_value("URY KOT", kot, "restaurant_table"))
@@ -0,0 +1,50 @@
+import frappe
+
+# Compact POS Invoice row deltas pushed to cashier screens, so invoice lists
+# only need to be queried on initial load.
+
+INVOICE_DELTA_FIELDS = [
+    "name", "invoice_printed", "grand_total", "restaurant_table",
+    "cashier", "waiter", "net_total", "posting_time",
+    "total_taxes_and_charges", "customer", "status", "mobile_number",
+    "posting_date", "rounded_total", "order_type", "modified",
+    "additional_discount_percentage", "discount_amount", "docstatus", "branch",
+]
+
+
+def get_invoice_channel(branch):
+    return "{}_{}".format("pos_invoice", branch)
+
+
+def get_list_status(row):
+    """Cashier list tab ("Draft", "Unbilled", "Recently Paid", ...) a row belongs to."""
+    if row.get("status") == "Draft":
+        if not row.get("invoice_printed") and row.get("restaurant_table"):
+            return "Unbilled"
+        return "Draft"
+    if row.get("status") == "Paid":
+        return "Recently Paid"
+    return row.get("status")
+
+
+def publish_invoice_delta(doc, method=None):
+    publish_invoice_row({field: doc.get(field) for field in INVOICE_DELTA_FIELDS})
+
+
+def publish_invoice_state(invoice):
+    """Publish the current row of an invoice updated without a doc save (db.set_value)."""
+    row = frappe.db.get_value("POS Invoice", invoice, INVOICE_DELTA_FIELDS, as_dict=True)
+    if row:
+        publish_invoice_row(row)
+
+
+def publish_invoice_row(row):
+    if not row.get("branch"):
+        return
+
+    row["list_status"] = get_list_status(row)
+    frappe.publish_realtime(
+        get_invoice_channel(row["branch"]),
+        row,
+        after_commit=True,
+    )
@@ -3,6 +3,7 @@ import json
 import frappe
 from ury.ury_pos.api import getBranch
 from frappe.utils import get_datetime
+from ury.ury.api.ury_floor import publish_kot_table
 
 
 # Function to set order status in a KOT document
@@ -16,6 +17,7 @@ def serve_kot(name, time):
     frappe.db.set_value("URY KOT", name, "start_time_serv", time)
     frappe.db.set_value("URY KOT",name,"production_time",production_time_minutes)
     frappe.db.set_value("URY KOT", name, "order_status", "Served")
+    publish_kot_table(name)
 
 
 # Function to mark it as verified by a user in cancel type KOT
@@ -0,0 +1,290 @@
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import now_datetime
+
+from ury.ury.api.ury_bom_cache import get_default_boms, get_exploded_bom
+from ury.ury.api.ury_stock_snapshot import get_actual_qty, get_stock_snapshot
+from ury.ury.hooks.ury_pos_invoice import get_default_warehouse
+from ury.ury_pos.api import getBranch
+
+# Portions available for every dish on a branch's menus. The per-portion
+# ingredient requirements of all dishes form one dense dish × ingredient
+# matrix, cached per company and branch until a BOM or menu changes; dividing
+# a warehouse stock vector by it and taking the row minimum gives the
+# portions left and the ingredient that limits each dish.
+#
+# Sold-out state is kept per branch and moved by stock, not by polling: every
+# Stock Ledger Entry notes its item and warehouse, and after commit only the
+# dishes using those ingredients are recomputed. Dishes that ran out or came
+# back are pushed as a delta on `menu_availability_<branch>`.
+
+MATRIX_CACHE_KEY = "ury_menu_bom_matrix"
+BRANCH_MENU_CACHE_KEY = "ury_branch_menu_items"
+BRANCH_WAREHOUSE_CACHE_KEY = "ury_branch_warehouses"
+AVAILABILITY_CACHE_KEY = "ury_menu_availability"
+BRANCH_WAREHOUSE_CACHE_EXPIRY = 5 * 60
+STOCK_SNAPSHOT_TTL = 10
+
+
+def get_availability_channel(branch):
+    return "{}_{}".format("menu_availability", branch)
+
+
+def get_branch_menu_items(branch):
+    """Item codes of the enabled items on every menu of a branch's restaurant."""
+
+    def generator():
+        restaurant = frappe.db.get_value(
+            "URY Restaurant", {"branch": branch}, ["name", "active_menu"], as_dict=True
+        )
+        if not restaurant:
+            return []
+
+        menus = {restaurant.active_menu}
+        for doctype in ("Menu for Room", "Order Type Menu"):
+            menus.update(frappe.get_all(doctype, filters={"parent": restaurant.name}, pluck="menu"))
+        menus.discard(None)
+        if not menus:
+            return []
+
+        return sorted(
+            set(
+                frappe.get_all(
+                    "URY Menu Item",
+                    filters={"parent": ("in", list(menus)), "disabled": 0},
+                    pluck="item",
+                )
+            )
+        )
+
+    return frappe.cache().hget(BRANCH_MENU_CACHE_KEY, branch, generator=generator)
+
+
+def get_branch_warehouses():
+    """{branch: (company, warehouse)} of every branch with a POS Profile."""
+    branches = frappe.cache().get_value(BRANCH_WAREHOUSE_CACHE_KEY)
+    if branches is None:
+        branches = {}
+        for profile in frappe.get_all(
+            "POS Profile",
+            fields=["name", "branch", "company"],
+            filters={"branch": ("is", "set"), "disabled": 0},
+            order_by="creation",
+        ):
+            if profile.branch not in branches:
+                branches[profile.branch] = (
+                    profile.company,
+                    get_default_warehouse(frappe._dict(pos_profile=profile.name, branch=profile.branch)),
+                )
+        frappe.cache().set_value(
+            BRANCH_WAREHOUSE_CACHE_KEY, branches, expires_in_sec=BRANCH_WAREHOUSE_CACHE_EXPIRY
+        )
+    return branches
+
+
+def get_bom_matrix(branch, company):
+    """Per-portion ingredient matrix of the branch's menu items that have a default BOM.
+
+    Returns {"items", "ingredients", "ingredient_names", "matrix"} where
+    matrix[i, j] is the qty of ingredient j in one portion of item i.
+    """
+
+    def generator():
+        items = get_branch_menu_items(branch)
+        boms = get_default_boms()
+        recipes = {item: get_exploded_bom(boms[item], company) for item in items if item in boms}
+
+        ingredient_names = {}
+        for recipe in recipes.values():
+            for ingredient, row in recipe.items():
+                ingredient_names.setdefault(ingredient, row["item_name"])
+        ingredients = sorted(ingredient_names)
+        column = {ingredient: index for index, ingredient in enumerate(ingredients)}
+
+        matrix = np.zeros((len(recipes), len(ingredients)))
+        for row_index, recipe in enumerate(recipes.values()):
+            for ingredient, row in recipe.items():
+                matrix[row_index, column[ingredient]] = row["qty"]
+
+        return {
+            "items": list(recipes),
+            "ingredients": ingredients,
+            "ingredient_names": [ingredient_names[ingredient] for ingredient in ingredients],
+            "matrix": matrix,
+        }
+
+    return frappe.cache().hget(MATRIX_CACHE_KEY, "{0}::{1}".format(company, branch), generator=generator)
+
+
+def get_portions(bom_matrix, warehouse, cache_seconds=STOCK_SNAPSHOT_TTL, rows=None):
+    """{item: (portions, limiting ingredient index)} for the items of a BOM matrix.
+
+    `rows` is an optional boolean mask selecting the dishes to compute; only
+    the ingredients those dishes use are read from stock.
+    """
+    matrix = bom_matrix["matrix"]
+    items = bom_matrix["items"]
+    if rows is not None:
+        matrix = matrix[rows]
+        items = [item for item, selected in zip(items, rows) if selected]
+
+    columns = np.flatnonzero((matrix > 0).any(axis=0))
+    if not columns.size:
+        return {}
+
+    ingredients = [bom_matrix["ingredients"][column] for column in columns]
+    snapshot = get_stock_snapshot(ingredients, warehouse, cache_seconds=cache_seconds)
+    stock = np.array([get_actual_qty(snapshot, ingredient) for ingredient in ingredients]).clip(min=0)
+    matrix = matrix[:, columns]
+
+    # Portions each ingredient allows; ingredients a dish doesn't use never limit it
+    uses = matrix > 0
+    allowed = np.full(matrix.shape, np.inf)
+    np.divide(stock, matrix, out=allowed, where=uses)
+
+    limiting = allowed.argmin(axis=1)
+    portions = np.floor(allowed[np.arange(len(matrix)), limiting])
+    return {
+        item: (int(portions[index]), int(columns[limiting[index]]))
+        for index, item in enumerate(items)
+        if uses[index].any()
+    }
+
+
+@frappe.whitelist()
+def get_portions_available():
+    """Maximum portions of every menu item the branch's stock can still make.
+
+    Items without a BOM are not stock-limited and are reported with
+    `portions` None.
+    """
+    return get_branch_portions(getBranch())
+
+
+def get_branch_stock(branch):
+    branches = get_branch_warehouses()
+    if branch not in branches:
+        frappe.throw(_("No POS Profile found for Branch {0}").format(branch))
+    company, warehouse = branches[branch]
+    if not warehouse:
+        frappe.throw(_("No warehouse set for the POS Profile of Branch {0}").format(branch))
+    return company, warehouse
+
+
+def get_branch_portions(branch, warehouse=None):
+    company, branch_warehouse = get_branch_stock(branch)
+    warehouse = warehouse or branch_warehouse
+    items = get_branch_menu_items(branch)
+    bom_matrix = get_bom_matrix(branch, company)
+    portions = get_portions(bom_matrix, warehouse)
+
+    result = []
+    for item in items:
+        available, limiting = portions.get(item, (None, None))
+        result.append({
+            "item": item,
+            "portions": available,
+            "limiting_ingredient": bom_matrix["ingredients"][limiting] if limiting is not None else None,
+            "limiting_ingredient_name": bom_matrix["ingredient_names"][limiting] if limiting is not None else None,
+        })
+
+    return {"branch": branch, "warehouse": warehouse, "items": result, "server_time": now_datetime()}
+
+
+def get_sold_out_items(branch):
+    """Menu items of a branch that its warehouse can't make a portion of."""
+
+    def generator():
+        company, warehouse = get_branch_stock(branch)
+        portions = get_portions(get_bom_matrix(branch, company), warehouse)
+        return {"sold_out": sorted(item for item, (available, limiting) in portions.items() if available < 1)}
+
+    return frappe.cache().hget(AVAILABILITY_CACHE_KEY, branch, generator=generator)["sold_out"]
+
+
+@frappe.whitelist()
+def get_menu_availability():
+    branch = getBranch()
+    return {"branch": branch, "sold_out": get_sold_out_items(branch)}
+
+
+def on_stock_ledger_entry(doc, method):
+    """Note the stock change; availability is recomputed once after commit."""
+    frappe.flags.setdefault("ury_stock_changes", set()).add((doc.item_code, doc.warehouse))
+    frappe.db.after_commit.add(flush_availability)
+
+
+def flush_availability():
+    changes = frappe.flags.pop("ury_stock_changes", None)
+    if not changes:
+        return
+
+    changed_items = {}
+    for item_code, warehouse in changes:
+        changed_items.setdefault(warehouse, set()).add(item_code)
+
+    for branch, (company, warehouse) in get_branch_warehouses().items():
+        if warehouse in changed_items:
+            try:
+                update_branch_availability(branch, company, warehouse, changed_items[warehouse])
+            except Exception:
+                frappe.log_error(title="Menu Availability Error", message=frappe.get_traceback())
+
+
+def update_branch_availability(branch, company, warehouse, item_codes):
+    bom_matrix = get_bom_matrix(branch, company)
+    columns = [
+        index for index, ingredient in enumerate(bom_matrix["ingredients"]) if ingredient in item_codes
+    ]
+    if not columns:
+        return
+
+    state = frappe.cache().hget(AVAILABILITY_CACHE_KEY, branch)
+    if state is None:
+        # No baseline since the last menu or BOM change; send the full list
+        frappe.publish_realtime(
+            get_availability_channel(branch),
+            {"sold_out": get_sold_out_items(branch), "reset": 1},
+        )
+        return
+
+    # Only dishes using a changed ingredient can change availability
+    rows = (bom_matrix["matrix"][:, columns] > 0).any(axis=1)
+    portions = get_portions(bom_matrix, warehouse, cache_seconds=0, rows=rows)
+    sold_out = set(state["sold_out"])
+    now_sold_out = {item for item, (available, limiting) in portions.items() if available < 1}
+    back_in_stock = (sold_out & set(portions)) - now_sold_out
+    newly_sold_out = now_sold_out - sold_out
+    if not (back_in_stock or newly_sold_out):
+        return
+
+    state["sold_out"] = sorted((sold_out - back_in_stock) | newly_sold_out)
+    frappe.cache().hset(AVAILABILITY_CACHE_KEY, branch, state)
+    frappe.publish_realtime(
+        get_availability_channel(branch),
+        {"sold_out": sorted(newly_sold_out), "available": sorted(back_in_stock)},
+    )
+
+
+def clear_availability():
+    frappe.cache().delete_value(AVAILABILITY_CACHE_KEY)
+
+
+def on_menu_change(doc, method):
+    def clear():
+        frappe.cache().delete_value(BRANCH_MENU_CACHE_KEY)
+        frappe.cache().delete_value(MATRIX_CACHE_KEY)
+        clear_availability()
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+
+def on_bom_change(doc, method):
+    def clear():
+        frappe.cache().delete_value(MATRIX_CACHE_KEY)
+        clear_availability()
+
+    clear()
+    frappe.db.after_commit.add(clear)
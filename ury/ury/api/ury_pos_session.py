@@ -0,0 +1,85 @@
+import frappe
+
+# Registry of open POS Opening Entries per branch, kept in redis and rebuilt
+# from the database on a miss. Session checks read the registry instead of
+# querying `tabPOS Opening Entry` ⋈ `tabMultiple Rooms` on every call.
+
+CACHE_KEY = "ury_open_pos_sessions"
+
+
+def get_branch_sessions(branch):
+    """Open sessions of a branch as {"sessions": [...], "rooms": {room: session}}.
+
+    A session is a dict of pos_opening_entry, cashier, pos_profile and
+    posting_date. When several open entries cover a room the oldest one wins.
+    """
+
+    def generator():
+        sessions = {}
+        rooms = {}
+        for row in frappe.db.sql(
+            """
+            SELECT poe.name, poe.user, poe.pos_profile, poe.posting_date, mr.room
+            FROM `tabPOS Opening Entry` poe
+            LEFT JOIN `tabMultiple Rooms` mr
+                ON mr.parent = poe.name AND mr.parenttype = 'POS Opening Entry'
+            WHERE poe.branch = %s AND poe.status = 'Open' AND poe.docstatus = 1
+            ORDER BY poe.creation, mr.idx
+            """,
+            branch,
+            as_dict=True,
+        ):
+            session = sessions.setdefault(
+                row.name,
+                {
+                    "pos_opening_entry": row.name,
+                    "cashier": row.user,
+                    "pos_profile": row.pos_profile,
+                    "posting_date": str(row.posting_date),
+                },
+            )
+            if row.room:
+                rooms.setdefault(row.room, session)
+
+        return {"sessions": list(sessions.values()), "rooms": rooms}
+
+    return frappe.cache().hget(CACHE_KEY, branch, generator=generator)
+
+
+def get_room_session(branch, room):
+    return get_branch_sessions(branch)["rooms"].get(room)
+
+
+def get_open_sessions(branch, cashier=None, pos_profile=None, posting_date=None):
+    return [
+        session
+        for session in get_branch_sessions(branch)["sessions"]
+        if (not cashier or session["cashier"] == cashier)
+        and (not pos_profile or session["pos_profile"] == pos_profile)
+        and (not posting_date or session["posting_date"] == str(posting_date))
+    ]
+
+
+def clear_branch_sessions(branch):
+    if not branch:
+        return
+
+    frappe.cache().hdel(CACHE_KEY, branch)
+    # Drop it again once the change is visible, in case a concurrent request
+    # rebuilt the entry from the pre-commit state in between.
+    frappe.db.after_commit.add(lambda: frappe.cache().hdel(CACHE_KEY, branch))
+
+
+def clear_opening_entry_sessions(pos_opening_entry):
+    if pos_opening_entry:
+        clear_branch_sessions(
+            frappe.db.get_value("POS Opening Entry", pos_opening_entry, "branch")
+        )
+
+
+def on_opening_entry_change(doc, method):
+    clear_branch_sessions(doc.branch)
+
+
+def on_closing_entry_change(doc, method):
+    clear_opening_entry_sessions(doc.pos_opening_entry)
@@ -5,6 +5,9 @@ import os
 
 from pypdf import PdfWriter
 
+from ury.ury.api.ury_invoice_events import publish_invoice_state
+from ury.ury.api.ury_table_occupancy import refresh_tables
+
 no_cache = 1
 
 base_template_path = "www/printview.html"
@@ -61,16 +64,9 @@ def network_printing(
                 "POS Invoice", name, ["restaurant_table", "invoice_printed", "name"]
             )
 
-            if restaurant_table and invoice_printed == 0:
-                frappe.db.set_value("POS Invoice", name, "invoice_printed", 1)
-                frappe.db.set_value(
-                    "URY Table",
-                    restaurant_table,
-                    {"occupied": 0, "latest_invoice_time": None},
-                )
-            else:
-                frappe.db.set_value("POS Invoice", name, "invoice_printed", 1)
-
+            frappe.db.set_value("POS Invoice", name, "invoice_printed", 1)
+            refresh_tables(restaurant_table)
+            publish_invoice_state(name)
             return "Success"
         except Exception as e:
             return f"Failed to print: {str(e)}"
@@ -132,18 +128,14 @@ def qz_print_update(invoice):
                     "POS Invoice", invoice, "invoice_printed", 1, update_modified=False
                 )
                 
-                # Update table status
-                frappe.db.set_value(
-                    "URY Table", table, {"occupied": 0, "latest_invoice_time": None}
-                )
-                
-                # Validate both updates
+                refresh_tables(table)
+
+                # Validate the update
                 new_invoice_printed = frappe.db.get_value("POS Invoice", invoice, "invoice_printed")
-                new_table_status = frappe.db.get_value("URY Table", table, "occupied")
-                
-                if new_invoice_printed != 1 or new_table_status != 0:
+                if new_invoice_printed != 1:
                     return {"status": "Failure"}
         
+        publish_invoice_state(invoice)
         return {"status": "Success"}
         
     except Exception as e:
@@ -154,25 +146,67 @@ def qz_print_update(invoice):
 
 @frappe.whitelist()
 def print_pos_page(doctype, name, print_format):
-    data = {"name": name, "doctype": doctype, "print_format": print_format}
-
     restaurant_table, branch, name = frappe.db.get_value(
         "POS Invoice", name, ["restaurant_table", "branch", "name"]
     )
+
+    # Keep the job pending in redis until a websocket-print page acknowledges it,
+    # so the invoice and table are only updated once the bill has actually printed.
+    job_id = frappe.generate_hash(length=12)
+    data = {
+        "job_id": job_id,
+        "name": name,
+        "doctype": doctype,
+        "print_format": print_format,
+        "queued_at": str(frappe.utils.now_datetime()),
+    }
+    frappe.cache().hset(get_print_queue_key(branch), job_id, data)
+
     print_channel = "{}_{}".format("print", branch)
     frappe.publish_realtime(print_channel, {"data": data})
 
-    invoice_printed = frappe.db.get_value("POS Invoice", name, "invoice_printed")
+    return {"status": "Queued", "job_id": job_id}
 
-    if invoice_printed == 0:
-        frappe.db.set_value("POS Invoice", name, "invoice_printed", 1)
 
-        if restaurant_table:
-            frappe.db.set_value(
-                "URY Table",
-                restaurant_table,
-                {"occupied": 0, "latest_invoice_time": None},
-            )
+@frappe.whitelist()
+def ack_print_job(job_id):
+    from ury.ury_pos.api import getBranch
+
+    queue_key = get_print_queue_key(getBranch())
+    job = frappe.cache().hget(queue_key, job_id)
+
+    # Redelivered jobs can be acknowledged more than once
+    if not job:
+        return {"status": "Unknown"}
+
+    frappe.cache().hdel(queue_key, job_id)
+    mark_invoice_printed(job.get("name"))
+
+    return {"status": "Success"}
+
+
+@frappe.whitelist()
+def get_pending_print_jobs():
+    from ury.ury_pos.api import getBranch
+
+    jobs = frappe.cache().hgetall(get_print_queue_key(getBranch())) or {}
+
+    return sorted(jobs.values(), key=lambda job: job.get("queued_at"))
+
+
+def get_print_queue_key(branch):
+    return "ury_print_jobs_{}".format(branch)
+
+
+def mark_invoice_printed(invoice):
+    restaurant_table, invoice_printed = frappe.db.get_value(
+        "POS Invoice", invoice, ["restaurant_table", "invoice_printed"]
+    )
+
+    if invoice_printed == 0:
+        frappe.db.set_value("POS Invoice", invoice, "invoice_printed", 1)
+        refresh_tables(restaurant_table)
+        publish_invoice_state(invoice)
 
 
 @frappe.whitelist()
@@ -0,0 +1,240 @@
+from collections import Counter, defaultdict
+from itertools import combinations
+
+import frappe
+from frappe.utils import add_days, flt, today
+
+from ury.ury_pos.api import getBranch
+
+# "Frequently ordered together" suggestions. Co-occurrence is counted nightly
+# per branch and menu over recent submitted invoices and only the top
+# neighbours of each item are stored, so serving a suggestion never touches
+# POS Invoice Item. Each submitted order then bumps the counts of the stored
+# pairs it contains and recomputes their confidence and lift; new pairs and
+# the total order count are picked up by the next nightly rebuild.
+
+LOOKBACK_DAYS = 90
+TOP_K = 10
+MIN_SUPPORT = 3
+CACHE_KEY = "ury_item_recommendations"
+
+
+def rebuild_item_recommendations():
+    branches = frappe.db.sql_list(
+        "SELECT DISTINCT branch FROM `tabPOS Invoice` WHERE docstatus = 1 AND posting_date >= %s",
+        add_days(today(), -LOOKBACK_DAYS),
+    )
+    restaurant_menus = get_restaurant_menus()
+    for branch in branches:
+        if branch:
+            build_branch_recommendations(branch, restaurant_menus)
+            frappe.db.commit()
+
+    frappe.cache().delete_value(CACHE_KEY)
+
+
+def get_restaurant_menus(restaurant=None):
+    """{restaurant: (active menu, {room: menu}, {order_type: menu})}, of one
+    `restaurant` if given.
+
+    Mirrors the menu choice of getRestaurantMenu; room and order type menus
+    only apply when the restaurant has them switched on.
+    """
+    restaurants = {}
+    for row in frappe.get_all(
+        "URY Restaurant",
+        fields=["name", "active_menu", "room_wise_menu", "order_type_wise_menu"],
+        filters={"name": restaurant} if restaurant else None,
+    ):
+        room_menus = {}
+        if row.room_wise_menu:
+            room_menus = dict(
+                frappe.get_all(
+                    "Menu for Room",
+                    fields=["room", "menu"],
+                    filters={"parent": row.name},
+                    as_list=True,
+                )
+            )
+        order_type_menus = {}
+        if row.order_type_wise_menu:
+            order_type_menus = dict(
+                frappe.get_all(
+                    "Order Type Menu",
+                    fields=["order_type", "menu"],
+                    filters={"parent": row.name},
+                    as_list=True,
+                )
+            )
+        restaurants[row.name] = (row.active_menu, room_menus, order_type_menus)
+    return restaurants
+
+
+def get_invoice_menu(restaurant_menus, restaurant, room=None, order_type=None):
+    active_menu, room_menus, order_type_menus = restaurant_menus.get(restaurant, (None, {}, {}))
+    if room:
+        return room_menus.get(room) or active_menu
+    return order_type_menus.get(order_type) or active_menu
+
+
+def build_branch_recommendations(branch, restaurant_menus):
+    rows = frappe.db.sql(
+        """
+        SELECT item.parent, item.item_code, inv.restaurant, inv.custom_restaurant_room, inv.order_type
+        FROM `tabPOS Invoice Item` item
+        INNER JOIN `tabPOS Invoice` inv ON inv.name = item.parent
+        WHERE inv.branch = %s AND inv.docstatus = 1 AND inv.posting_date >= %s
+        """,
+        (branch, add_days(today(), -LOOKBACK_DAYS)),
+    )
+
+    menu_baskets = defaultdict(lambda: defaultdict(set))
+    for invoice, item_code, restaurant, room, order_type in rows:
+        menu = get_invoice_menu(restaurant_menus, restaurant, room, order_type)
+        if menu:
+            menu_baskets[menu][invoice].add(item_code)
+
+    values = []
+    for menu, baskets in menu_baskets.items():
+        values.extend(get_menu_recommendations(branch, menu, baskets.values()))
+
+    frappe.db.delete("URY Item Recommendation", {"branch": branch})
+    frappe.db.bulk_insert(
+        "URY Item Recommendation",
+        [
+            "name", "branch", "menu", "item", "recommended_item",
+            "support", "item_support", "recommended_item_support", "baskets", "confidence", "lift",
+        ],
+        values,
+    )
+
+
+def get_menu_recommendations(branch, menu, baskets):
+    # Sparse item and item-pair counts; only pairs that actually co-occur are stored
+    item_count = Counter()
+    pair_count = Counter()
+    total = 0
+    for basket in baskets:
+        total += 1
+        item_count.update(basket)
+        pair_count.update(combinations(sorted(basket), 2))
+
+    neighbours = defaultdict(list)
+    for (a, b), support in pair_count.items():
+        if support < MIN_SUPPORT:
+            continue
+        lift = support * total / (item_count[a] * item_count[b])
+        neighbours[a].append((lift, support / item_count[a], support, b))
+        neighbours[b].append((lift, support / item_count[b], support, a))
+
+    values = []
+    for item_code, candidates in neighbours.items():
+        for lift, confidence, support, recommended_item in sorted(candidates, reverse=True)[:TOP_K]:
+            values.append(
+                (
+                    frappe.generate_hash(length=14),
+                    branch,
+                    menu,
+                    item_code,
+                    recommended_item,
+                    support,
+                    item_count[item_code],
+                    item_count[recommended_item],
+                    total,
+                    flt(confidence, 4),
+                    flt(lift, 4),
+                )
+            )
+    return values
+
+
+def on_submit(doc, method):
+    """Count this order towards the pairs that are already recommended."""
+    items = tuple({item.item_code for item in doc.items})
+    if len(items) < 2 or not doc.branch:
+        return
+
+    menu = get_invoice_menu(
+        get_restaurant_menus(doc.restaurant), doc.restaurant, doc.custom_restaurant_room, doc.order_type
+    )
+    if not menu:
+        return
+
+    values = {"branch": doc.branch, "menu": menu, "items": items}
+    frappe.db.sql(
+        """
+        UPDATE `tabURY Item Recommendation`
+        SET support = support + (item IN %(items)s AND recommended_item IN %(items)s),
+            item_support = item_support + (item IN %(items)s),
+            recommended_item_support = recommended_item_support + (recommended_item IN %(items)s)
+        WHERE branch = %(branch)s AND menu = %(menu)s
+            AND (item IN %(items)s OR recommended_item IN %(items)s)
+        """,
+        values,
+    )
+    frappe.db.sql(
+        """
+        UPDATE `tabURY Item Recommendation`
+        SET confidence = ROUND(support / item_support, 4),
+            lift = ROUND(support * baskets / (item_support * recommended_item_support), 4)
+        WHERE branch = %(branch)s AND menu = %(menu)s
+            AND (item IN %(items)s OR recommended_item IN %(items)s)
+        """,
+        values,
+    )
+
+    def clear():
+        frappe.cache().hdel(CACHE_KEY, get_cache_field(doc.branch, menu))
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+
+def get_cache_field(branch, menu):
+    return "{0}::{1}".format(branch, menu)
+
+
+def get_menu_neighbours(branch, menu):
+    def generator():
+        neighbours = defaultdict(list)
+        for row in frappe.db.sql(
+            """
+            SELECT item, recommended_item, lift
+            FROM `tabURY Item Recommendation`
+            WHERE branch = %s AND menu = %s
+            ORDER BY item, lift DESC
+            """,
+            (branch, menu),
+            as_dict=True,
+        ):
+            neighbours[row.item].append((row.recommended_item, row.lift))
+        return dict(neighbours)
+
+    return frappe.cache().hget(CACHE_KEY, get_cache_field(branch, menu), generator=generator)
+
+
+@frappe.whitelist()
+def get_upsell_suggestions(items, menu=None, limit=10):
+    """Items most often ordered with the cart's items, best first.
+
+    `items` is the list of item codes in the cart and `menu` the menu it
+    was ordered from, defaulting to the restaurant's active menu; the client
+    matches the result against the menu it already loaded with
+    getRestaurantMenu.
+    """
+    items = set(frappe.parse_json(items) or [])
+    branch = getBranch()
+    if not menu:
+        menu = frappe.db.get_value("URY Restaurant", {"branch": branch}, "active_menu")
+    neighbours = get_menu_neighbours(branch, menu)
+
+    scores = Counter()
+    for item_code in items:
+        for recommended_item, lift in neighbours.get(item_code, []):
+            if recommended_item not in items:
+                scores[recommended_item] += lift
+
+    return [
+        {"item": item_code, "score": flt(score, 4)}
+        for item_code, score in scores.most_common(int(limit))
+    ]
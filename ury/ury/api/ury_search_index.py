@@ -0,0 +1,221 @@
+import re
+
+import frappe
+
+# Trigram index over POS Invoice name, customer and mobile number digits,
+# scoped by branch, so invoice search never has to LIKE-scan `tabPOS Invoice`.
+# Trigrams of the naming series ("inv", "202", "000") are on nearly every
+# invoice, so a search counts its trigrams (up to COMMON_TOKEN_COUNT) and
+# intersects only the rarest few. Queries that look like a phone number are
+# also searched by their digits, as mobile numbers are indexed.
+
+SEARCH_TOKEN_DOCTYPE = "URY Invoice Search Token"
+BACKFILL_CHUNK_SIZE = 1000
+COMMON_TOKEN_COUNT = 2000
+MAX_QUERY_TOKENS = 3
+PHONE_QUERY = re.compile(r"[\d\s+().-]*\d[\d\s+().-]*")
+
+
+def get_trigrams(text):
+    text = (text or "").strip().lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def get_digits(text):
+    return "".join(ch for ch in (text or "") if ch.isdigit())
+
+
+def get_search_tokens(invoice, customer=None, mobile_number=None):
+    return get_trigrams(invoice) | get_trigrams(customer) | get_trigrams(get_digits(mobile_number))
+
+
+def on_update(doc, method):
+    if not (
+        doc.has_value_changed("customer")
+        or doc.has_value_changed("mobile_number")
+        or doc.has_value_changed("branch")
+    ):
+        return
+
+    index_invoices([doc])
+
+
+def on_trash(doc, method):
+    frappe.db.delete(SEARCH_TOKEN_DOCTYPE, {"invoice": doc.name})
+
+
+def index_invoices(invoices):
+    """Replace the search tokens of the given invoices (docs or dicts)."""
+    names = [invoice.name for invoice in invoices]
+    if not names:
+        return
+
+    frappe.db.delete(SEARCH_TOKEN_DOCTYPE, {"invoice": ("in", names)})
+
+    values = []
+    for invoice in invoices:
+        tokens = get_search_tokens(invoice.name, invoice.customer, invoice.mobile_number)
+        values.extend(
+            (frappe.generate_hash(length=14), token, invoice.name, invoice.branch)
+            for token in tokens
+        )
+
+    frappe.db.bulk_insert(
+        SEARCH_TOKEN_DOCTYPE, ["name", "token", "invoice", "branch"], values
+    )
+
+
+def rebuild_search_index(chunk_size=BACKFILL_CHUNK_SIZE):
+    """Backfill the index for every POS Invoice, in name order chunks."""
+    last_name = ""
+    while True:
+        invoices = frappe.db.sql(
+            """
+            SELECT name, customer, mobile_number, branch
+            FROM `tabPOS Invoice`
+            WHERE name > %s
+            ORDER BY name
+            LIMIT %s
+            """,
+            (last_name, chunk_size),
+            as_dict=True,
+        )
+        if not invoices:
+            break
+
+        index_invoices(invoices)
+        frappe.db.commit()
+        last_name = invoices[-1].name
+
+
+def get_token_counts(tokens, branch=None):
+    """{token: invoices carrying it}, counted up to COMMON_TOKEN_COUNT."""
+    tokens = sorted(tokens)
+    values = {"branch": branch}
+    subqueries = []
+    for i, token in enumerate(tokens):
+        values["token_{0}".format(i)] = token
+        subqueries.append(
+            """
+            (SELECT token FROM `tabURY Invoice Search Token`
+            WHERE token = %(token_{i})s {branch_condition}
+            LIMIT {limit})
+            """.format(
+                i=i,
+                branch_condition="AND branch = %(branch)s" if branch else "",
+                limit=COMMON_TOKEN_COUNT,
+            )
+        )
+
+    counts = dict.fromkeys(tokens, 0)
+    if subqueries:
+        counts.update(
+            frappe.db.sql(
+                "SELECT token, COUNT(*) FROM ({0}) capped GROUP BY token".format(
+                    " UNION ALL ".join(subqueries)
+                ),
+                values,
+            )
+        )
+    return counts
+
+
+def escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_invoices(query, fields, branch=None, conditions=None, values=None, limit=10):
+    """Return POS Invoices whose name, customer or mobile number contains `query`.
+
+    Candidates are the invoices carrying the query's rarest trigrams; the
+    final LIKE only re-checks that small set so trigram false positives are
+    dropped. Phone-like queries also match on their digits. If every trigram
+    is common, matches are too, and a scan in modified order finds `limit` of
+    them early.
+    """
+    query = (query or "").strip().lower()
+    values = dict(values or {})
+    values.update({"query": "%{}%".format(escape_like(query)), "limit": int(limit)})
+    conditions = list(conditions or [])
+
+    branch_condition = ""
+    if branch:
+        values["branch"] = branch
+        branch_condition = "AND branch = %(branch)s"
+
+    match_condition = (
+        "(LOWER(inv.name) LIKE %(query)s OR LOWER(inv.customer) LIKE %(query)s"
+        " OR inv.mobile_number LIKE %(query)s"
+    )
+    token_sets = [get_trigrams(query)]
+    # "+91 98765" is searched as 9198765 too, the way mobile numbers are indexed
+    digits = get_digits(query) if PHONE_QUERY.fullmatch(query) else ""
+    if digits:
+        values["digits"] = "%{}%".format(digits)
+        match_condition += " OR REGEXP_REPLACE(inv.mobile_number, '[^0-9]', '') LIKE %(digits)s"
+        if digits != query:
+            token_sets.append(get_trigrams(digits))
+    match_condition += ")"
+    token_sets = [trigrams for trigrams in token_sets if trigrams]
+
+    if not token_sets:
+        # Too short for a trigram; only prefix matches on the invoice name are cheap
+        values["query"] = "{}%".format(escape_like(query))
+        conditions.append("inv.name LIKE %(query)s")
+        if branch:
+            conditions.append("inv.branch = %(branch)s")
+        source = "`tabPOS Invoice` inv"
+    else:
+        # Rarest trigrams of each form of the query that some invoice can contain
+        candidates = []
+        for trigrams in token_sets:
+            counts = get_token_counts(trigrams, branch)
+            if all(counts.values()):
+                candidates.append(
+                    sorted(
+                        (token for token, count in counts.items() if count < COMMON_TOKEN_COUNT),
+                        key=counts.get,
+                    )[:MAX_QUERY_TOKENS]
+                )
+        if not candidates:
+            # Some trigram of every form is on no invoice, so nothing contains the query
+            return []
+
+        conditions.append(match_condition)
+        if all(candidates):
+            subqueries = []
+            for i, rare in enumerate(candidates):
+                values["trigrams_{0}".format(i)] = tuple(rare)
+                values["trigram_count_{0}".format(i)] = len(rare)
+                subqueries.append(
+                    """
+                    SELECT invoice FROM `tabURY Invoice Search Token`
+                    WHERE token IN %(trigrams_{i})s {branch_condition}
+                    GROUP BY invoice
+                    HAVING COUNT(DISTINCT token) = %(trigram_count_{i})s
+                    """.format(i=i, branch_condition=branch_condition)
+                )
+            source = """({subqueries}) matched
+            INNER JOIN `tabPOS Invoice` inv ON inv.name = matched.invoice""".format(
+                subqueries=" UNION ".join(subqueries)
+            )
+        else:
+            if branch:
+                conditions.append("inv.branch = %(branch)s")
+            source = "`tabPOS Invoice` inv"
+
+    return frappe.db.sql(
+        """
+        SELECT {fields}
+        FROM {source}
+        WHERE {conditions}
+        ORDER BY inv.modified DESC
+        LIMIT %(limit)s
+        """.format(
+            fields=", ".join("inv.{0}".format(field) for field in fields),
+            source=source,
+            conditions=" AND ".join(conditions) or "1=1",
+        ),
+        values,
+        as_dict=True,
+    )
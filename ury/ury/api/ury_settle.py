@@ -0,0 +1,261 @@
+import time
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+
+# Settlement of an open POS Invoice: load it once, replace its payment rows
+# and submit, which validates and totals the invoice in the same save.
+# Step timings are logged to the "ury_settle" logger when `ury_settle_debug`
+# is set in site config; nothing is written to Error Log on success.
+
+DEBUG_FLAG = "ury_settle_debug"
+
+
+class SettleTrace:
+    def __init__(self, invoice):
+        self.enabled = bool(frappe.conf.get(DEBUG_FLAG))
+        self.invoice = invoice
+        self.started = self.last = time.perf_counter()
+        self.steps = {}
+
+    def step(self, name):
+        if self.enabled:
+            now = time.perf_counter()
+            self.steps[name] = round((now - self.last) * 1000, 2)
+            self.last = now
+
+    def finish(self, status, error=None):
+        if not self.enabled:
+            return
+        frappe.logger("ury_settle").info(
+            {
+                "invoice": self.invoice,
+                "status": status,
+                "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 2),
+                "steps": self.steps,
+                "error": error,
+            }
+        )
+
+
+def get_payment_rows(payments):
+    payments = frappe.parse_json(payments) if isinstance(payments, str) else payments
+    if not payments:
+        frappe.throw(_("At least one payment method is required"))
+
+    rows = []
+    for payment in payments:
+        if not payment.get("mode_of_payment"):
+            frappe.throw(_("Payment mode is required for each payment"))
+        if flt(payment.get("amount")) <= 0:
+            frappe.throw(_("Payment amount must be greater than 0"))
+        rows.append(
+            {"mode_of_payment": payment["mode_of_payment"], "amount": flt(payment["amount"])}
+        )
+    return rows
+
+
+def settle_invoice(
+    invoice,
+    payments,
+    customer=None,
+    pos_profile=None,
+    owner=None,
+    additional_discount=None,
+    table=None,
+):
+    """Record `payments` against a draft POS Invoice (name or doc) and submit it."""
+    trace = SettleTrace(getattr(invoice, "name", invoice))
+    try:
+        payment_rows = get_payment_rows(payments)
+
+        invoice_doc = invoice
+        if not isinstance(invoice_doc, Document):
+            invoice_doc = frappe.get_doc("POS Invoice", invoice)
+        if invoice_doc.docstatus != 0:
+            frappe.throw(_("Invoice {0} is already settled").format(invoice_doc.name))
+        trace.step("load")
+
+        if table:
+            invoice_doc.restaurant = frappe.db.get_value("URY Table", table, "restaurant")
+        if customer:
+            invoice_doc.customer = customer
+        if pos_profile:
+            invoice_doc.pos_profile = pos_profile
+        if additional_discount:
+            invoice_doc.additional_discount_percentage = additional_discount
+        if owner:
+            invoice_doc.owner = owner
+
+        invoice_doc.set("payments", payment_rows)
+        invoice_doc.submit()
+        trace.step("submit")
+    except Exception as e:
+        trace.finish("Failed", str(e))
+        raise
+
+    trace.finish("Paid")
+    return invoice_doc
+
+
+# Day-end settlement of aggregator orders. Invoices are validated together up
+# front and then submitted in chunks by a background job; each invoice runs
+# under its own savepoint so one failure doesn't abort the batch. Progress is
+# kept in redis and pushed to the requesting user.
+
+BULK_SETTLE_CACHE_KEY = "ury_bulk_settle"
+BULK_SETTLE_CHUNK_SIZE = 20
+BULK_SETTLE_ROLES = ("URY Manager", "System Manager")
+
+
+@frappe.whitelist()
+def bulk_settle_invoices(invoices, mode_of_payment):
+    from ury.ury_pos.api import getBranch
+
+    invoices = list(dict.fromkeys(frappe.parse_json(invoices) or []))
+    if not invoices:
+        frappe.throw(_("Select the invoices to settle"))
+
+    branch = getBranch()
+    if not can_bulk_settle(branch):
+        frappe.throw(_("Not permitted to settle invoices in bulk"), frappe.PermissionError)
+
+    allowed_modes = {
+        row.customer: row.mode_of_payments
+        for row in frappe.get_all(
+            "Aggregator Settings",
+            fields=["customer", "mode_of_payments"],
+            filters={"parent": branch, "parenttype": "Branch"},
+        )
+    }
+
+    rows = {
+        row.name: row
+        for row in frappe.get_all(
+            "POS Invoice",
+            fields=["name", "customer", "branch", "order_type", "docstatus", "grand_total", "rounded_total"],
+            filters={"name": ("in", invoices)},
+        )
+    }
+
+    errors = []
+    for invoice in invoices:
+        row = rows.get(invoice)
+        if not row:
+            errors.append(_("{0}: not found").format(invoice))
+        elif row.branch != branch:
+            errors.append(_("{0}: belongs to another branch").format(invoice))
+        elif row.docstatus != 0:
+            errors.append(_("{0}: already settled").format(invoice))
+        elif row.order_type != "Aggregators":
+            errors.append(_("{0}: not an aggregator order").format(invoice))
+        elif allowed_modes.get(row.customer) != mode_of_payment:
+            errors.append(
+                _("{0}: {1} is not the mode of payment set for {2}").format(
+                    invoice, mode_of_payment, row.customer
+                )
+            )
+        elif flt(row.rounded_total or row.grand_total) <= 0:
+            errors.append(_("{0}: total must be greater than 0").format(invoice))
+
+    if errors:
+        frappe.throw("<br>".join(errors), title=_("Cannot settle invoices"))
+
+    job_id = frappe.generate_hash(length=12)
+    set_bulk_settle_status(
+        job_id,
+        {
+            "status": "Queued",
+            "owner": frappe.session.user,
+            "total": len(invoices),
+            "settled": [],
+            "failed": [],
+        },
+    )
+    frappe.enqueue(
+        "ury.ury.api.ury_settle.run_bulk_settle",
+        queue="long",
+        # job_id is enqueue's own RQ job id and is not passed to the method
+        job_id=f"{BULK_SETTLE_CACHE_KEY}::{job_id}",
+        bulk_job_id=job_id,
+        invoices=invoices,
+        mode_of_payment=mode_of_payment,
+        user=frappe.session.user,
+        enqueue_after_commit=True,
+    )
+    return {"job_id": job_id, "total": len(invoices)}
+
+
+def can_bulk_settle(branch):
+    """Managers, and users with a billing role on a POS Profile of the branch."""
+    roles = set(frappe.get_roles())
+    if roles.intersection(BULK_SETTLE_ROLES):
+        return True
+
+    profiles = frappe.get_all("POS Profile", filters={"branch": branch, "disabled": 0}, pluck="name")
+    return bool(
+        profiles
+        and frappe.get_all(
+            "Role Permitted",
+            filters={
+                "parenttype": "POS Profile",
+                "parentfield": "role_allowed_for_billing",
+                "parent": ("in", profiles),
+                "role": ("in", list(roles)),
+            },
+            limit=1,
+        )
+    )
+
+
+def run_bulk_settle(bulk_job_id, invoices, mode_of_payment, user):
+    status = frappe.cache().hget(BULK_SETTLE_CACHE_KEY, bulk_job_id) or {
+        "owner": user, "total": len(invoices), "settled": [], "failed": []
+    }
+    status["status"] = "Running"
+
+    for start in range(0, len(invoices), BULK_SETTLE_CHUNK_SIZE):
+        for invoice in invoices[start : start + BULK_SETTLE_CHUNK_SIZE]:
+            savepoint = "ury_bulk_settle"
+            frappe.db.savepoint(savepoint)
+            try:
+                rounded_total, grand_total = frappe.db.get_value(
+                    "POS Invoice", invoice, ["rounded_total", "grand_total"]
+                )
+                amount = rounded_total or grand_total
+                settle_invoice(invoice, [{"mode_of_payment": mode_of_payment, "amount": amount}])
+                status["settled"].append(invoice)
+            except Exception as e:
+                frappe.db.rollback(save_point=savepoint)
+                status["failed"].append({"invoice": invoice, "error": str(e)})
+            frappe.clear_messages()
+
+        frappe.db.commit()
+        publish_bulk_settle_status(bulk_job_id, status, user)
+
+    status["status"] = "Completed"
+    publish_bulk_settle_status(bulk_job_id, status, user)
+
+
+@frappe.whitelist()
+def get_bulk_settle_status(job_id):
+    """Progress of a bulk settlement, readable only by the user who started it."""
+    status = frappe.cache().hget(BULK_SETTLE_CACHE_KEY, job_id)
+    if status and status.get("owner") != frappe.session.user:
+        frappe.throw(_("Not permitted to view this bulk settlement"), frappe.PermissionError)
+    return status
+
+
+def set_bulk_settle_status(job_id, status):
+    frappe.cache().hset(BULK_SETTLE_CACHE_KEY, job_id, status)
+
+
+def publish_bulk_settle_status(job_id, status, user):
+    set_bulk_settle_status(job_id, status)
+    frappe.publish_realtime(
+        "ury_bulk_settle_progress",
+        dict(status, job_id=job_id, done=len(status["settled"]) + len(status["failed"])),
+        user=user,
+    )
@@ -0,0 +1,165 @@
+import frappe
+import numpy as np
+from frappe.utils import add_days, flt, getdate, now, today
+
+# Reorder points from ingredient consumption. An hourly job reads what the
+# POS-linked Stock Entries of the last LOOKBACK_WEEKS issued per ingredient,
+# warehouse and day into one dense pair × day array. Each weekday is averaged
+# over those weeks, recent weeks weighing more, so a Saturday is forecast from
+# past Saturdays. The forecast over an item's lead time plus SERVICE_LEVEL_Z
+# standard deviations is its reorder point, and running the forecast forward
+# against the stock on hand gives the days it covers. Both are stored in
+# URY Ingredient Forecast, which the dashboard alerts read.
+
+FORECAST_DOCTYPE = "URY Ingredient Forecast"
+FORECAST_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "item_code", "item_name", "warehouse", "stock_uom", "actual_qty",
+    "avg_daily_consumption", "std_daily_consumption",
+    "lead_time_days", "lead_time_demand", "reorder_point", "days_of_cover",
+]
+LOOKBACK_WEEKS = 8
+WEEK_DECAY = 0.8
+SERVICE_LEVEL_Z = 1.65
+DEFAULT_LEAD_TIME_DAYS = 2
+MAX_COVER_DAYS = 28
+
+
+def rebuild_ingredient_forecast():
+    to_date = getdate(today())
+    from_date = add_days(to_date, -7 * LOOKBACK_WEEKS)
+    pairs, series = get_consumption_series(from_date, to_date)
+
+    frappe.db.delete(FORECAST_DOCTYPE)
+    if pairs:
+        frappe.db.bulk_insert(FORECAST_DOCTYPE, FORECAST_FIELDS, get_forecast_rows(pairs, series))
+
+
+def get_consumption_series(from_date, to_date):
+    """(pairs, series) of net daily ingredient consumption from `from_date`.
+
+    `pairs` lists the (item_code, warehouse) that consumed anything and
+    series[i, d] is what pair i consumed on day d, counted from `from_date`.
+    Returns to the same warehouse, as when an order shrinks, count against
+    their day.
+    """
+    rows = frappe.db.sql(
+        """
+        SELECT
+            sed.item_code,
+            IFNULL(sed.s_warehouse, sed.t_warehouse) AS warehouse,
+            se.posting_date,
+            SUM(IF(se.purpose = 'Material Issue', sed.transfer_qty, -sed.transfer_qty)) AS qty
+        FROM `tabStock Entry` se
+        INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
+        WHERE se.docstatus = 1
+            AND se.purpose IN ('Material Issue', 'Material Receipt')
+            AND se.posting_date >= %(from_date)s AND se.posting_date < %(to_date)s
+            AND (
+                IFNULL(se.custom_pos_invoice, '') != ''
+                OR EXISTS (
+                    SELECT 1 FROM `tabURY Ingredient Consumption` c
+                    WHERE c.parent = se.name AND c.parenttype = 'Stock Entry'
+                )
+            )
+        GROUP BY sed.item_code, warehouse, se.posting_date
+        """,
+        {"from_date": from_date, "to_date": to_date},
+        as_dict=True,
+    )
+
+    index = {}
+    for row in rows:
+        index.setdefault((row.item_code, row.warehouse), len(index))
+
+    days = (getdate(to_date) - getdate(from_date)).days
+    series = np.zeros((len(index), days))
+    np.add.at(
+        series,
+        (
+            np.array([index[(row.item_code, row.warehouse)] for row in rows], dtype=int),
+            np.array([(getdate(row.posting_date) - getdate(from_date)).days for row in rows], dtype=int),
+        ),
+        np.array([flt(row.qty) for row in rows]),
+    )
+
+    # A day that returned more than it issued consumed nothing
+    series = series.clip(min=0)
+    consumed = series.any(axis=1)
+    return [pair for pair, selected in zip(index, consumed) if selected], series[consumed]
+
+
+def get_weekday_profile(series):
+    """Recency-weighted mean and variance of each weekday, shape (pairs, 7).
+
+    Column k is the weekday of day k of the series, so with a series of whole
+    weeks ending yesterday column 0 is today.
+    """
+    weeks = series.reshape(len(series), -1, 7)
+    weights = WEEK_DECAY ** np.arange(weeks.shape[1] - 1, -1, -1)
+    weights /= weights.sum()
+
+    mean = np.einsum("pwd,w->pd", weeks, weights)
+    variance = np.einsum("pwd,w->pd", (weeks - mean[:, None, :]) ** 2, weights)
+    # Unbiased for weighted samples
+    variance /= 1 - (weights ** 2).sum()
+    return mean, variance
+
+
+def get_forecast_rows(pairs, series):
+    mean, variance = get_weekday_profile(series)
+
+    item_codes = sorted({item_code for item_code, warehouse in pairs})
+    items = {
+        item.name: item
+        for item in frappe.get_all(
+            "Item",
+            fields=["name", "item_name", "stock_uom", "lead_time_days", "safety_stock"],
+            filters={"name": ("in", item_codes)},
+        )
+    }
+    stock = {
+        (row.item_code, row.warehouse): flt(row.actual_qty)
+        for row in frappe.get_all(
+            "Bin",
+            fields=["item_code", "warehouse", "actual_qty"],
+            filters={
+                "item_code": ("in", item_codes),
+                "warehouse": ("in", list({warehouse for item_code, warehouse in pairs})),
+            },
+        )
+    }
+
+    lead_time = np.array(
+        [items[item_code].lead_time_days or DEFAULT_LEAD_TIME_DAYS for item_code, warehouse in pairs]
+    ).clip(1, MAX_COVER_DAYS)
+    safety_stock = np.array([flt(items[item_code].safety_stock) for item_code, warehouse in pairs])
+    actual_qty = np.array([stock.get(pair, 0.0) for pair in pairs])
+
+    # Cumulative demand and variance from today over the next MAX_COVER_DAYS
+    weeks = -(-MAX_COVER_DAYS // 7)
+    demand = np.tile(mean, weeks)[:, :MAX_COVER_DAYS].cumsum(axis=1)
+    demand_variance = np.tile(variance, weeks)[:, :MAX_COVER_DAYS].cumsum(axis=1)
+
+    lead_time_index = (lead_time - 1)[:, None]
+    lead_time_demand = np.take_along_axis(demand, lead_time_index, axis=1)[:, 0]
+    lead_time_std = np.sqrt(np.take_along_axis(demand_variance, lead_time_index, axis=1)[:, 0])
+    # An item's own safety stock is kept as a floor
+    reorder_point = np.maximum(lead_time_demand + SERVICE_LEVEL_Z * lead_time_std, safety_stock)
+    days_of_cover = (demand <= actual_qty.clip(min=0)[:, None]).sum(axis=1)
+
+    avg_daily_consumption = mean.mean(axis=1)
+    std_daily_consumption = np.sqrt(variance.mean(axis=1))
+
+    timestamp = now()
+    return [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, "Administrator", "Administrator",
+            item_code, items[item_code].item_name, warehouse, items[item_code].stock_uom,
+            flt(actual_qty[i], 3),
+            flt(avg_daily_consumption[i], 3), flt(std_daily_consumption[i], 3),
+            int(lead_time[i]), flt(lead_time_demand[i], 3), flt(reorder_point[i], 3),
+            int(days_of_cover[i]),
+        )
+        for i, (item_code, warehouse) in enumerate(pairs)
+    ]
@@ -0,0 +1,54 @@
+import hashlib
+
+import frappe
+from frappe.utils import flt
+
+# Bin quantities of many items in one warehouse, read with a single IN query.
+# Deduction paths read it fresh; read-only checks may pass `cache_seconds` to
+# share one snapshot between requests fired in quick succession.
+
+SNAPSHOT_CACHE_KEY = "ury_stock_snapshot"
+
+
+def get_stock_snapshot(item_codes, warehouse, cache_seconds=0):
+    """{item_code: {"actual_qty", "projected_qty"}} of `item_codes` in `warehouse`.
+
+    Items without a Bin are reported with zero quantities.
+    """
+    item_codes = sorted({item_code for item_code in item_codes if item_code})
+    if not item_codes or not warehouse:
+        return {}
+
+    if not cache_seconds:
+        return fetch_stock_snapshot(item_codes, warehouse)
+
+    key = "{0}::{1}::{2}".format(
+        SNAPSHOT_CACHE_KEY,
+        warehouse,
+        hashlib.md5("\n".join(item_codes).encode()).hexdigest(),
+    )
+    snapshot = frappe.cache().get_value(key)
+    if snapshot is None:
+        snapshot = fetch_stock_snapshot(item_codes, warehouse)
+        frappe.cache().set_value(key, snapshot, expires_in_sec=cache_seconds)
+    return snapshot
+
+
+def fetch_stock_snapshot(item_codes, warehouse):
+    snapshot = {
+        item_code: {"actual_qty": 0.0, "projected_qty": 0.0} for item_code in item_codes
+    }
+    for row in frappe.get_all(
+        "Bin",
+        fields=["item_code", "actual_qty", "projected_qty"],
+        filters={"warehouse": warehouse, "item_code": ("in", item_codes)},
+    ):
+        snapshot[row.item_code] = {
+            "actual_qty": flt(row.actual_qty),
+            "projected_qty": flt(row.projected_qty),
+        }
+    return snapshot
+
+
+def get_actual_qty(snapshot, item_code):
+    return snapshot.get(item_code, {}).get("actual_qty", 0)
@@ -0,0 +1,150 @@
+import frappe
+
+from ury.ury.api.ury_floor import publish_table_state
+
+# Table occupancy is derived from one fact: a table is occupied while it has
+# an open (draft, unprinted) POS Invoice. refresh_tables() recomputes
+# `URY Table.occupied` / `latest_invoice_time` for the touched tables with one
+# set-based UPDATE inside the caller's transaction, and reconcile_occupancy()
+# runs the same statement over every table on a schedule to repair any drift.
+# Reads come from per-room redis hashes rebuilt from the table columns.
+
+OCCUPANCY_CACHE_KEY = "ury_table_occupancy"
+ROOM_TABLES_CACHE_KEY = "ury_room_tables"
+ROOM_TABLE_FIELDS = [
+    "name", "branch", "is_take_away", "restaurant_room", "table_shape", "no_of_seats",
+]
+
+
+def update_occupancy(tables=None, exclude_invoice=None):
+    """Derive occupancy of `tables` (all tables when None) from open invoices.
+
+    Returns the rooms whose tables changed.
+    """
+    values = {"exclude_invoice": exclude_invoice or ""}
+    invoice_condition = table_condition = ""
+    if tables is not None:
+        if not tables:
+            return set()
+        values["tables"] = tuple(tables)
+        invoice_condition = "AND restaurant_table IN %(tables)s"
+        table_condition = "AND t.name IN %(tables)s"
+
+    changed = frappe.db.sql(
+        """
+        SELECT t.name, t.restaurant_room
+        FROM `tabURY Table` t
+        LEFT JOIN (
+            SELECT restaurant_table, TIME(MAX(creation)) AS invoice_time
+            FROM `tabPOS Invoice`
+            WHERE docstatus = 0 AND invoice_printed = 0 AND name != %(exclude_invoice)s
+                AND COALESCE(restaurant_table, '') != '' {invoice_condition}
+            GROUP BY restaurant_table
+        ) inv ON inv.restaurant_table = t.name
+        WHERE (t.occupied != (inv.restaurant_table IS NOT NULL)
+            OR NOT (t.latest_invoice_time <=> inv.invoice_time)) {table_condition}
+        """.format(invoice_condition=invoice_condition, table_condition=table_condition),
+        values,
+        as_dict=True,
+    )
+    if not changed:
+        return set()
+
+    values["changed"] = tuple(row.name for row in changed)
+    frappe.db.sql(
+        """
+        UPDATE `tabURY Table` t
+        LEFT JOIN (
+            SELECT restaurant_table, TIME(MAX(creation)) AS invoice_time
+            FROM `tabPOS Invoice`
+            WHERE docstatus = 0 AND invoice_printed = 0 AND name != %(exclude_invoice)s
+                AND restaurant_table IN %(changed)s
+            GROUP BY restaurant_table
+        ) inv ON inv.restaurant_table = t.name
+        SET t.occupied = (inv.restaurant_table IS NOT NULL),
+            t.latest_invoice_time = inv.invoice_time
+        WHERE t.name IN %(changed)s
+        """,
+        values,
+    )
+
+    rooms = {row.restaurant_room for row in changed}
+    clear_room_occupancy(rooms)
+    return rooms
+
+
+def refresh_tables(*tables, exclude_invoice=None):
+    """Re-derive occupancy of the given tables and push their floor rows.
+
+    `exclude_invoice` is an invoice that is being deleted in this transaction.
+    """
+    tables = [table for table in tables if table]
+    if tables:
+        update_occupancy(tables, exclude_invoice=exclude_invoice)
+        publish_table_state(*tables)
+
+
+def reconcile_occupancy():
+    update_occupancy()
+
+
+def clear_room_occupancy(rooms):
+    rooms = [room for room in rooms if room]
+    if not rooms:
+        return
+
+    def clear():
+        for room in rooms:
+            frappe.cache().hdel(OCCUPANCY_CACHE_KEY, room)
+
+    clear()
+    # Drop again once committed, in case a concurrent read cached the old state
+    frappe.db.after_commit.add(clear)
+
+
+def get_room_occupancy(room):
+    """{table: latest_invoice_time} of the occupied tables of a room."""
+
+    def generator():
+        return {
+            table: str(invoice_time) if invoice_time is not None else None
+            for table, invoice_time in frappe.db.sql(
+                """
+                SELECT name, latest_invoice_time FROM `tabURY Table`
+                WHERE restaurant_room = %s AND occupied = 1
+                """,
+                room,
+            )
+        }
+
+    return frappe.cache().hget(OCCUPANCY_CACHE_KEY, room, generator=generator)
+
+
+def get_room_tables(room):
+    """Static rows of a room's tables with their current occupancy."""
+    tables = frappe.cache().hget(
+        ROOM_TABLES_CACHE_KEY,
+        room,
+        generator=lambda: frappe.get_all(
+            "URY Table", fields=ROOM_TABLE_FIELDS, filters={"restaurant_room": room}
+        ),
+    )
+    occupancy = get_room_occupancy(room)
+    return [
+        dict(
+            table,
+            occupied=1 if table["name"] in occupancy else 0,
+            latest_invoice_time=occupancy.get(table["name"]),
+        )
+        for table in tables
+    ]
+
+
+def on_table_update(doc, method):
+    rooms = {doc.restaurant_room}
+    if doc.get_doc_before_save():
+        rooms.add(doc.get_doc_before_save().restaurant_room)
+    rooms.discard(None)
+    for room in rooms:
+        frappe.cache().hdel(ROOM_TABLES_CACHE_KEY, room)
+    clear_room_occupancy(rooms)
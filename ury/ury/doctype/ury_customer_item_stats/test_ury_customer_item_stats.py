@@ -0,0 +1,9 @@
+# Copyright (c) 2026, Tridz Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestURYCustomerItemStats(FrappeTestCase):
+	pass
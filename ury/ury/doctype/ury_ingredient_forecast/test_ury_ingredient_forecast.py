@@ -0,0 +1,72 @@
+# Copyright (c) 2026, Tridz Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from ury.ury.api.ury_stock_forecast import WEEK_DECAY, get_forecast_rows, get_weekday_profile
+
+PAIR = ("Tomato", "Kitchen - URY")
+
+
+def get_series(*weeks):
+	"""One pair's series from per-week lists of seven daily quantities."""
+	return np.array([sum(weeks, [])], dtype=float)
+
+
+class TestURYIngredientForecast(FrappeTestCase):
+	def test_weekday_profile_keeps_weekdays_apart(self):
+		series = get_series([0, 0, 0, 6, 0, 0, 0], [0, 0, 0, 6, 0, 0, 0])
+		mean, variance = get_weekday_profile(series)
+
+		self.assertEqual(mean.shape, (1, 7))
+		np.testing.assert_allclose(mean[0], [0, 0, 0, 6, 0, 0, 0])
+		np.testing.assert_allclose(variance[0], np.zeros(7))
+
+	def test_weekday_profile_weighs_recent_weeks_more(self):
+		series = get_series([10] * 7, [20] * 7)
+		mean, variance = get_weekday_profile(series)
+
+		weights = np.array([WEEK_DECAY, 1]) / (1 + WEEK_DECAY)
+		np.testing.assert_allclose(mean[0], np.full(7, weights @ [10, 20]))
+		self.assertGreater(mean[0, 0], 15)
+
+		biased = weights @ (np.array([10, 20]) - mean[0, 0]) ** 2
+		np.testing.assert_allclose(variance[0], np.full(7, biased / (1 - (weights ** 2).sum())))
+
+	def test_forecast_rows_cover_lead_time_and_stock(self):
+		rows = self.get_rows(get_series([2] * 7, [2] * 7), lead_time_days=3, actual_qty=10)
+
+		actual_qty, avg, std, lead_time, lead_time_demand, reorder_point, days_of_cover = rows[0][9:]
+		self.assertEqual((actual_qty, avg, std), (10, 2, 0))
+		self.assertEqual((lead_time, lead_time_demand, reorder_point), (3, 6, 6))
+		# 2 a day lasts five whole days on 10
+		self.assertEqual(days_of_cover, 5)
+
+	def test_forecast_rows_start_from_todays_weekday(self):
+		# Only the last weekday of each week, six days from today, consumes
+		series = get_series([0, 0, 0, 0, 0, 0, 9], [0, 0, 0, 0, 0, 0, 9])
+		rows = self.get_rows(series, lead_time_days=2, actual_qty=5, safety_stock=4)
+
+		lead_time_demand, reorder_point, days_of_cover = rows[0][13:]
+		self.assertEqual(lead_time_demand, 0)
+		# Safety stock is kept as the floor
+		self.assertEqual(reorder_point, 4)
+		self.assertEqual(days_of_cover, 6)
+
+	def get_rows(self, series, lead_time_days, actual_qty, safety_stock=0):
+		items = [
+			frappe._dict(
+				name=PAIR[0],
+				item_name=PAIR[0],
+				stock_uom="Kg",
+				lead_time_days=lead_time_days,
+				safety_stock=safety_stock,
+			)
+		]
+		bins = [frappe._dict(item_code=PAIR[0], warehouse=PAIR[1], actual_qty=actual_qty)]
+		with patch("ury.ury.api.ury_stock_forecast.frappe.get_all", side_effect=[items, bins]):
+			return get_forecast_rows([PAIR], series)
@@ -1,9 +1,34 @@
 # Copyright (c) 2023, Tridz Technologies Pvt. Ltd. and contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from ury.ury.doctype.ury_order.ury_order import table_merge
+
 
 class TestURYOrder(FrappeTestCase):
-    pass
+    def test_table_merge_into_itself_keeps_the_order(self):
+        with patch("ury.ury.doctype.ury_order.ury_order.frappe.get_doc") as get_doc, patch(
+            "ury.ury.doctype.ury_order.ury_order.frappe.delete_doc"
+        ) as delete_doc:
+            self.assertRaises(frappe.ValidationError, table_merge, "T1", "T1")
+
+        get_doc.assert_not_called()
+        delete_doc.assert_not_called()
+
+    def test_table_merge_of_tables_sharing_an_order_keeps_it(self):
+        open_invoice = frappe._dict(name="ACC-PSINV-0001")
+        with patch(
+            "ury.ury.doctype.ury_order.ury_order.get_room_tables"
+        ), patch(
+            "ury.ury.doctype.ury_order.ury_order.get_open_invoice", return_value=open_invoice
+        ), patch("ury.ury.doctype.ury_order.ury_order.frappe.get_doc") as get_doc, patch(
+            "ury.ury.doctype.ury_order.ury_order.frappe.delete_doc"
+        ) as delete_doc:
+            self.assertRaises(frappe.ValidationError, table_merge, "T1", "T2")
+
+        get_doc.assert_not_called()
+        delete_doc.assert_not_called()
@@ -4,11 +4,18 @@
 import json
 import frappe
 from frappe import _
+from frappe.model import default_fields
 from frappe.model.document import Document
+from frappe.utils import cint, flt, now
 from erpnext.controllers.queries import item_query
 from ury.ury_pos.api import getBranch, getBranchRoom
 from ury.ury.api.ury_kot_generate import kot_execute
 from ury.ury.api.ury_kot_generate import process_items_for_cancel_kot
+from ury.ury.api.ury_invoice_events import publish_invoice_state
+from ury.ury.api.ury_table_occupancy import refresh_tables
+from ury.ury.api.ury_settle import get_payment_rows, settle_invoice
+from ury.ury.api.ury_pos_session import get_room_session
+from ury.ury.hooks.ury_pos_invoice import move_consumption_lines, transfer_consumption
 
 from frappe import cache
 
@@ -129,7 +136,37 @@ def sync_order(
     aggregator_id=None,
     room=None
 ):
-    
+    invoice = save_order(
+        items, cashier, owner, mode_of_payment, customer, no_of_pax, last_invoice,
+        waiter, pos_profile, last_modified_time, table, invoice, comments,
+        order_type, aggregator_id, room,
+    )
+    return invoice if isinstance(invoice, dict) else invoice.as_dict()
+
+
+def save_order(
+    items,
+    cashier,
+    owner,
+    mode_of_payment,
+    customer,
+    no_of_pax,
+    last_invoice,
+    waiter,
+    pos_profile,
+    last_modified_time=None,
+    table=None,
+    invoice=None,
+    comments=None,
+    order_type=None,
+    aggregator_id=None,
+    room=None
+):
+    """Create or update the order's draft POS Invoice and fire its KOTs.
+
+    Returns the invoice doc, or a {"status": "Failure"} dict when the order
+    changed underneath the caller.
+    """
     user_role = frappe.get_roles()
     posprofile = frappe.get_doc("POS Profile", pos_profile)
     
@@ -295,14 +332,9 @@ def sync_order(
         error_msg = f"KOT Creation Failes {str(e)}"            
         frappe.log_error(error_msg, "KOT Error")
 
-    # table status
-    if invoice.invoice_printed == 0:
-        frappe.db.set_value(
-            "URY Table", table, {"occupied": 1, "latest_invoice_time": invoice.creation}
-        )
-
     invoice.db_set("owner", owner)
-    return invoice.as_dict()
+    refresh_tables(table)
+    return invoice
 
 
 @frappe.whitelist()
@@ -397,72 +429,235 @@ def pos_opening_check():
     room = details[0].get('name')    # 'Beach'
     branch = details[0].get('branch') # 'Beach'
     
-    pos_opening_list = frappe.db.sql("""
-        SELECT DISTINCT `tabPOS Opening Entry`.name 
-        FROM `tabPOS Opening Entry`
-        INNER JOIN `tabMultiple Rooms` 
-        ON `tabMultiple Rooms`.parent = `tabPOS Opening Entry`.name
-        WHERE `tabPOS Opening Entry`.branch = %s
-        AND `tabPOS Opening Entry`.status = 'Open'
-        AND `tabPOS Opening Entry`.docstatus = 1
-        AND `tabMultiple Rooms`.room = %s
-    """, (branch, room), as_dict=True)
-    
-    
+    session = get_room_session(branch, room)
+
     result = {
-        "opening_exists": len(pos_opening_list) > 0,
-        "cashier": None,
-        "pos_profile": None,
+        "opening_exists": bool(session),
+        "cashier": session["cashier"] if session else None,
+        "pos_profile": session["pos_profile"] if session else None,
     }
 
-    if result["opening_exists"]:
-        # If POS opening entry exists, fetch the cashier from the first entry
-        opening_entry = frappe.get_doc("POS Opening Entry", pos_opening_list[0].name)
-        result["cashier"] = (
-            opening_entry.user
-        )  # Fetch values from POS Profile linked to POS Opening Entry
-        result["pos_profile"] = opening_entry.pos_profile
-        
     return result
 
 
+def get_room_tables(*tables):
+    """Table rows keyed by name; throws unless all of them are in one room."""
+    rows = {
+        row.name: row
+        for row in frappe.get_all(
+            "URY Table",
+            filters={"name": ("in", tables)},
+            fields=["name", "restaurant_room", "occupied"],
+        )
+    }
+    for table in tables:
+        if table not in rows:
+            frappe.throw(_("Table {0} not found").format(table))
+
+    if len({row.restaurant_room for row in rows.values()}) > 1:
+        frappe.throw(_("Table transfer between different rooms is restricted."))
+
+    return rows
+
+
+def get_open_invoice(table, invoice=None):
+    filters = {"restaurant_table": table, "docstatus": 0, "invoice_printed": 0}
+    if invoice:
+        filters["name"] = invoice
+
+    open_invoice = frappe.db.get_value(
+        "POS Invoice", filters, ["name", "creation", "branch"], as_dict=True
+    )
+    if not open_invoice:
+        frappe.throw(_("No open order found on Table {0}").format(table))
+    return open_invoice
+
+
 @frappe.whitelist()
 def table_transfer(table, newTable, invoice):
-    current_table = frappe.get_doc("URY Table", table)
-    pos_invoice = frappe.get_doc("POS Invoice", invoice)
-    new_table = frappe.get_doc("URY Table", newTable)
+    tables = get_room_tables(table, newTable)
+    if tables[newTable].occupied == 1:
+        frappe.throw(f"Table {newTable} is already occupied")
 
-    if current_table.restaurant_room == new_table.restaurant_room:
-        if new_table.occupied == 1:
-            frappe.throw(f"Table {new_table.name} is already occupied")
+    pos_invoice = get_open_invoice(table, invoice)
 
-        # Update table status
-        frappe.db.set_value(
-            "URY Table",
-            new_table.name,
-            {"occupied": 1, "latest_invoice_time": pos_invoice.creation},
-        )
-        frappe.db.set_value(
-            "URY Table",
-            current_table.name,
-            {"occupied": 0, "latest_invoice_time": None},
-        )
+    frappe.db.set_value("POS Invoice", pos_invoice.name, "restaurant_table", newTable)
+    change_table_in_kot(pos_invoice.name, newTable, pos_invoice.branch)
 
-        # Update POS Invoice
-        pos_invoice.restaurant_table = new_table.name
-        pos_invoice.save()
+    refresh_tables(table, newTable)
+    publish_invoice_state(pos_invoice.name)
 
-        try:
-            change_table_in_kot(
-                    pos_invoice.name, new_table.name, pos_invoice.branch
-                )
 
-        except Exception as e:
-            # If an exception occurs (e.g., "kot" app not found), it will be caught here without effecting execution
-            pass
+@frappe.whitelist()
+def table_merge(table, targetTable):
+    """Move the open order of `table` into the open order of `targetTable`."""
+    if table == targetTable:
+        frappe.throw(_("Cannot merge Table {0} into itself").format(table))
+    get_room_tables(table, targetTable)
+    source_name = get_open_invoice(table).name
+    target_name = get_open_invoice(targetTable).name
+    if source_name == target_name:
+        frappe.throw(_("Tables {0} and {1} share the same order").format(table, targetTable))
+    source = frappe.get_doc("POS Invoice", source_name)
+    target = frappe.get_doc("POS Invoice", target_name)
+
+    merged_rows = []
+    for item in source.items:
+        row = target.append("items", {})
+        row.update({key: value for key, value in item.as_dict().items() if key not in default_fields})
+        merged_rows.append((item, row))
+    target.no_of_pax = cint(target.no_of_pax) + cint(source.no_of_pax)
+    target.save()
+
+    # Ingredients of the moved lines were issued against the source order
+    frappe.db.sql(
+        "UPDATE `tabStock Entry` SET custom_pos_invoice = %s WHERE custom_pos_invoice = %s",
+        (target.name, source.name),
+    )
+    move_consumption_lines(
+        source.name, target.name, {item.name: row.name for item, row in merged_rows}
+    )
+    move_kots(
+        frappe.get_all("URY KOT", filters={"invoice": source.name, "docstatus": 1}, pluck="name"),
+        targetTable,
+        target.branch,
+        invoice=target.name,
+    )
+    frappe.delete_doc("POS Invoice", source.name, ignore_permissions=True)
 
-    else:
-        frappe.throw(_("Table transfer between different rooms is restricted."))
+    refresh_tables(table, targetTable)
+    return target.as_dict()
+
+
+@frappe.whitelist()
+def table_split(table, newTable, invoice, items):
+    """Move the given lines of an open order to a new order on `newTable`.
+
+    `items` is a list of {"name": <POS Invoice Item>, "qty": <qty to move>}.
+    Pending KOTs whose items all moved follow the new order.
+    """
+    tables = get_room_tables(table, newTable)
+    if tables[newTable].occupied == 1:
+        frappe.throw(f"Table {newTable} is already occupied")
+
+    source = frappe.get_doc("POS Invoice", get_open_invoice(table, invoice).name)
+    move_qty = {row.get("name"): flt(row.get("qty")) for row in frappe.parse_json(items)}
+
+    moved_items = []
+    moved_from = []
+    remaining_items = []
+    for item in source.items:
+        qty = min(move_qty.get(item.name, 0), item.qty)
+        if qty > 0:
+            moved = {key: value for key, value in item.as_dict().items() if key not in default_fields}
+            moved["qty"] = qty
+            moved_items.append(moved)
+            moved_from.append(item)
+        if item.qty - qty > 0:
+            item.qty = item.qty - qty
+            remaining_items.append(item)
+
+    if not moved_items:
+        frappe.throw(_("Select the items to move"))
+    if not remaining_items:
+        frappe.throw(_("All items are selected. Use table transfer instead."))
+
+    source.items = remaining_items
+    source.save()
+
+    split = frappe.copy_doc(source)
+    split.restaurant_table = newTable
+    split.invoice_printed = 0
+    split.items = []
+    split_rows = [split.append("items", moved) for moved in moved_items]
+    # Ingredients of these lines were already issued against the source order;
+    # they are moved over below instead of being deducted again
+    split.flags.ury_skip_stock_deduction = True
+    split.insert()
+    transfer_consumption(
+        source,
+        split,
+        [(item, row, row.qty) for item, row in zip(moved_from, split_rows)],
+    )
+
+    move_kots(
+        get_kots_covered_by(get_pending_kots(source.name), moved_items),
+        newTable,
+        source.branch,
+        invoice=split.name,
+    )
+
+    refresh_tables(table, newTable)
+    return split.as_dict()
+
+
+def get_pending_kots(invoice):
+    return frappe.get_all(
+        "URY KOT",
+        filters={
+            "invoice": invoice,
+            "docstatus": 1,
+            "order_status": "Ready For Prepare",
+            "verified": 0,
+        },
+        pluck="name",
+    )
+
+
+def get_kots_covered_by(kots, moved_items):
+    """KOTs whose every line is accounted for by the moved invoice lines."""
+    if not kots:
+        return []
+
+    available = {}
+    for moved in moved_items:
+        available[moved["item_code"]] = available.get(moved["item_code"], 0) + flt(moved["qty"])
+
+    kot_items = {}
+    for kot, item, quantity in frappe.db.sql(
+        "SELECT parent, item, quantity FROM `tabURY KOT Items` WHERE parent IN %s",
+        (tuple(kots),),
+    ):
+        kot_items.setdefault(kot, []).append((item, flt(quantity)))
+
+    covered = []
+    for kot in kots:
+        lines = kot_items.get(kot, [])
+        if lines and all(available.get(item, 0) >= qty for item, qty in lines):
+            for item, qty in lines:
+                available[item] -= qty
+            covered.append(kot)
+    return covered
+
+
+def move_kots(kots, table, branch, invoice=None):
+    """Re-home KOTs in one UPDATE and notify each production unit once."""
+    if not kots:
+        return
+
+    kots = tuple(kots)
+    productions = frappe.db.sql_list(
+        "SELECT DISTINCT production FROM `tabURY KOT` WHERE name IN %s", (kots,)
+    )
+
+    values = {"kots": kots, "table": table, "modified": now()}
+    invoice_update = ""
+    if invoice:
+        values["invoice"] = invoice
+        invoice_update = ", invoice = %(invoice)s"
+
+    frappe.db.sql(
+        """
+        UPDATE `tabURY KOT`
+        SET restaurant_table = %(table)s, modified = %(modified)s {invoice_update}
+        WHERE name IN %(kots)s
+        """.format(invoice_update=invoice_update),
+        values,
+    )
+
+    for production in productions:
+        kot_channel = "{}_{}_{}".format("kot_update", branch, production)
+        frappe.publish_realtime(kot_channel, after_commit=True)
 
 
 @frappe.whitelist()
@@ -502,24 +697,12 @@ def captain_transfer(currentCaptain, newCaptain, invoice):
 
 @frappe.whitelist()
 def customer_favourite_item(customer_name):
-    pos = frappe.db.get_list(
-        "POS Invoice", filters={"customer": customer_name}, fields=["name"]
-    )
-
-    item_qty = {}
-
-    for invoice in pos:
-        pos_invoice = frappe.get_doc("POS Invoice", invoice)
-        for item in pos_invoice.items:
-            item_name = item.item_name
-            item_qty[item_name] = item_qty.get(item_name, 0) + item.qty
+    from ury.ury.api.ury_customer_item_stats import get_top_items
 
     result = [
-        {"item_name": item_name, "qty": qty}
-        for item_name, qty in item_qty.items()
-        if qty > 1
+        {"item_name": item.item_name, "qty": item.qty}
+        for item in get_top_items(customer_name, 3, min_qty=1)
     ]
-    result = sorted(result, key=lambda x: x["qty"], reverse=True)[:3]
 
     return result
 
@@ -528,13 +711,6 @@ def customer_favourite_item(customer_name):
 def cancel_order(invoice_id, reason):
     pos_invoice = frappe.get_doc("POS Invoice", invoice_id)
 
-    # Update table status
-    frappe.db.set_value(
-        "URY Table",
-        pos_invoice.restaurant_table,
-        {"occupied": 0, "latest_invoice_time": None},
-    )
-
     try:
         cancel_kot(invoice_id)
 
@@ -552,85 +728,32 @@ def cancel_order(invoice_id, reason):
     frappe.db.set_value("POS Invoice", invoice_id, "docstatus", 2)
     frappe.db.set_value("POS Invoice", invoice_id, "status", "Cancelled")
     frappe.db.set_value("POS Invoice", invoice_id, "cancel_reason", reason)
+    refresh_tables(pos_invoice.restaurant_table)
+    publish_invoice_state(invoice_id)
 
 # Method for URY POS
 @frappe.whitelist()
 def make_invoice(customer=None, payments=None, cashier=None, pos_profile=None, owner=None, additionalDiscount=None, table=None, invoice=None):
     try:
-        # Log the incoming parameters for debugging
-        frappe.log_error(f"make_invoice called with: customer={customer}, payments={payments}, cashier={cashier}, pos_profile={pos_profile}, owner={owner}, table={table}, invoice={invoice}", "Payment Debug")
-        
-        # Parse payments if it's a string (JSON from frontend)
-        if payments and isinstance(payments, str):
-            payments = json.loads(payments)
-        
-        # Ensure payments is a list
-        if not payments:
-            payments = []
-        
-        # Validate required parameters
         if not invoice:
             frappe.throw("Invoice is required for payment processing")
         
-        if not payments:
-            frappe.throw("At least one payment method is required")
-        
         if not pos_profile:
             frappe.throw("POS Profile is required")
-        
-        order_type = invoice_name = frappe.get_value("POS Invoice", invoice, "order_type")
-        invoice_doc = get_order_invoice(table, invoice, order_type, "Payments")
-        
-        if not invoice_doc:
-            frappe.throw(f"Could not find POS Invoice: {invoice}")
-
-        if table:
-            restaurant = get_restaurant_and_menu_name(table)
-            invoice_doc.restaurant = restaurant
-
-        # Only set customer if provided
-        if customer:
-            invoice_doc.customer = customer
-        
-        if pos_profile:
-            invoice_doc.pos_profile = pos_profile
-        
-        if additionalDiscount:
-            invoice_doc.additional_discount_percentage = additionalDiscount
-        
-        invoice_doc.calculate_taxes_and_totals()
-
-        # Clear existing payments
-        for pay in invoice_doc.payments:
-            pay.delete(pay.mode_of_payment)
-
-        # Add new payments
-        for payment_data in payments:
-            if not payment_data.get("mode_of_payment"):
-                frappe.throw("Payment mode is required for each payment")
-            if not payment_data.get("amount") or payment_data.get("amount") <= 0:
-                frappe.throw("Payment amount must be greater than 0")
-                
-            invoice_doc.append("payments", {
-                "mode_of_payment": payment_data["mode_of_payment"], 
-                "amount": payment_data["amount"]
-            })
 
-        if owner:
-            invoice_doc.owner = owner
-        
-        invoice_doc.save()
-        
-        try:
-            invoice_doc.submit()
-            frappe.log_error(f"Payment successful for invoice: {invoice_doc.name}", "Payment Success")
-            return {"success": True, "message": "Payment processed successfully", "invoice": invoice_doc.name}
-        except Exception as e:
-            frappe.log_error(f"Error submitting invoice {invoice_doc.name}: {str(e)}", "Payment Submit Error")
-            frappe.throw(f"Error while settling order: {e}")
+        invoice_doc = settle_invoice(
+            invoice,
+            payments,
+            customer=customer,
+            pos_profile=pos_profile,
+            owner=owner,
+            additional_discount=additionalDiscount,
+            table=table,
+        )
+        return {"success": True, "message": "Payment processed successfully", "invoice": invoice_doc.name}
             
     except Exception as e:
-        frappe.log_error(f"Payment processing error: {str(e)}", "Payment Processing Error")
+        frappe.log_error(f"Payment processing error for {invoice}: {str(e)}", "Payment Processing Error")
         frappe.throw(f"Payment failed: {str(e)}")
     
     
@@ -690,23 +813,7 @@ def cancel_kot(invoice_id):
 
 
 def change_table_in_kot(invoice, new_table, branch):
-    # Get a list of KOTs associated with the POS Invoice
-    kot_list = frappe.get_all(
-        "URY KOT",
-        filters={
-            "invoice": invoice,
-            "docstatus": 1,
-            "order_status": "Ready For Prepare",
-            "verified": 0,
-        },
-    )
-
-    # Update each KOT's restaurant_table and send a real-time update
-    for kot in kot_list:
-        frappe.db.set_value("URY KOT", kot.name, "restaurant_table", new_table)
-        production = frappe.db.get_value("URY KOT", kot.name, "production")
-        kot_channel = "{}_{}_{}".format("kot_update", branch, production)
-        frappe.publish_realtime(kot_channel)
+    move_kots(get_pending_kots(invoice), new_table, branch)
 
 @frappe.whitelist()
 def process_payment(customer=None, payments=None, cashier=None, pos_profile=None, owner=None, additionalDiscount=None, table=None, invoice=None):
@@ -714,14 +821,6 @@ def process_payment(customer=None, payments=None, cashier=None, pos_profile=None
     Alternative payment processing function
     """
     try:
-        # Parse payments if it's a string (JSON from frontend)
-        if payments and isinstance(payments, str):
-            payments = json.loads(payments)
-        
-        # Ensure payments is a list
-        if not payments:
-            payments = []
-        
         # Validate required parameters
         if not payments:
             frappe.throw("Payments are required")
@@ -731,47 +830,82 @@ def process_payment(customer=None, payments=None, cashier=None, pos_profile=None
             frappe.throw("POS Profile is required")
         if not owner:
             frappe.throw("Owner is required")
-        
-        order_type = invoice_name = frappe.get_value("POS Invoice", invoice, "order_type")
-        invoice_doc = get_order_invoice(table, invoice, order_type, "Payments")
 
-        if table:
-            restaurant = get_restaurant_and_menu_name(table)
-            invoice_doc.restaurant = restaurant
-
-        # Only set customer if provided
-        if customer:
-            invoice_doc.customer = customer
-        
-        invoice_doc.pos_profile = pos_profile
-        if additionalDiscount:
-            invoice_doc.additional_discount_percentage = additionalDiscount
-        
-        invoice_doc.calculate_taxes_and_totals()
-
-        # Clear existing payments
-        for pay in invoice_doc.payments:
-            pay.delete(pay.mode_of_payment)
-
-        # Add new payments
-        for payment in payments:
-            invoice_doc.append("payments", {
-                "mode_of_payment": payment["mode_of_payment"], 
-                "amount": payment["amount"]
-            })
-
-        invoice_doc.owner = owner
-        invoice_doc.save()
-        
-        try:
-            invoice_doc.submit()
-            return {"success": True, "message": "Payment processed successfully", "invoice": invoice_doc.name}
-        except Exception as e:
-            frappe.throw(f"Error while settling order: {e}")
+        invoice_doc = settle_invoice(
+            invoice,
+            payments,
+            customer=customer,
+            pos_profile=pos_profile,
+            owner=owner,
+            additional_discount=additionalDiscount,
+            table=table,
+        )
+        return {"success": True, "message": "Payment processed successfully", "invoice": invoice_doc.name}
             
     except Exception as e:
         frappe.log_error(f"Payment processing error: {str(e)}", "Payment Error")
         frappe.throw(f"Payment processing failed: {str(e)}")
+
+
+@frappe.whitelist()
+def quick_checkout(items, customer, payments, cashier, owner, waiter, pos_profile, order_type="Take Away", no_of_pax=1, comments=None, additionalDiscount=None):
+    """Create, fire, settle and queue the bill of a counter order in one call.
+
+    Replaces sync_order + print + make_invoice for take-away orders; everything
+    runs in the request's transaction, and printing is queued after commit.
+    """
+    payment_rows = get_payment_rows(payments)
+
+    invoice = save_order(
+        items, cashier, owner, payment_rows[0]["mode_of_payment"], customer, no_of_pax,
+        None, waiter, pos_profile, order_type=order_type, comments=comments,
+    )
+    if isinstance(invoice, dict):
+        return invoice
+
+    invoice = settle_invoice(
+        invoice,
+        payment_rows,
+        pos_profile=pos_profile,
+        owner=owner,
+        additional_discount=additionalDiscount,
+    )
+
+    return {
+        "success": True,
+        "message": "Payment processed successfully",
+        "invoice": invoice.name,
+        "print_type": queue_bill_print(invoice),
+    }
+
+
+def queue_bill_print(invoice):
+    """Queue the bill of a settled invoice on the profile's printer.
+
+    QZ printing runs in the browser, so for "qz" the client prints and calls
+    qz_print_update itself.
+    """
+    from ury.ury.api.ury_print import print_pos_page
+
+    pos_profile = frappe.get_cached_doc("POS Profile", invoice.pos_profile)
+    if pos_profile.qz_print:
+        return "qz"
+
+    if any(printer.bill for printer in pos_profile.printer_settings):
+        frappe.enqueue(
+            "ury.ury.api.ury_print.select_network_printer",
+            pos_profile=pos_profile.name,
+            invoice_id=invoice.name,
+            enqueue_after_commit=True,
+        )
+        return "network"
+
+    frappe.db.after_commit.add(
+        lambda: print_pos_page("POS Invoice", invoice.name, pos_profile.print_format)
+    )
+    return "socket"
+
+
 @frappe.whitelist()
 def test_payment_data(**kwargs):
     """
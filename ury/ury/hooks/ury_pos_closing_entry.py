@@ -1,4 +1,5 @@
 import frappe
+from ury.ury.api.ury_pos_session import get_open_sessions
 
 def before_save(doc, method):
     sub_pos_close_check(doc, method)
@@ -18,15 +19,7 @@ def sub_pos_close_check(doc,method):
                 cashier = user_details.user
         if frappe.session.user != cashier:
             branch=frappe.db.get_value("POS Profile",doc.pos_profile,"branch")
-            pos_opening_list = frappe.get_all(
-                "POS Opening Entry",
-                fields=["name", "docstatus", "status", "posting_date"],
-                filters={"branch": branch,"user":cashier},
-            )
-            flag = 0
-            for pos_opening in pos_opening_list:
-                if pos_opening.status == "Open" and pos_opening.docstatus == 1:
-                    flag = 1
+            flag = 1 if get_open_sessions(branch, cashier=cashier) else 0
             if flag == 1:
                 frappe.throw(("Sub Cashier POS  must be closed"), title=("Sub Cashier POS Closing Required"))
                 
@@ -1,6 +1,10 @@
 import frappe
 from datetime import datetime
-from frappe.utils import now_datetime, get_time,now
+from frappe.utils import flt, now_datetime, get_time,now
+from ury.ury.api import ury_consumption_journal
+from ury.ury.api.ury_bom_cache import get_item_ingredients
+from ury.ury.api.ury_stock_snapshot import get_actual_qty, get_stock_snapshot
+from ury.ury.api.ury_table_occupancy import refresh_tables
 
 
 def before_insert(doc, method):
@@ -117,12 +121,7 @@ def validate_invoice_print(doc, method):
 
 
 def table_status_delete(doc, method):
-    if doc.restaurant_table:
-        frappe.db.set_value(
-            "URY Table",
-            doc.restaurant_table,
-            {"occupied": 0, "latest_invoice_time": None},
-        )
+    refresh_tables(doc.restaurant_table, exclude_invoice=doc.name)
 
 
 def pos_invoice_naming(doc, method):
@@ -217,11 +216,17 @@ def restrict_existing_order(doc, event):
 def deduct_ingredients_from_stock(doc, method):
     """
     Deduct ingredients from stock using ERPNext Manufacturing logic
-    Creates Stock Entry (Material Consumption for Manufacture) for each menu item with BOM
+    Creates one Stock Entry (Material Issue) for all menu items with a BOM
     """
+    # Orders split off another order carry lines that were already deducted
+    if doc.flags.ury_skip_stock_deduction:
+        return
+
     try:
         # Check if inventory deduction is enabled for this POS Profile
-        enable_inventory_deduction = frappe.db.get_value("POS Profile", doc.pos_profile, "custom_enable_inventory_deduction")
+        enable_inventory_deduction, defer_posting = frappe.db.get_value(
+            "POS Profile", doc.pos_profile,
+            ["custom_enable_inventory_deduction", "custom_defer_inventory_posting"])
         if not enable_inventory_deduction:
             return
             
@@ -231,28 +236,20 @@ def deduct_ingredients_from_stock(doc, method):
             frappe.log_error(f"No default warehouse found for POS Invoice {doc.name}", "Stock Deduction Error")
             return
         
-        # Import ERPNext BOM functions
-        from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+        # Only journal the lines; the scheduled posting issues the stock
+        if defer_posting:
+            ury_consumption_journal.record_invoice(doc, warehouse)
+            return
         
-        # Process each menu item that has a BOM
+        # Exploded raw materials of each menu item that has a BOM, for the quantity sold
+        lines = []
         for item in doc.items:
-            # Get the BOM for this item
-            bom = frappe.db.get_value("BOM", 
-                {"item": item.item_code, "is_active": 1, "is_default": 1, "docstatus": 1}, 
-                "name")
-            
-            if bom:
-                # Use ERPNext's BOM explosion to get all raw materials
-                bom_items = get_bom_items_as_dict(
-                    bom=bom,
-                    company=doc.company,
-                    qty=item.qty,  # Quantity sold
-                    fetch_exploded=1,  # Get sub-assembly items too
-                    fetch_scrap_items=0
-                )
-                
-                if bom_items:
-                    create_manufacturing_stock_entry(doc, item, bom_items, warehouse)
+            bom_items = get_item_ingredients(item.item_code, doc.company, item.qty)
+            if bom_items:
+                lines.append((item, bom_items))
+
+        if lines:
+            create_manufacturing_stock_entry(doc, lines, warehouse)
             
     except Exception as e:
         frappe.log_error(f"Error in deduct_ingredients_from_stock for POS Invoice {doc.name}: {str(e)}", "Stock Deduction Error")
@@ -279,12 +276,25 @@ def get_default_warehouse(doc):
     return warehouse
 
 
-def create_manufacturing_stock_entry(pos_invoice, menu_item, bom_items, warehouse):
+def create_manufacturing_stock_entry(pos_invoice, lines, warehouse):
     """
-    Create Stock Entry (Material Issue) for restaurant orders
+    Create one Stock Entry (Material Issue) for restaurant orders
     Since POS Invoice is in draft state, we use Material Issue instead of Manufacturing
+
+    `lines` is a list of (menu item row, exploded BOM items) pairs. Ingredient
+    quantities are summed across lines, and each line's share is kept in the
+    `custom_ury_consumption` table of the entry.
     """
     try:
+        # Total requirement of each ingredient across all menu items
+        required = {}
+        for menu_item, bom_items in lines:
+            for item_code, bom_item in bom_items.items():
+                if item_code in required:
+                    required[item_code].qty += bom_item.qty
+                else:
+                    required[item_code] = frappe._dict(bom_item)
+
         # Create Stock Entry document
         stock_entry = frappe.new_doc("Stock Entry")
         stock_entry.stock_entry_type = "Material Issue"
@@ -296,13 +306,14 @@ def create_manufacturing_stock_entry(pos_invoice, menu_item, bom_items, warehous
         # Set reference to POS Invoice
         stock_entry.custom_pos_invoice = pos_invoice.name  # Custom field to link back
         
+        # Available stock of all ingredients in one query
+        stock = get_stock_snapshot(required, warehouse)
+        
         # Add raw materials (ingredients) that are being consumed
         # Note: For restaurant orders, we only deduct ingredients, not produce finished items
-        for item_code, bom_item in bom_items.items():
+        for item_code, bom_item in required.items():
             # Check available stock
-            available_qty = frappe.db.get_value("Bin", 
-                {"item_code": item_code, "warehouse": warehouse}, 
-                "actual_qty") or 0
+            available_qty = get_actual_qty(stock, item_code)
             
             required_qty = bom_item.qty
             
@@ -327,6 +338,22 @@ def create_manufacturing_stock_entry(pos_invoice, menu_item, bom_items, warehous
         
         # Only create if we have raw materials to consume
         if stock_entry.items:
+            issued = {item.item_code for item in stock_entry.items}
+            for menu_item, bom_items in lines:
+                for item_code, bom_item in bom_items.items():
+                    if item_code in issued:
+                        stock_entry.append("custom_ury_consumption", {
+                            "pos_invoice": pos_invoice.name,
+                            "pos_invoice_item": menu_item.get("name"),
+                            "menu_item": menu_item.item_code,
+                            "menu_item_name": menu_item.item_name,
+                            "menu_qty": menu_item.qty,
+                            "item_code": item_code,
+                            "item_name": bom_item.item_name,
+                            "qty": bom_item.qty,
+                            "uom": bom_item.uom
+                        })
+
             # Calculate total food cost
             total_food_cost = sum(item.qty * (item.basic_rate or 0) for item in stock_entry.items)
             
@@ -334,14 +361,15 @@ def create_manufacturing_stock_entry(pos_invoice, menu_item, bom_items, warehous
             stock_entry.submit()
             
             # Add comment to POS Invoice
+            menu_items = ", ".join(f"{menu_item.item_name} (Qty: {menu_item.qty})" for menu_item, _ in lines)
             pos_invoice.add_comment("Comment", 
-                f"Ingredient Stock Entry {stock_entry.name} created for {menu_item.item_name} "
-                f"(Qty: {menu_item.qty}). Food Cost: {total_food_cost:.2f}")
+                f"Ingredient Stock Entry {stock_entry.name} created for {menu_items}. "
+                f"Food Cost: {total_food_cost:.2f}")
             
             return stock_entry.name
             
     except Exception as e:
-        frappe.log_error(f"Error creating Manufacturing Stock Entry for POS Invoice {pos_invoice.name}, Item {menu_item.item_code}: {str(e)}", "Manufacturing Stock Entry Error")
+        frappe.log_error(f"Error creating Manufacturing Stock Entry for POS Invoice {pos_invoice.name}: {str(e)}", "Manufacturing Stock Entry Error")
         return None
 
 def restore_ingredients_to_stock(doc, method):
@@ -358,14 +386,20 @@ def restore_ingredients_to_stock(doc, method):
         # Restore for both cancellation and deletion
         # method == "on_trash" means deletion, doc.docstatus == 2 means cancellation
         
-        # Find all Stock Entries linked to this POS Invoice
+        # Net out lines journaled for deferred posting
+        ury_consumption_journal.reverse_invoice(doc)
+        
+        # Find all Stock Entries linked to this POS Invoice; returns posted by
+        # adjustments and splits are cancelled too, after the issues, so the
+        # order nets to nothing
         stock_entries = frappe.db.get_all("Stock Entry", 
             filters={
                 "custom_pos_invoice": doc.name,
                 "docstatus": 1,  # Submitted
-                "stock_entry_type": "Material Issue"
+                "stock_entry_type": ("in", ["Material Issue", "Material Receipt"])
             },
-            fields=["name"]
+            fields=["name"],
+            order_by="stock_entry_type asc, creation asc"
         )
         
         # Cancel all related Stock Entries
@@ -396,119 +430,191 @@ def on_update_after_submit(doc, method):
         if not enable_inventory_deduction:
             return
         
-        # Get original document from database
-        original_doc = frappe.get_doc("POS Invoice", doc.name)
-        
-        # Compare items and handle differences
-        handle_inventory_adjustments(original_doc, doc)
+        # Compare items with what was consumed so far and handle differences
+        handle_inventory_adjustments(doc)
         
     except Exception as e:
         frappe.log_error(f"Error in on_update_after_submit for POS Invoice {doc.name}: {str(e)}", "Inventory Adjustment Error")
 
 
-def handle_inventory_adjustments(original_doc, updated_doc):
+def get_consumption_ledger(pos_invoice):
+    """
+    Ingredients consumed so far by each line of a POS Invoice, from the
+    consumption table of its submitted Stock Entries
+    Returns {(invoice item row, ingredient): row} with the net qty
+    """
+    ledger = frappe.db.sql("""
+        SELECT c.pos_invoice_item, c.item_code, c.item_name, c.uom,
+            c.menu_item, c.menu_item_name, SUM(c.qty) AS qty
+        FROM `tabURY Ingredient Consumption` c
+        INNER JOIN `tabStock Entry` se ON se.name = c.parent
+        WHERE c.parenttype = 'Stock Entry' AND c.pos_invoice = %s AND se.docstatus = 1
+        GROUP BY c.pos_invoice_item, c.item_code, c.item_name, c.uom, c.menu_item, c.menu_item_name
+    """, pos_invoice, as_dict=True)
+    return {(row.pos_invoice_item, row.item_code): row for row in ledger}
+
+
+def handle_inventory_adjustments(doc):
     """
     Handle inventory adjustments when order items change
+    Each line's ingredient requirement is compared with the ledger in memory
+    and only the difference is posted, netted per ingredient
     """
     try:
-        # Create dictionaries for easy comparison
-        original_items = {item.item_code: item.qty for item in original_doc.items}
-        updated_items = {item.item_code: item.qty for item in updated_doc.items}
-        
-        warehouse = get_default_warehouse(updated_doc)
+        warehouse = get_default_warehouse(doc)
         if not warehouse:
             return
         
-        from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+        # Journal the quantity changes for deferred posting
+        if ury_consumption_journal.is_deferred(doc.pos_profile):
+            ury_consumption_journal.record_invoice_changes(doc, warehouse)
+            return
+        
+        # Orders that were never deducted (or split off another order) have no ledger
+        ledger = get_consumption_ledger(doc.name)
+        if not ledger:
+            return
+        
+        # Current requirement of each line
+        lines = {}
+        required = {}
+        for item in doc.items:
+            lines[item.name] = item
+            for item_code, bom_item in (get_item_ingredients(item.item_code, doc.company, item.qty) or {}).items():
+                required[(item.name, item_code)] = bom_item
         
-        # Handle removed items (restore stock)
-        for item_code, original_qty in original_items.items():
-            if item_code not in updated_items:
-                # Item completely removed - restore full quantity
-                restore_item_ingredients(updated_doc, item_code, original_qty, warehouse)
+        # Difference per (line, ingredient); rows of removed lines are returned in full
+        attribution = []
+        delta = {}
+        for key in set(required) | set(ledger):
+            row_name, item_code = key
+            consumed = ledger.get(key)
+            qty = flt((required[key].qty if key in required else 0) - (consumed.qty if consumed else 0), 9)
+            if not qty:
+                continue
+            
+            item = lines.get(row_name)
+            ingredient = required.get(key) or frappe._dict(
+                item_name=consumed.item_name,
+                uom=consumed.uom,
+                rate=(get_item_ingredients(consumed.menu_item, doc.company, 1) or {}).get(item_code, {}).get("rate"),
+            )
+            line = frappe._dict(
+                pos_invoice=doc.name,
+                pos_invoice_item=row_name,
+                menu_item=item.item_code if item else consumed.menu_item,
+                menu_item_name=item.item_name if item else consumed.menu_item_name,
+                qty=item.qty if item else 0,
+            )
+            attribution.append((line, item_code, frappe._dict(ingredient, qty=qty)))
+            if item_code in delta:
+                delta[item_code].qty += qty
+            else:
+                delta[item_code] = frappe._dict(ingredient, qty=qty)
         
-        # Handle added items (deduct stock)
-        for item_code, updated_qty in updated_items.items():
-            if item_code not in original_items:
-                # New item added - deduct full quantity
-                deduct_item_ingredients(updated_doc, item_code, updated_qty, warehouse)
+        # One entry for the net issue and one for the net return, if any
+        issue = ury_consumption_journal.make_consumption_entry(
+            doc.company, warehouse, "Material Issue",
+            {item_code: row for item_code, row in delta.items() if flt(row.qty, 9) > 0},
+            attribution, pos_invoice=doc.name)
+        receipt = ury_consumption_journal.make_consumption_entry(
+            doc.company, warehouse, "Material Receipt",
+            {item_code: frappe._dict(row, qty=-row.qty) for item_code, row in delta.items() if flt(row.qty, 9) < 0},
+            attribution, pos_invoice=doc.name)
         
-        # Handle quantity changes
-        for item_code in set(original_items.keys()) & set(updated_items.keys()):
-            qty_difference = updated_items[item_code] - original_items[item_code]
-            if qty_difference > 0:
-                # Quantity increased - deduct additional ingredients
-                deduct_item_ingredients(updated_doc, item_code, qty_difference, warehouse)
-            elif qty_difference < 0:
-                # Quantity decreased - restore excess ingredients
-                restore_item_ingredients(updated_doc, item_code, abs(qty_difference), warehouse)
+        entries = [name for name in (issue, receipt) if name]
+        if entries:
+            doc.add_comment("Comment", 
+                f"Ingredient adjustment Stock Entry {', '.join(entries)} created for modified items")
         
     except Exception as e:
         frappe.log_error(f"Error handling inventory adjustments: {str(e)}", "Inventory Adjustment Error")
 
 
-def deduct_item_ingredients(pos_invoice, item_code, qty, warehouse):
-    """Helper function to deduct ingredients for a specific item"""
+def transfer_consumption(source, target, moves):
+    """
+    Move the ingredients consumed by split-off lines from one order to another
+    `moves` is a list of (source item row, target item row, qty moved). The
+    source gets a Material Receipt and the target a matching Material Issue,
+    so each order's entries and ledger cover only its own lines; deferred
+    orders journal the same move
+    """
     try:
-        bom = frappe.db.get_value("BOM", 
-            {"item": item_code, "is_active": 1, "is_default": 1, "docstatus": 1}, 
-            "name")
-        
-        if bom:
-            from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
-            bom_items = get_bom_items_as_dict(bom=bom, company=pos_invoice.company, qty=qty, fetch_exploded=1)
-            
-            if bom_items:
-                # Create a mock item object for the function
-                mock_item = frappe._dict({
-                    "item_code": item_code,
-                    "item_name": frappe.db.get_value("Item", item_code, "item_name"),
-                    "qty": qty,
-                    "uom": "Nos",
-                    "rate": 0
-                })
-                create_manufacturing_stock_entry(pos_invoice, mock_item, bom_items, warehouse)
-                
-    except Exception as e:
-        frappe.log_error(f"Error deducting ingredients for {item_code}: {str(e)}", "Ingredient Deduction Error")
+        if not frappe.db.get_value("POS Profile", source.pos_profile, "custom_enable_inventory_deduction"):
+            return
 
+        warehouse = get_default_warehouse(source)
+        if not warehouse:
+            return
+
+        if ury_consumption_journal.is_deferred(source.pos_profile):
+            journaled = set(frappe.get_all(
+                ury_consumption_journal.JOURNAL_DOCTYPE,
+                filters={"pos_invoice": source.name},
+                pluck="pos_invoice_item"))
+            moves = [move for move in moves if move[0].name in journaled]
+            ury_consumption_journal.record_lines(source, warehouse,
+                [(src.item_code, src.item_name, -qty, src.name) for src, tgt, qty in moves])
+            ury_consumption_journal.record_lines(target, warehouse,
+                [(tgt.item_code, tgt.item_name, qty, tgt.name) for src, tgt, qty in moves])
+            return
+
+        # Only what was actually issued for a line can move with it
+        ledger = get_consumption_ledger(source.name)
+        if not ledger:
+            return
+
+        returned = []
+        issued = []
+        required = {}
+        for src, tgt, qty in moves:
+            for item_code, ingredient in (get_item_ingredients(src.item_code, source.company, qty) or {}).items():
+                consumed = ledger.get((src.name, item_code))
+                moved_qty = min(ingredient.qty, consumed.qty if consumed else 0)
+                if flt(moved_qty, 9) <= 0:
+                    continue
+
+                ingredient = frappe._dict(ingredient, qty=moved_qty)
+                returned.append((frappe._dict(
+                    pos_invoice=source.name, pos_invoice_item=src.name, menu_item=src.item_code,
+                    menu_item_name=src.item_name, qty=src.qty,
+                ), item_code, frappe._dict(ingredient, qty=-moved_qty)))
+                issued.append((frappe._dict(
+                    pos_invoice=target.name, pos_invoice_item=tgt.name, menu_item=tgt.item_code,
+                    menu_item_name=tgt.item_name, qty=tgt.qty,
+                ), item_code, ingredient))
+                if item_code in required:
+                    required[item_code].qty += moved_qty
+                else:
+                    required[item_code] = frappe._dict(ingredient)
+
+        receipt = ury_consumption_journal.make_consumption_entry(
+            source.company, warehouse, "Material Receipt", required, returned, pos_invoice=source.name)
+        issue = ury_consumption_journal.make_consumption_entry(
+            target.company, warehouse, "Material Issue", required, issued, pos_invoice=target.name)
+
+        if receipt:
+            source.add_comment("Comment", f"Stock Entry {receipt} returned the ingredients of lines moved to {target.name}")
+        if issue:
+            target.add_comment("Comment", f"Stock Entry {issue} issued the ingredients of lines moved from {source.name}")
 
-def restore_item_ingredients(pos_invoice, item_code, qty, warehouse):
-    """Helper function to restore ingredients for a specific item"""
-    try:
-        bom = frappe.db.get_value("BOM", 
-            {"item": item_code, "is_active": 1, "is_default": 1, "docstatus": 1}, 
-            "name")
-        
-        if bom:
-            from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
-            bom_items = get_bom_items_as_dict(bom=bom, company=pos_invoice.company, qty=qty, fetch_exploded=1)
-            
-            if bom_items:
-                # Create Material Receipt to restore ingredients
-                stock_entry = frappe.new_doc("Stock Entry")
-                stock_entry.stock_entry_type = "Material Receipt"
-                stock_entry.purpose = "Material Receipt"
-                stock_entry.company = pos_invoice.company
-                stock_entry.custom_pos_invoice = pos_invoice.name
-                
-                for item_code_bom, bom_item in bom_items.items():
-                    stock_entry.append("items", {
-                        "item_code": item_code_bom,
-                        "item_name": bom_item.item_name,
-                        "qty": bom_item.qty,
-                        "uom": bom_item.uom,
-                        "t_warehouse": warehouse,
-                        "basic_rate": bom_item.rate or 0,
-                        "allow_zero_valuation_rate": 1
-                    })
-                
-                if stock_entry.items:
-                    stock_entry.insert()
-                    stock_entry.submit()
-                    
-                    pos_invoice.add_comment("Comment", 
-                        f"Ingredient restoration Stock Entry {stock_entry.name} created for {item_code} (Qty: {qty})")
-                
     except Exception as e:
-        frappe.log_error(f"Error restoring ingredients for {item_code}: {str(e)}", "Ingredient Restoration Error")
\ No newline at end of file
+        frappe.log_error(f"Error moving ingredient consumption from {source.name} to {target.name}: {str(e)}", "Inventory Adjustment Error")
+
+
+def move_consumption_lines(source, target, row_map):
+    """
+    Re-home the consumption ledger and journal of a merged order
+    `row_map` maps each source item row name to its new row on the target, so
+    later adjustments of the target match the lines they were consumed for
+    """
+    for doctype in ("URY Ingredient Consumption", ury_consumption_journal.JOURNAL_DOCTYPE):
+        for source_row, target_row in row_map.items():
+            frappe.db.sql(f"""
+                UPDATE `tab{doctype}`
+                SET pos_invoice = %s, pos_invoice_item = %s
+                WHERE pos_invoice = %s AND pos_invoice_item = %s
+            """, (target, target_row, source, source_row))
+
+        # Rows of lines no longer on the source order
+        frappe.db.sql(f"UPDATE `tab{doctype}` SET pos_invoice = %s WHERE pos_invoice = %s", (target, source))
@@ -1,6 +1,7 @@
 import frappe
 from frappe.utils import today
 from frappe.utils import  get_datetime,today,now
+from ury.ury.api.ury_pos_session import get_open_sessions
 
 def validate(doc,method):
     set_cashier_room(doc,method)
@@ -46,15 +47,10 @@ def main_pos_open_check(doc,method):
                 owner = user_details.user
 
         if frappe.session.user != owner:
-            pos_opening_list = frappe.get_all(
-                "POS Opening Entry",
-                fields=["name", "docstatus", "status", "posting_date"],
-                filters={"branch": doc.branch,"user":owner,"posting_date":current_date},
+            main_sessions = get_open_sessions(
+                doc.branch, cashier=owner, posting_date=current_date
             )
-            flag = 1
-            for pos_opening in pos_opening_list:
-                if pos_opening.status == "Open" and pos_opening.docstatus == 1:
-                    flag = 0
+            flag = 0 if main_sessions else 1
             if flag == 1:
                 frappe.throw(("Main Cashier POS must be open"), title=("Main Cashier POS Required"))
                 
@@ -10,20 +10,74 @@ frappe.pages['websocket-print'].on_page_load = function (wrapper) {
 			const branch = r.message;
 			const print_channel = `print_${branch}`;
 			frappe.realtime.on(print_channel, (data) => {
-				if (!(data.data.name in localStorage)) {
-					get_print_html(set_preview, wrapper, data.data.doctype, data.data.name, data.data.print_format)
-					localStorage.setItem(data.data.name, '')
-				}
+				print_job(wrapper, data.data)
 			})
+			// Jobs published while this page was closed or disconnected stay pending on the server
+			frappe.realtime.socket.on('connect', () => fetch_pending_jobs(wrapper))
+			fetch_pending_jobs(wrapper)
 		}
 	})
 
 }
 
+let fetch_pending_jobs = function (wrapper) {
+	frappe.call({
+		method: 'ury.ury.api.ury_print.get_pending_print_jobs',
+		callback: function (r) {
+			(r.message || []).forEach(job => print_job(wrapper, job))
+		}
+	})
+}
+
+// Jobs are tracked in localStorage as "printing" while the bill is fetched and
+// "printed" until the server acknowledges them, so a redelivered job is never
+// printed twice and a printed one is acknowledged again instead of skipped
+const PRINTING_TIMEOUT = 60 * 1000
+const ACK_RETRY_DELAYS = [2000, 5000, 15000]
+
+let get_job_state = function (job_id) {
+	try {
+		return JSON.parse(localStorage.getItem(job_id))
+	} catch (e) {
+		return null
+	}
+}
+
+let set_job_state = function (job_id, state) {
+	localStorage.setItem(job_id, JSON.stringify({ state: state, at: Date.now() }))
+}
+
+let print_job = function (wrapper, job) {
+	const job_state = get_job_state(job.job_id)
+	if (job_state && job_state.state === 'printed') {
+		ack_print_job(job.job_id)
+	} else if (!job_state || Date.now() - job_state.at > PRINTING_TIMEOUT) {
+		// Nothing recorded, or a print that never finished (page closed mid-fetch)
+		set_job_state(job.job_id, 'printing')
+		get_print_html(set_preview, wrapper, job.doctype, job.name, job.print_format, job.job_id)
+	}
+}
+
+let ack_print_job = function (job_id, attempt = 0) {
+	frappe.call({
+		method: 'ury.ury.api.ury_print.ack_print_job',
+		args: { job_id: job_id },
+		callback: function () {
+			localStorage.removeItem(job_id)
+		},
+		error: function () {
+			// Stays "printed", so the next redelivery acknowledges it if retries run out
+			if (attempt < ACK_RETRY_DELAYS.length) {
+				setTimeout(() => ack_print_job(job_id, attempt + 1), ACK_RETRY_DELAYS[attempt])
+			}
+		}
+	})
+}
+
 frappe.pages['websocket-print'].refresh = function (wrapper) {
 }
 
-let get_print_html = function (set_preview, wrapper, doc, name, print_format) {
+let get_print_html = function (set_preview, wrapper, doc, name, print_format, job_id) {
 	this._req = frappe.call({
 		method: "frappe.www.printview.get_html_and_style",
 		args: {
@@ -34,6 +88,12 @@ let get_print_html = function (set_preview, wrapper, doc, name, print_format) {
 		},
 		callback: function (r) {
 			set_preview(r, wrapper);
+			set_job_state(job_id, 'printed');
+			ack_print_job(job_id);
+		},
+		error: function () {
+			// Allow the job to be picked up again on the next redelivery
+			localStorage.removeItem(job_id);
 		},
 	});
 };
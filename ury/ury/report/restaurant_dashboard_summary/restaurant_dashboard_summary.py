@@ -123,9 +123,11 @@ def get_data(filters):
     inventory_data = frappe.db.sql("""
         SELECT 
             SUM(b.stock_value) as total_inventory_value,
-            COUNT(CASE WHEN b.actual_qty <= COALESCE(i.safety_stock, 10) THEN 1 END) as low_stock_items
+            COUNT(CASE WHEN b.actual_qty <= COALESCE(f.reorder_point, i.safety_stock, 10) THEN 1 END) as low_stock_items
         FROM `tabBin` b
         INNER JOIN `tabItem` i ON b.item_code = i.item_code
+        LEFT JOIN `tabURY Ingredient Forecast` f
+            ON f.item_code = b.item_code AND f.warehouse = b.warehouse
         WHERE i.is_stock_item = 1
         AND b.actual_qty >= 0
     """, as_dict=True)[0]
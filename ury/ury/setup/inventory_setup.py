@@ -12,11 +12,15 @@ def setup_inventory_management():
     try:
         # 1. Create custom field in POS Profile to enable/disable inventory deduction
         create_pos_profile_inventory_field()
+        create_pos_profile_deferred_posting_field()
         
         # 2. Create custom field in Stock Entry to link back to POS Invoice
         create_stock_entry_pos_link_field()
         
-        # 3. Setup default item groups if needed
+        # 3. Create child table in Stock Entry for per-line ingredient attribution
+        create_stock_entry_consumption_field()
+        
+        # 4. Setup default item groups if needed
         setup_default_item_groups()
         
         frappe.db.commit()
@@ -44,6 +48,24 @@ def create_pos_profile_inventory_field():
         print("✅ Created POS Profile inventory deduction field")
 
 
+def create_pos_profile_deferred_posting_field():
+    """Create custom field in POS Profile to post ingredient consumption in batches"""
+    if not frappe.db.exists("Custom Field", "POS Profile-custom_defer_inventory_posting"):
+        custom_field = frappe.get_doc({
+            "doctype": "Custom Field",
+            "dt": "POS Profile",
+            "fieldname": "custom_defer_inventory_posting",
+            "label": "Defer Inventory Posting",
+            "fieldtype": "Check",
+            "insert_after": "custom_enable_inventory_deduction",
+            "depends_on": "custom_enable_inventory_deduction",
+            "description": "Record ingredient consumption when orders are taken and post it as one Stock Entry per warehouse every few minutes and at shift close",
+            "default": "0"
+        })
+        custom_field.insert()
+        print("✅ Created POS Profile deferred inventory posting field")
+
+
 def create_stock_entry_pos_link_field():
     """Create custom field in Stock Entry to link back to POS Invoice"""
     if not frappe.db.exists("Custom Field", "Stock Entry-custom_pos_invoice"):
@@ -62,6 +84,24 @@ def create_stock_entry_pos_link_field():
         print("✅ Created Stock Entry POS Invoice link field")
 
 
+def create_stock_entry_consumption_field():
+    """Create child table in Stock Entry recording which invoice line consumed each ingredient"""
+    if not frappe.db.exists("Custom Field", "Stock Entry-custom_ury_consumption"):
+        custom_field = frappe.get_doc({
+            "doctype": "Custom Field",
+            "dt": "Stock Entry",
+            "fieldname": "custom_ury_consumption",
+            "label": "Ingredient Consumption",
+            "fieldtype": "Table",
+            "options": "URY Ingredient Consumption",
+            "insert_after": "custom_pos_invoice",
+            "description": "Menu item lines of the POS Invoice that consumed these ingredients",
+            "read_only": 1
+        })
+        custom_field.insert()
+        print("✅ Created Stock Entry ingredient consumption table")
+
+
 def setup_default_item_groups():
     """Setup default item groups for restaurant"""
     item_groups = [
@@ -1,3 +1,5 @@
+import hashlib
+
 import frappe
 from frappe import _
 from datetime import date, datetime, timedelta
@@ -6,28 +8,24 @@ from datetime import date, datetime, timedelta
 
 @frappe.whitelist()
 def getTable(room):
+    from ury.ury.api.ury_table_occupancy import get_room_tables
+
     branch_name = getBranch()   
-    tables = frappe.get_all(
-        "URY Table",
-        fields=["name", "occupied", "latest_invoice_time", "is_take_away", "restaurant_room","table_shape","no_of_seats"],
-        filters={"branch": branch_name,"restaurant_room":room,}
-    )    
-    return tables
+    return [table for table in get_room_tables(room) if table["branch"] == branch_name]
 
 
 @frappe.whitelist()
 def getRestaurantMenu(pos_profile, room=None, order_type=None):
-    menu_items = []
-    menu_items_with_image = []
+    pos_profile = frappe.get_doc("POS Profile", pos_profile)
+    return build_restaurant_menu(pos_profile, getBranch(), room, order_type)
 
-    user_role = frappe.get_roles()
 
-    pos_profile = frappe.get_doc("POS Profile", pos_profile)
+def build_restaurant_menu(pos_profile, branch_name, room=None, order_type=None):
+    user_role = frappe.get_roles()
 
     cashier = any(
         role.role in user_role for role in pos_profile.role_allowed_for_billing
     )
-    branch_name = getBranch()
     restaurant = frappe.db.get_value("URY Restaurant", {"branch": branch_name}, "name")
     
     if room:
@@ -80,6 +78,15 @@ def getRestaurantMenu(pos_profile, room=None, order_type=None):
         order_by="item_name asc"
     )
     
+    item_images = dict(
+        frappe.get_all(
+            "Item",
+            filters={"name": ("in", [item.item for item in menu_items])},
+            fields=["name", "image"],
+            as_list=True,
+        )
+    ) if menu_items else {}
+
     menu_items_with_image = [
         {
             "item": item.item,
@@ -87,7 +94,7 @@ def getRestaurantMenu(pos_profile, room=None, order_type=None):
             "rate": item.rate,
             "special_dish": item.special_dish,
             "disabled": item.disabled,
-            "item_image": frappe.db.get_value("Item", item.item, "image"),
+            "item_image": item_images.get(item.item),
             "course": item.course,
         }
         for item in menu_items
@@ -172,220 +179,128 @@ def getRoom():
 
 @frappe.whitelist()
 def getModeOfPayment():
-    posDetails = getPosProfile()
-    posProfile = posDetails["pos_profile"]
-    posProfiles = frappe.get_doc("POS Profile", posProfile)
-    mode_of_payments = posProfiles.payments
-    modeOfPayments = []
-    for mop in mode_of_payments:
-        modeOfPayments.append(
-            {"mode_of_payment": mop.mode_of_payment, "opening_amount": float(0)}
-        )
-    return modeOfPayments
+    posProfile = frappe.db.exists("POS Profile", {"branch": getBranch()})
+    return get_mode_of_payments(frappe.get_doc("POS Profile", posProfile))
 
-@frappe.whitelist()
-def getInvoiceForCashier(status, cashier, limit, limit_start):
-    branch = getBranch()
-    updatedlist = []
-    limit = int(limit)+1
-    limit_start = int(limit_start)
-    if status == "Draft":
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number, 
-                posting_date, rounded_total, order_type 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s AND cashier = %s
-            AND (invoice_printed = 1 OR (invoice_printed = 0 AND COALESCE(restaurant_table, '') = ''))
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, status, cashier, limit,limit_start),
-            as_dict=True,
-        )
-        updatedlist.extend(invoices)
-    elif status == "Unbilled":
-        
-        docstatus = "Draft"
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number, 
-                posting_date, rounded_total, order_type 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s AND cashier = %s
-            AND (invoice_printed = 0 AND restaurant_table IS NOT NULL)
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, docstatus, cashier, limit, limit_start),
-            as_dict=True,
-        )
-        updatedlist.extend(invoices)
-    elif status == "Recently Paid":
-        docstatus = "Paid"
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number,
-                posting_date, rounded_total, order_type,additional_discount_percentage,discount_amount 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s AND cashier = %s
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, docstatus, cashier, limit, limit_start),
-            as_dict=True,
-        )
-        updatedlist.extend(invoices)    
-    else:
-        
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number,
-                posting_date, rounded_total, order_type,additional_discount_percentage,discount_amount
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s AND cashier = %s
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, status, cashier, limit, limit_start),
-            as_dict=True,
-        )
 
-        updatedlist.extend(invoices)
-    if len(updatedlist) == limit and status != "Recently Paid":
-            next = True
-            updatedlist.pop()
-    else:
-            next = False   
-    return  { "data":updatedlist,"next":next}
+def get_mode_of_payments(pos_profile):
+    return [
+        {"mode_of_payment": mop.mode_of_payment, "opening_amount": float(0)}
+        for mop in pos_profile.payments
+    ]
 
+INVOICE_LIST_FIELDS = [
+    "name", "invoice_printed", "grand_total", "restaurant_table",
+    "cashier", "waiter", "net_total", "posting_time",
+    "total_taxes_and_charges", "customer", "status", "mobile_number",
+    "posting_date", "rounded_total", "order_type", "modified",
+]
+PAID_INVOICE_LIST_FIELDS = INVOICE_LIST_FIELDS + [
+    "additional_discount_percentage", "discount_amount",
+]
 
 
 @frappe.whitelist()
-def getPosInvoice(status, limit, limit_start):
-    branch = getBranch()
-    updatedlist = []
-    limit = int(limit)+1
-    limit_start = int(limit_start)
+def getInvoiceForCashier(status, cashier, limit, limit_start=0, cursor=None):
+    return get_invoice_list(
+        status, limit, limit_start=limit_start, cursor=cursor, cashier=cashier
+    )
+
+
+@frappe.whitelist()
+def getPosInvoice(status, limit, limit_start=0, cursor=None):
+    return get_invoice_list(status, limit, limit_start=limit_start, cursor=cursor)
+
+
+def get_invoice_list(status, limit, limit_start=0, cursor=None, cashier=None):
+    """Page through a branch's invoices ordered by (modified, name).
+
+    Passing the `cursor` returned by the previous page seeks directly past the
+    last row through the (branch, status[, cashier], modified) indexes, so deep
+    pages cost the same as the first one. `limit_start` is kept for older clients.
+    """
+    values = {"branch": getBranch(), "limit": int(limit) + 1}
+    conditions = ["branch = %(branch)s", "status = %(status)s"]
+    fields = INVOICE_LIST_FIELDS
+
     if status == "Draft":
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number, 
-                posting_date, rounded_total, order_type 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s 
-            AND (invoice_printed = 1 OR (invoice_printed = 0 AND COALESCE(restaurant_table, '') = ''))
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, status, limit,limit_start),
-            as_dict=True,
+        values["status"] = "Draft"
+        conditions.append(
+            "(invoice_printed = 1 OR (invoice_printed = 0 AND COALESCE(restaurant_table, '') = ''))"
         )
-        updatedlist.extend(invoices)
     elif status == "Unbilled":
-        
-        docstatus = "Draft"
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number, 
-                posting_date, rounded_total, order_type 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s 
-            AND (invoice_printed = 0 AND restaurant_table IS NOT NULL)
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, docstatus, limit, limit_start),
-            as_dict=True,
-        )
-        updatedlist.extend(invoices)
+        values["status"] = "Draft"
+        conditions.append("(invoice_printed = 0 AND restaurant_table IS NOT NULL)")
     elif status == "Recently Paid":
-        docstatus = "Paid"
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number,
-                posting_date, rounded_total, order_type,additional_discount_percentage,discount_amount 
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s 
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, docstatus, limit, limit_start),
-            as_dict=True,
-        )
-        updatedlist.extend(invoices)    
+        values["status"] = "Paid"
+        fields = PAID_INVOICE_LIST_FIELDS
     else:
-        
-        invoices = frappe.db.sql(
-            """
-            SELECT 
-                name, invoice_printed, grand_total, restaurant_table, 
-                cashier, waiter, net_total, posting_time, 
-                total_taxes_and_charges, customer, status, mobile_number,
-                posting_date, rounded_total, order_type,additional_discount_percentage,discount_amount
-            FROM `tabPOS Invoice` 
-            WHERE branch = %s AND status = %s 
-            ORDER BY modified desc
-            LIMIT %s OFFSET %s
-            """,
-            (branch, status, limit, limit_start),
-            as_dict=True,
+        values["status"] = status
+        fields = PAID_INVOICE_LIST_FIELDS
+
+    if cashier:
+        values["cashier"] = cashier
+        conditions.append("cashier = %(cashier)s")
+
+    cursor = frappe.parse_json(cursor) if cursor else None
+    if cursor:
+        values["cursor_modified"], values["cursor_name"] = cursor
+        conditions.append(
+            "(modified < %(cursor_modified)s OR (modified = %(cursor_modified)s AND name < %(cursor_name)s))"
         )
-
-        updatedlist.extend(invoices)
-    if len(updatedlist) == limit and status != "Recently Paid":
-            next = True
-            updatedlist.pop()
+        offset = ""
     else:
-            next = False   
-    return  { "data":updatedlist,"next":next}
+        values["offset"] = int(limit_start or 0)
+        offset = "OFFSET %(offset)s"
+
+    invoices = frappe.db.sql(
+        """
+        SELECT {fields}
+        FROM `tabPOS Invoice`
+        WHERE {conditions}
+        ORDER BY modified DESC, name DESC
+        LIMIT %(limit)s {offset}
+        """.format(
+            fields=", ".join(fields), conditions=" AND ".join(conditions), offset=offset
+        ),
+        values,
+        as_dict=True,
+    )
+
+    next = len(invoices) == values["limit"] and status != "Recently Paid"
+    if next:
+        invoices.pop()
+
+    next_cursor = None
+    if next:
+        next_cursor = [str(invoices[-1].modified), invoices[-1].name]
+
+    return {"data": invoices, "next": next, "cursor": next_cursor}
 
 
 @frappe.whitelist()
 def searchPosInvoice(query,status):
+    from ury.ury.api.ury_search_index import search_invoices
+
     if not query:
         return {"data": [], "next": False}
-    query = query.lower()
-    filters = {"status": "Paid" if status == "Recently Paid" else status}
-    
+
+    conditions = ["inv.status = %(status)s"]
+    values = {"status": "Paid" if status == "Recently Paid" else status}
+
     # Add additional conditions for Unbilled status
     if status == "Unbilled":
-        filters.update({
-            "status":"draft",
-            "restaurant_table": ["not in", [None, ""]],  # Check if restaurant_table has value
-            "invoice_printed": 0  # Check if invoice_printed is 0
-        })
-    pos_invoices = frappe.get_all(
-        "POS Invoice",
-        filters=filters,           
-        or_filters=[
-            ["name", "like", f"%{query}%"],
-            ["customer", "like", f"%{query}%"],
-            ["mobile_number", "like", f"%{query}%"],
-        ],
-        fields=["name", "customer", "grand_total", "posting_date", "posting_time", "order_type", "restaurant_table","status","grand_total","rounded_total","net_total","mobile_number"],
-        limit_page_length=10 
+        values["status"] = "Draft"
+        conditions.append("COALESCE(inv.restaurant_table, '') != ''")
+        conditions.append("inv.invoice_printed = 0")
+
+    pos_invoices = search_invoices(
+        query,
+        ["name", "customer", "grand_total", "posting_date", "posting_time", "order_type", "restaurant_table","status","rounded_total","net_total","mobile_number"],
+        branch=getBranch(),
+        conditions=conditions,
+        values=values,
+        limit=10,
     )
     
     return {"data": pos_invoices, "next": len(pos_invoices) == 10}
@@ -401,62 +316,45 @@ def get_select_field_options():
 
 
 @frappe.whitelist()
-def fav_items(customer):
-    pos_invoices = frappe.get_all(
-        "POS Invoice", filters={"customer": customer}, fields=["name"]
-    )
-    item_qty = {}
-
-    for invoice in pos_invoices:
-        pos_invoice = frappe.get_doc("POS Invoice", invoice.name)
-        for item in pos_invoice.items:
-            item_name = item.item_name
-            qty = item.qty
-            if item_name not in item_qty:
-                item_qty[item_name] = 0
-            item_qty[item_name] += qty
+def fav_items(customer, limit=20):
+    from ury.ury.api.ury_customer_item_stats import get_top_items
 
     favorite_items = [
-        {"item_name": item_name, "qty": qty} for item_name, qty in item_qty.items()
+        {"item_name": item.item_name, "qty": item.qty}
+        for item in get_top_items(customer, limit)
     ]
     return favorite_items
 
 @frappe.whitelist()
-def getCashier(room):
-    branch = getBranch()
-    cashier = None
-    pos_opening_list = frappe.db.sql("""
-        SELECT DISTINCT `tabPOS Opening Entry`.name 
-        FROM `tabPOS Opening Entry`
-        INNER JOIN `tabMultiple Rooms` 
-        ON `tabMultiple Rooms`.parent = `tabPOS Opening Entry`.name
-        WHERE `tabPOS Opening Entry`.branch = %s
-        AND `tabPOS Opening Entry`.status = 'Open'
-        AND `tabPOS Opening Entry`.docstatus = 1
-        AND `tabMultiple Rooms`.room = %s
-    """, (branch, room), as_dict=True)
-    if pos_opening_list:
-        cashier = frappe.db.get_value(
-            "POS Opening Entry",
-            {"name": pos_opening_list[0].name},
-            "user",)
-    return cashier       
+def getCashier(room, branch=None):
+    from ury.ury.api.ury_pos_session import get_room_session
+
+    session = get_room_session(branch or getBranch(), room)
+    return session["cashier"] if session else None
     
 
 @frappe.whitelist()
 def getPosProfile():
     branchName = getBranch()
+    posProfile = frappe.db.exists("POS Profile", {"branch": branchName})
+    pos_profiles = frappe.get_doc("POS Profile", posProfile)
+    return get_pos_profile_details(pos_profiles, branchName)
+
+
+def get_pos_profile_details(pos_profiles, branchName, room=None):
+    """Session details of an already loaded POS Profile doc.
+
+    `room` is the user's room when the caller has already looked it up.
+    """
     waiter = frappe.session.user
     bill_present = False
     qz_host = None
     printer = None
     cashier = None
     owner = None
-    posProfile = frappe.db.exists("POS Profile", {"branch": branchName})
-    pos_profiles = frappe.get_doc("POS Profile", posProfile)
-    global_defaults = frappe.get_single('Global Defaults')
-    disable_rounded_total = global_defaults.disable_rounded_total
-    
+    disable_rounded_total = frappe.db.get_single_value(
+        "Global Defaults", "disable_rounded_total"
+    )
 
     if pos_profiles.branch == branchName:
         pos_profile_name = pos_profiles.name
@@ -464,7 +362,6 @@ def getPosProfile():
         branch = pos_profiles.branch
         company = pos_profiles.company
         tableAttention = pos_profiles.table_attention_time
-        get_cashier = frappe.get_doc("POS Profile", pos_profile_name)
         print_format = pos_profiles.print_format
         paid_limit=pos_profiles.paid_limit
         enable_discount = pos_profiles.custom_enable_discount
@@ -472,28 +369,11 @@ def getPosProfile():
         edit_order_type = pos_profiles.custom_edit_order_type
         enable_kot_reprint = pos_profiles.custom_enable_kot_reprint
         if multiple_cashier:
-            details = getBranchRoom()
-            room = details[0].get('name') 
-            branch = details[0].get('branch')
-
-            pos_opening_list = frappe.db.sql("""
-                SELECT DISTINCT `tabPOS Opening Entry`.name 
-                FROM `tabPOS Opening Entry`
-                INNER JOIN `tabMultiple Rooms` 
-                ON `tabMultiple Rooms`.parent = `tabPOS Opening Entry`.name
-                WHERE `tabPOS Opening Entry`.branch = %s
-                AND `tabPOS Opening Entry`.status = 'Open'
-                AND `tabPOS Opening Entry`.docstatus = 1
-                AND `tabMultiple Rooms`.room = %s
-            """, (branch, room), as_dict=True)
-            if pos_opening_list:
-                pos_opened_cashier = frappe.db.get_value(
-                    "POS Opening Entry",
-                    {"name": pos_opening_list[0].name},
-                    "user",)
-            else:
-                pos_opened_cashier = None
-            for user_details in get_cashier.applicable_for_users:
+            if not room:
+                room = getBranchRoom()[0].get('name')
+
+            pos_opened_cashier = getCashier(room, branch)
+            for user_details in pos_profiles.applicable_for_users:
                 if user_details.custom_main_cashier:
                     owner = user_details.user
                 
@@ -503,8 +383,8 @@ def getPosProfile():
                     cashier = pos_opened_cashier    
                 
         else:    
-            cashier = get_cashier.applicable_for_users[0].user
-            owner = get_cashier.applicable_for_users[0].user
+            cashier = pos_profiles.applicable_for_users[0].user
+            owner = pos_profiles.applicable_for_users[0].user
         
         qz_print = pos_profiles.qz_print
         print_type = None
@@ -583,21 +463,19 @@ def getPosInvoiceItems(invoice):
 
 @frappe.whitelist()
 def posOpening():
-    branchName = getBranch()
-    pos_opening_list = frappe.get_all(
-        "POS Opening Entry",
-        fields=["name", "docstatus", "status", "posting_date"],
-        filters={"branch": branchName},
-    )
-    flag = 1
-    for pos_opening in pos_opening_list:
-        if pos_opening.status == "Open" and pos_opening.docstatus == 1:
-            flag = 0
+    flag = get_pos_opening_flag(getBranch())
     if flag == 1:
         frappe.msgprint(title="Message", indicator="red", msg=("Please Open POS Entry"))
     return flag
 
 
+def get_pos_opening_flag(branch):
+    """0 when the branch has a submitted, open POS Opening Entry, else 1."""
+    from ury.ury.api.ury_pos_session import get_open_sessions
+
+    return 0 if get_open_sessions(branch) else 1
+
+
 @frappe.whitelist()
 def getAggregator():
     branchName = getBranch()
@@ -654,7 +532,11 @@ def getAggregatorMOP(aggregator):
 
 @frappe.whitelist()
 def validate_pos_close(pos_profile): 
-    enable_unclosed_pos_check = frappe.db.get_value("POS Profile",pos_profile,"custom_daily_pos_close")
+    from ury.ury.api.ury_pos_session import get_open_sessions
+
+    enable_unclosed_pos_check, branch = frappe.db.get_value(
+        "POS Profile", pos_profile, ["custom_daily_pos_close", "branch"]
+    )
     
     if enable_unclosed_pos_check:
         current_datetime = frappe.utils.now_datetime()
@@ -666,14 +548,8 @@ def validate_pos_close(pos_profile):
         else:
             previous_day = start_of_day
     
-        unclosed_pos_opening = frappe.db.exists(
-            "POS Opening Entry",
-            {
-                "posting_date": previous_day.date(),
-                "status": "Open",
-                "pos_profile": pos_profile,
-                "docstatus": 1
-            }
+        unclosed_pos_opening = get_open_sessions(
+            branch, pos_profile=pos_profile, posting_date=previous_day.date()
         )
     
         if unclosed_pos_opening:
@@ -683,3 +559,113 @@ def validate_pos_close(pos_profile):
     
     return "Success"
 
+
+@frappe.whitelist()
+def bootstrap_session(room=None, order_type=None):
+    """Everything the POS needs on startup, in one payload.
+
+    Replaces the getPosProfile, getBranch, getRoom, getTable, getModeOfPayment,
+    getAggregator, getCashier, posOpening, validate_pos_close and
+    getRestaurantMenu chain. The POS Profile is loaded once and every part is a
+    fixed number of queries, independent of menu or table count.
+
+    The response carries an `etag`; when the client sends it back as
+    If-None-Match and nothing changed, a 304 without body is returned.
+    """
+    from ury.ury.api.ury_table_occupancy import get_room_tables
+
+    user_rooms = frappe.db.sql(
+        """
+        SELECT b.branch, a.room
+        FROM `tabURY User` AS a
+        INNER JOIN `tabBranch` AS b ON a.parent = b.name
+        WHERE a.user = %s
+        """,
+        frappe.session.user,
+        as_dict=True,
+    )
+    if not user_rooms:
+        frappe.throw(_("User is not Associated with any Branch.Please refresh Page"))
+
+    branch = user_rooms[0].branch
+
+    pos_profile_name = frappe.db.exists("POS Profile", {"branch": branch})
+    if not pos_profile_name:
+        frappe.throw(_("No POS Profile found for Branch {0}").format(branch))
+    pos_profile = frappe.get_doc("POS Profile", pos_profile_name)
+
+    # The rooms the clients offer: the user's own with multiple cashiers,
+    # otherwise every room of the branch
+    if pos_profile.custom_enable_multiple_cashier:
+        rooms = [{"name": row.room, "branch": row.branch} for row in user_rooms if row.room]
+        default_room = rooms[0]["name"] if rooms else None
+    else:
+        rooms = frappe.get_all("URY Room", fields=["name", "branch"], filters={"branch": branch})
+        default_room = frappe.db.get_value("URY Restaurant", {"branch": branch}, "default_room")
+    if room and room not in {row["name"] for row in rooms}:
+        frappe.throw(_("Room {0} is not assigned to you").format(room), frappe.PermissionError)
+    room = room or default_room
+
+    payload = {
+        "pos_profile": get_pos_profile_details(pos_profile, branch, room),
+        "profile": get_pos_profile_settings(pos_profile),
+        "currency_symbol": frappe.db.get_value("Currency", pos_profile.currency, "symbol"),
+        "roles": frappe.get_roles(),
+        "branch": branch,
+        "rooms": rooms,
+        "room": room,
+        "tables": [
+            table for table in get_room_tables(room) if table["branch"] == branch
+        ] if room else [],
+        "mode_of_payments": get_mode_of_payments(pos_profile),
+        "aggregators": frappe.get_all(
+            "Aggregator Settings",
+            fields=["customer"],
+            filters={"parent": branch, "parenttype": "Branch"},
+        ),
+        "room_cashier": getCashier(room, branch) if room else None,
+        "pos_opening": get_pos_opening_flag(branch),
+        "pos_close": validate_pos_close(pos_profile.name),
+        "menu": build_restaurant_menu(pos_profile, branch, room, order_type),
+    }
+
+    etag = '"{}"'.format(hashlib.md5(frappe.as_json(payload).encode()).hexdigest())
+    set_response_etag(etag)
+
+    if etag in get_if_none_match():
+        frappe.local.response["http_status_code"] = 304
+        return
+
+    payload["etag"] = etag
+    return payload
+
+
+POS_PROFILE_SETTINGS_FIELDS = [
+    "name", "company", "customer", "warehouse", "restaurant", "branch", "currency",
+    "paid_limit", "view_all_status", "remove_items", "show_image", "custom_daily_pos_close",
+]
+POS_PROFILE_ROLE_TABLES = [
+    "role_allowed_for_billing", "role_restricted_for_table_order", "transfer_role_permissions",
+]
+
+
+def get_pos_profile_settings(pos_profile):
+    """The POS Profile fields the clients used to read with a full doc load."""
+    settings = {field: pos_profile.get(field) for field in POS_PROFILE_SETTINGS_FIELDS}
+    for table in POS_PROFILE_ROLE_TABLES:
+        settings[table] = [{"role": row.role} for row in pos_profile.get(table) or []]
+    return settings
+
+
+def get_if_none_match():
+    header = frappe.get_request_header("If-None-Match") or ""
+    return [
+        tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()
+    ]
+
+
+def set_response_etag(etag):
+    headers = getattr(frappe.local, "response_headers", None)
+    if headers is not None:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "private, no-cache"
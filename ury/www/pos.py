@@ -1,45 +1,31 @@
-import json
-import re
+import hashlib
 
 import frappe
 import frappe.sessions
 from frappe import _
-from frappe.utils.telemetry import capture
+
+from ury import __version__ as app_version
 
 no_cache = 1
 
-SCRIPT_TAG_PATTERN = re.compile(r"\<script[^<]*\</script\>")
-CLOSING_SCRIPT_TAG_PATTERN = re.compile(r"</script\>")
+BOOT_CACHE_KEY = "ury_pos_boot"
+BOOT_CACHE_EXPIRY = 60 * 60
 
 
 def get_context(context):
+	session_data = frappe.local.session.data
+	has_csrf_token = bool(session_data.csrf_token)
 	csrf_token = frappe.sessions.get_csrf_token()
-	# Manually commit the CSRF token here
-	frappe.db.commit()  # nosemgrep
-
-	if frappe.session.user == "Guest":
-		boot = frappe.website.utils.get_boot_data()
-	else:
-		try:
-			boot = frappe.sessions.get()
-		except Exception as e:
-			raise frappe.SessionBootFailed from e
-
-	# add server_script_enabled in boot
-	if "server_script_enabled" in frappe.conf:
-		enabled = frappe.conf.server_script_enabled
-	else:
-		enabled = True
-	boot["server_script_enabled"] = enabled
-
-	boot_json = frappe.as_json(boot, indent=None, separators=(",", ":"))
-	boot_json = SCRIPT_TAG_PATTERN.sub("", boot_json)
-
-	boot_json = CLOSING_SCRIPT_TAG_PATTERN.sub("", boot_json)
-	boot_json = json.dumps(boot_json)
+	if not has_csrf_token:
+		# A new token is only persisted on a GET request if we commit it here
+		frappe.db.commit()  # nosemgrep
 
 	context.update(
-		{"build_version": frappe.utils.get_build_version(), "boot": boot_json, "csrf_token": csrf_token}
+		{
+			"build_version": frappe.utils.get_build_version(),
+			"boot": get_boot_json(),
+			"csrf_token": csrf_token,
+		}
 	)
 	return context
 
@@ -48,20 +34,86 @@ def get_context(context):
 def get_context_for_dev():
 	if not frappe.conf.developer_mode:
 		frappe.throw(_("This method is only meant for developer mode"))
-	return json.loads(get_boot())
+	return get_boot()
 
 
 def get_boot():
-	try:
-		boot = frappe.sessions.get()
-	except Exception as e:
-		raise frappe.SessionBootFailed from e
+	"""Boot data of the POS app: user, roles, site and URY settings.
+
+	The desk boot (frappe.sessions.get) carries metadata the POS never reads,
+	so this is built separately and cached per user and set of roles. The
+	user's branch and room are read on every load, so reassigning a user
+	takes effect at once.
+	"""
+	user = frappe.session.user
+	roles = sorted(frappe.get_roles(user))
+	if user == "Guest":
+		return build_boot(user, roles)
+
+	key = "{0}::{1}::{2}".format(
+		BOOT_CACHE_KEY, user, hashlib.md5("\n".join(roles).encode()).hexdigest()
+	)
+	boot = frappe.cache().get_value(key)
+	if boot is None:
+		boot = build_boot(user, roles)
+		frappe.cache().set_value(key, boot, expires_in_sec=BOOT_CACHE_EXPIRY)
+
+	ury = get_ury_boot(user)
+	if ury:
+		boot = dict(boot, ury=ury)
+	return boot
+
+
+def build_boot(user, roles):
+	boot = {
+		"user": {"name": user, "roles": roles},
+		"sitename": frappe.local.site,
+		"app_version": app_version,
+		"socketio_port": frappe.conf.socketio_port,
+		"server_script_enabled": frappe.conf.get("server_script_enabled", True),
+		"push_relay_server_url": frappe.conf.get("push_relay_server_url"),
+		"sysdefaults": {
+			field: frappe.db.get_default(field)
+			for field in (
+				"currency",
+				"country",
+				"time_zone",
+				"date_format",
+				"time_format",
+				"number_format",
+				"float_precision",
+				"currency_precision",
+			)
+		},
+		"disable_rounded_total": frappe.db.get_single_value(
+			"Global Defaults", "disable_rounded_total"
+		),
+	}
+	if user == "Guest":
+		return boot
+
+	full_name, language = frappe.db.get_value("User", user, ["full_name", "language"])
+	boot["user"].update({"full_name": full_name, "language": language})
+
+	return boot
+
+
+def get_ury_boot(user):
+	ury_user = frappe.db.get_value(
+		"URY User", {"user": user, "parenttype": "Branch"}, ["parent", "room"], as_dict=True
+	)
+	if not ury_user:
+		return None
 
-	boot["push_relay_server_url"] = frappe.conf.get("push_relay_server_url")
-	boot_json = frappe.as_json(boot, indent=None, separators=(",", ":"))
-	boot_json = SCRIPT_TAG_PATTERN.sub("", boot_json)
+	return {
+		"branch": ury_user.parent,
+		"room": ury_user.room,
+		"pos_profile": frappe.db.get_value("POS Profile", {"branch": ury_user.parent}, "name"),
+		"restaurant": frappe.db.get_value("URY Restaurant", {"branch": ury_user.parent}, "name"),
+	}
 
-	boot_json = CLOSING_SCRIPT_TAG_PATTERN.sub("", boot_json)
-	boot_json = json.dumps(boot_json)
 
-	return boot_json
\ No newline at end of file
+def get_boot_json():
+	boot_json = frappe.as_json(get_boot(), indent=None, separators=(",", ":"))
+	# Emitted as a JS literal inside a <script>; keep it from closing the tag
+	return boot_json.replace("</", "<\\/")
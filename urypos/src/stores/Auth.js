@@ -106,52 +106,38 @@ export const useAuthStore = defineStore("auth", {
         });
     },
     fetchUserRole() {
-      //Fetching role based on logged user
-      this.db
-        .getDoc("User", this.sessionUser)
-        .then((doc) => {
-          this.userRole = doc.roles.map((item) => item.role);
-          const getPosProfile = {
-            doctype: "POS Profile",
-            name: this.invoiceData.posProfile,
-          };
-          this.call
-            .get("frappe.client.get", getPosProfile)
-            .then((result) => {
-              var billingRoles = result.message.role_allowed_for_billing.map(
-                (role) => role.role
-              );
-              this.cashier = billingRoles.some((role) =>
-                this.userRole.includes(role)
-              );
-              if (this.cashier) {
-                this.menu.pickOrderType();
-                // this.menu.fetchItems();
-              }
-              this.isPosOpenChecking();
-              this.isPosCloseCheck();
-              var transferRoles = result.message.transfer_role_permissions.map(
-                (role) => role.role
-              );
-              this.hasAccess = transferRoles.some((role) =>
-                this.userRole.includes(role)
-              );
-              var restrictOrder =
-                result.message.role_restricted_for_table_order.map(
-                  (role) => role.role
-                );
-              this.restrictTableOrder = restrictOrder.some((role) =>
-                this.userRole.includes(role)
-              );
-              this.viewAllStatus = result.message.view_all_status;
-              this.removeTableOrderItem = result.message.remove_items;
-              this.viewItemImage = result.message.show_image;
-            })
-            .catch((error) => console.error(error));
-        })
-        .catch((error) => {
-          console.error(error);
-        });
+      //Roles and POS Profile settings come with the bootstrap session
+      const session = this.invoiceData.bootstrap;
+      if (!session) return;
+      const profile = session.profile;
+      this.userRole = session.roles;
+      var billingRoles = profile.role_allowed_for_billing.map(
+        (role) => role.role
+      );
+      this.cashier = billingRoles.some((role) =>
+        this.userRole.includes(role)
+      );
+      if (this.cashier) {
+        this.menu.pickOrderType();
+        // this.menu.fetchItems();
+      }
+      this.isPosOpenChecking();
+      this.isPosCloseCheck();
+      var transferRoles = profile.transfer_role_permissions.map(
+        (role) => role.role
+      );
+      this.hasAccess = transferRoles.some((role) =>
+        this.userRole.includes(role)
+      );
+      var restrictOrder = profile.role_restricted_for_table_order.map(
+        (role) => role.role
+      );
+      this.restrictTableOrder = restrictOrder.some((role) =>
+        this.userRole.includes(role)
+      );
+      this.viewAllStatus = profile.view_all_status;
+      this.removeTableOrderItem = profile.remove_items;
+      this.viewItemImage = profile.show_image;
     },
     routeToHome() {
       var currentDomain = window.location.protocol + "//" + window.location.hostname;
@@ -183,49 +169,22 @@ export const useAuthStore = defineStore("auth", {
 
           });
       } 
-      else {
-        this.call
-          .get("ury.ury_pos.api.posOpening")
-          .then((result) => {
-            const serverMessages = JSON.parse(result._server_messages);
-            const innerMessageString = serverMessages[0];
-            const innerMessage = JSON.parse(innerMessageString);
-            const message = innerMessage.message;
-            // if (this.cashier) {
-            //   this.alert.createAlert("Message", message, "OK").then(() => {
-            //     router.push("/posOpen");
-            //   });
-            // } else {
-            var currentDomain = window.location.origin;
-            this.alert.createAlert("Message", message, "OK").then(() => {
-              window.location.href = currentDomain + "/app/";
-            });
-            // }
-          })
-          .catch((error) => {
-            // console.error(error)
-          });
+      else if (this.invoiceData.bootstrap.pos_opening === 1) {
+        var currentDomain = window.location.origin;
+        this.alert.createAlert("Message", "Please Open POS Entry", "OK").then(() => {
+          window.location.href = currentDomain + "/app/";
+        });
       }
     },
     isPosCloseCheck() {
-      const getPosProfile = {
-        pos_profile: this.invoiceData.posProfile,
-      };
-      this.call
-        .get("ury.ury_pos.api.validate_pos_close", getPosProfile)
-        .then((result) => {
-          if (result.message === "Failed") {
-            var currentDomain = window.location.origin;
-            this.alert
-              .createAlert("Message", "Please close previous POS Entry", "OK")
-              .then(() => {
-                window.location.href = currentDomain + "/app/";
-              });
-          }
-        })
-        .catch((error) => {
-          console.error(error);
-        });
+      if (this.invoiceData.bootstrap.pos_close === "Failed") {
+        var currentDomain = window.location.origin;
+        this.alert
+          .createAlert("Message", "Please close previous POS Entry", "OK")
+          .then(() => {
+            window.location.href = currentDomain + "/app/";
+          });
+      }
     },
     toggleDropdown() {
       if (this.activeDropdown) {
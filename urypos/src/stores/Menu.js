@@ -7,12 +7,15 @@ import { useAuthStore } from "./Auth.js";
 import frappe from "./frappeSdk.js";
 import { usetoggleRecentOrder } from "./recentOrder.js";
 import { useAlert } from "./Alert.js";
+import { getSocket } from "./realtime.js";
 import router from "../router";
 
 
 export const useMenuStore = defineStore("menu", {
   state: () => ({
     cart: [],
+    upsellSuggestions: [],
+    menuName: null,
     item: [],
     items: [],
     course: [],
@@ -20,6 +23,8 @@ export const useMenuStore = defineStore("menu", {
     defautlMenu: [],
     aggregatorList: [],
     aggregatorItem: [],
+    soldOut: {},
+    availabilityChannel: null,
     quantity: "",
     comments: "",
     searchTerm: "",
@@ -128,34 +133,43 @@ export const useMenuStore = defineStore("menu", {
       }else{
         order_type = null
       }
-      const getMenu = {
-        pos_profile: this.invoiceData.posProfile,
-        order_type:order_type
-      };
-      this.call
-        .get("ury.ury_pos.api.getRestaurantMenu", getMenu)
-        .then((result) => {
-          if (!this.auth.cashier && this.table.tableMenu) {
-            this.items = this.table.tableMenu;
+      const applyItems = () => {
+        this.items.forEach((menuItem) => {
+          if (menuItem.special_dish == 1) {
+            this.showPriority = true;
           } else {
+            this.showAll = true;
+          }
+        });
+        this.fetchAvailability();
+        this.subscribeAvailability(this.invoiceData.branch);
+      };
+      if (!this.auth.cashier && this.table.tableMenu) {
+        // The table's room menu is already loaded
+        this.items = this.table.tableMenu;
+        this.menuName = this.table.menuName;
+        applyItems();
+      } else {
+        const getMenu = {
+          pos_profile: this.invoiceData.posProfile,
+          order_type:order_type
+        };
+        this.call
+          .get("ury.ury_pos.api.getRestaurantMenu", getMenu)
+          .then((result) => {
             this.defautlMenu = result.message.items;
             this.items = this.defautlMenu;
-          }
-          this.items.forEach((menuItem) => {
-            if (menuItem.special_dish == 1) {
-              this.showPriority = true;
-            } else {
-              this.showAll = true;
+            this.menuName = result.message.name;
+            applyItems();
+          })
+          .catch((error) => {
+            if (error._server_messages) {
+              const messages = JSON.parse(error._server_messages);
+              const message = JSON.parse(messages[0]);
+              this.alert.createAlert("Message", message.message, "OK");
             }
           });
-        })
-        .catch((error) => {
-          if (error._server_messages) {
-            const messages = JSON.parse(error._server_messages);
-            const message = JSON.parse(messages[0]);
-            this.alert.createAlert("Message", message.message, "OK");
-          }
-        });
+      }
       this.db
         .getDocList("URY Menu Course", {
           fields: ["name"],
@@ -165,6 +179,34 @@ export const useMenuStore = defineStore("menu", {
           this.course = docs;
         });
     },
+    fetchAvailability() {
+      this.call
+        .get("ury.ury.api.ury_menu_availability.get_menu_availability")
+        .then((result) => {
+          this.setSoldOut(result.message.sold_out, true);
+        })
+        .catch((error) => console.error(error));
+    },
+    async subscribeAvailability(branch) {
+      const channel = `menu_availability_${branch}`;
+      if (!branch || this.availabilityChannel === channel) return;
+      this.availabilityChannel = channel;
+
+      const socket = await getSocket();
+      socket.on(channel, (delta) => {
+        this.setSoldOut(delta.sold_out, delta.reset);
+        (delta.available || []).forEach((item) => delete this.soldOut[item]);
+      });
+      // Deltas pushed while the socket was down are lost, so reload on reconnect
+      socket.on("connect", () => this.fetchAvailability());
+    },
+    setSoldOut(items, reset) {
+      if (reset) this.soldOut = {};
+      (items || []).forEach((item) => (this.soldOut[item] = true));
+    },
+    isSoldOut(item) {
+      return !!this.soldOut[item.item];
+    },
     pickOrderType() {
       this.call
         .get("ury.ury_pos.api.get_select_field_options")
@@ -230,18 +272,7 @@ export const useMenuStore = defineStore("menu", {
           });
       } else {
         if (this.selectedOrderType === "Aggregators") {
-          this.call
-            .get("ury.ury_pos.api.getAggregator")
-            .then((result) => {
-              this.aggregatorList = result.message;
-            })
-            .catch((error) => {
-              if (error._server_messages) {
-                const messages = JSON.parse(error._server_messages);
-                const message = JSON.parse(messages[0]);
-                this.alert.createAlert("Message", message.message, "OK");
-              }
-            });
+          this.aggregatorList = this.invoiceData.bootstrap.aggregators;
         } else {
           this.aggregatorItem = "";
           this.selectedAggregator = "";
@@ -352,6 +383,7 @@ export const useMenuStore = defineStore("menu", {
       item.qty = this.cart.qty;
     },
     addToCart(item) {
+      if (this.isSoldOut(item)) return;
       const itemIndex = this.cart.findIndex((obj) => obj.item === item.item);
       const itemIndexExists = itemIndex !== -1;
 
@@ -362,9 +394,33 @@ export const useMenuStore = defineStore("menu", {
 
         let message = `Added ${item.item} to Cart`;
         this.notification.createNotification(message);
+        this.fetchUpsellSuggestions();
+      }
+    },
+    async fetchUpsellSuggestions() {
+      if (this.cart.length === 0 || this.isAggregator) {
+        this.upsellSuggestions = [];
+        return;
+      }
+      try {
+        const result = await this.call.get(
+          "ury.ury.api.ury_recommendation.get_upsell_suggestions",
+          {
+            items: JSON.stringify(this.cart.map((cartItem) => cartItem.item)),
+            menu: this.menuName,
+          }
+        );
+        // Only suggest dishes that are on the menu currently loaded for this table
+        this.upsellSuggestions = result.message
+          .map((suggestion) => this.items.find((menuItem) => menuItem.item === suggestion.item))
+          .filter(Boolean)
+          .slice(0, 3);
+      } catch (error) {
+        this.upsellSuggestions = [];
       }
     },
     incrementItemQuantity(item) {
+      if (this.isSoldOut(item)) return;
       const itemIndex = this.cart.findIndex((obj) => obj.item === item.item);
       const itemIndexExists = itemIndex !== -1;
       const posProfile = this.invoiceData.posProfile;
@@ -387,6 +443,7 @@ export const useMenuStore = defineStore("menu", {
       } else {
         item.comment = "";
         this.cart.push({ item: item.item, qty: 1 });
+        this.fetchUpsellSuggestions();
       }
     },
     decrementItemQuantity(item) {
@@ -8,11 +8,13 @@ import { useNotifications } from "./Notification.js";
 import { useAlert } from "./Alert.js";
 import frappe from "./frappeSdk.js";
 import { usetoggleRecentOrder } from "./recentOrder.js";
+import { getSocket } from "./realtime.js";
 
 
 export const useTableStore = defineStore("table", {
   state: () => ({
     tables: [],
+    tableChannel: null,
     selectedTable: null,
     previousOrderdItem: [],
     invoiceNo: "",
@@ -88,64 +90,33 @@ export const useTableStore = defineStore("table", {
   actions: {
     fetchRoom() {
       this.selectedOption = "Table";
-      if (this.invoiceData.multipleCashier) {
-        this.call.get("ury.ury_pos.api.getRoom").then((result) => {
-          this.rooms = result.message;
-          const selectedRoom = localStorage.getItem("selectedRoom");
-          if (
-            selectedRoom !== null &&
-            selectedRoom !== "" &&
-            selectedRoom !== "null"
-          ) {
-            this.selectedRoom = selectedRoom;
-            this.handleRoomChange();
-          }
-
-        });
+      const session = this.invoiceData.bootstrap;
+      this.rooms = session.rooms;
+      const selectedRoom = localStorage.getItem("selectedRoom");
+      if (this.rooms.some((room) => room.name === selectedRoom)) {
+        this.selectedRoom = selectedRoom;
       } else {
-        this.db
-          .getDocList("URY Room", {
-            fields: ["name", "branch"],
-            filters: [["branch", "like", this.invoiceData.branch]],
-            limit: "*",
-          })
-          .then((docs) => {
-            this.rooms = docs;
-            const selectedRoom = localStorage.getItem("selectedRoom");
-            if (
-              selectedRoom !== null &&
-              selectedRoom !== "" &&
-              selectedRoom !== "null"
-            ) {
-              this.selectedRoom = selectedRoom;
-              this.handleRoomChange();
-            } else {
-              this.db
-                .getDocList("URY Restaurant", {
-                  fields: ["branch", "default_room"],
-                  filters: [["branch", "like", this.invoiceData.branch]],
-                })
-                .then((docs) => {
-                  let room = docs.find((room) => room.default_room);
-                  this.selectedRoom = room ? room.default_room : null;
-
-                  this.handleRoomChange();
-                });
-            }
-
-          })
-          .catch((error) => console.error(error));
+        this.selectedRoom = session.room;
+      }
+      if (this.selectedRoom) {
+        this.handleRoomChange();
       }
     },
     async handleRoomChange() {
       localStorage.setItem("selectedRoom", this.selectedRoom);
       await this.fetchTable();
+      this.subscribeTableUpdates(this.invoiceData.branch);
       await this.getMenu();
       if (this.invoiceData.multipleCashier) {
         this.getCashier()
       }
     },
     getCashier(){
+      const session = this.invoiceData.bootstrap;
+      if (session && session.room === this.selectedRoom) {
+        this.cashier = session.room_cashier;
+        return;
+      }
       const getCashier = {
         room: this.selectedRoom,
       };
@@ -157,8 +128,8 @@ export const useTableStore = defineStore("table", {
       const getTables = {
         room: this.selectedRoom,
       };
-      this.call.get("ury.ury_pos.api.getTable", getTables).then((result) => {
-        this.tables = result.message.sort((a, b) => {
+      this.call.get("ury.ury.api.ury_floor.get_floor_state", getTables).then((result) => {
+        this.tables = result.message.tables.sort((a, b) => {
           return a.name.localeCompare(b.name, undefined, {
             numeric: true,
             sensitivity: "base",
@@ -166,7 +137,26 @@ export const useTableStore = defineStore("table", {
         });
       });
     },
+    async subscribeTableUpdates(branch) {
+      const channel = `ury_table_${branch}`;
+      if (!branch || this.tableChannel === channel) return;
+      this.tableChannel = channel;
+
+      const socket = await getSocket();
+      socket.on(channel, (row) => {
+        const index = this.tables.findIndex((table) => table.name === row.name);
+        if (index !== -1) this.tables.splice(index, 1, row);
+      });
+    },
     async getMenu() {
+      const session = this.invoiceData.bootstrap;
+      if (session && session.room === this.selectedRoom) {
+        this.tableMenu = session.menu.items;
+        this.menuName = session.menu.name;
+        this.orderModified = session.menu.modified_time;
+        this.menu.fetchItems();
+        return;
+      }
       const getMenuIem = {
         room: this.selectedRoom,
         pos_profile: this.invoiceData.posProfile,
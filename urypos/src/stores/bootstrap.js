@@ -0,0 +1,46 @@
+const BOOTSTRAP_KEY = "urypos_bootstrap";
+
+const sessions = new Map();
+
+// Startup state from one bootstrap_session call, shared by every store for
+// the page load; when nothing changed the server answers 304 and the copy
+// from the previous load is reused.
+export function getBootstrapSession(room = null) {
+  const key = room || "";
+  if (!sessions.has(key)) {
+    const session = fetchBootstrapSession(room);
+    sessions.set(key, session);
+    session.catch(() => sessions.delete(key));
+  }
+  return sessions.get(key);
+}
+
+async function fetchBootstrapSession(room) {
+  const cached = localStorage.getItem(BOOTSTRAP_KEY);
+  const previous = cached ? JSON.parse(cached) : null;
+
+  const params = new URLSearchParams();
+  if (room) params.set("room", room);
+
+  const headers = { Accept: "application/json" };
+  if (previous?.etag && (!room || previous.room === room)) {
+    headers["If-None-Match"] = previous.etag;
+  }
+
+  const response = await fetch(
+    `/api/method/ury.ury_pos.api.bootstrap_session?${params.toString()}`,
+    { credentials: "include", headers }
+  );
+
+  if (response.status === 304 && previous) {
+    return previous;
+  }
+  const data = await response.json();
+  if (!response.ok) {
+    // Same shape as frappe-js-sdk errors, so callers can show the message
+    throw data;
+  }
+
+  localStorage.setItem(BOOTSTRAP_KEY, JSON.stringify(data.message));
+  return data.message;
+}
@@ -9,6 +9,7 @@ import { useAlert } from "./Alert.js";
 import { useNotificationModal } from './NotificationModal';
 import { useAuthStore } from "./Auth.js";
 import frappe from "./frappeSdk.js";
+import { getBootstrapSession } from "./bootstrap.js";
 
 import {
   printWithQz,
@@ -53,6 +54,7 @@ export const useInvoiceDataStore = defineStore("invoiceData", {
     invoiceUpdating: false,
     cancelInvoiceFlag: false,
     invoiceDetails: [],
+    bootstrap: null,
     previousOrderItem: [],
     db: frappe.db(),
     call: frappe.call(),
@@ -68,58 +70,32 @@ export const useInvoiceDataStore = defineStore("invoiceData", {
   actions: {
     async fetchInvoiceDetails() {
       try {
-        await this.call.get("ury.ury_pos.api.getPosProfile").then((result) => {
-          this.invoiceDetails = result.message;
-          this.tableAttention = this.invoiceDetails.tableAttention;
-          this.warehouse = this.invoiceDetails.warehouse;
-          this.posProfile = this.invoiceDetails.pos_profile;
-          this.waiter = this.invoiceDetails.waiter;
-          this.cashier = this.invoiceDetails.cashier;
-          this.owner = this.invoiceDetails.owner
-          this.branch = this.invoiceDetails.branch;
-          this.company = this.invoiceDetails.company;
-          this.print_format = this.invoiceDetails.print_format;
-          this.qz_print = this.invoiceDetails.qz_print;
-          this.qz_host = this.invoiceDetails.qz_host;
-          this.print_type = this.invoiceDetails.print_type;
-          this.printer = this.invoiceDetails.printer;
-          this.paidLimit = this.invoiceDetails.paid_limit;
-          this.disableRoundedTotal = this.invoiceDetails.disable_rounded_total;
-          this.enableDiscount = this.invoiceDetails.enable_discount;
-          this.enableKotReprint=this.invoiceDetails.enable_kot_reprint;
-          this.multipleCashier=this.invoiceDetails.multiple_cashier
-          this.editOrderType=this.invoiceDetails.edit_order_type
-          if (this.qz_host) {
-            loadQzPrinter(this.qz_host);
-          }
-          this.db
-            .getDoc("Company", this.company)
-            .then((doc) => {
-              this.db
-                .getDoc("Currency", doc.default_currency)
-                .then((currency) => {
-                  this.currency = currency.symbol;
-                })
-                .catch((error) => {
-                  if (error._server_messages) {
-                    this.alert.createAlert(
-                      "Message",
-                      "You do not have Read or Select Permissions for Currency",
-                      "OK"
-                    );
-                  }
-                });
-            })
-            .catch((error) => {
-              if (error._server_messages) {
-                this.alert.createAlert(
-                  "Message",
-                  "You do not have Read or Select Permissions for Company",
-                  "OK"
-                );
-              }
-            });
-        });
+        this.bootstrap = await getBootstrapSession();
+        this.invoiceDetails = this.bootstrap.pos_profile;
+        this.tableAttention = this.invoiceDetails.tableAttention;
+        this.warehouse = this.invoiceDetails.warehouse;
+        this.posProfile = this.invoiceDetails.pos_profile;
+        this.waiter = this.invoiceDetails.waiter;
+        this.cashier = this.invoiceDetails.cashier;
+        this.owner = this.invoiceDetails.owner
+        this.branch = this.invoiceDetails.branch;
+        this.company = this.invoiceDetails.company;
+        this.print_format = this.invoiceDetails.print_format;
+        this.qz_print = this.invoiceDetails.qz_print;
+        this.qz_host = this.invoiceDetails.qz_host;
+        this.print_type = this.invoiceDetails.print_type;
+        this.printer = this.invoiceDetails.printer;
+        this.paidLimit = this.invoiceDetails.paid_limit;
+        this.disableRoundedTotal = this.invoiceDetails.disable_rounded_total;
+        this.enableDiscount = this.invoiceDetails.enable_discount;
+        this.enableKotReprint=this.invoiceDetails.enable_kot_reprint;
+        this.multipleCashier=this.invoiceDetails.multiple_cashier
+        this.editOrderType=this.invoiceDetails.edit_order_type
+        this.currency = this.bootstrap.currency_symbol;
+        this.modeOfPaymentList = this.bootstrap.mode_of_payments;
+        if (this.qz_host) {
+          loadQzPrinter(this.qz_host);
+        }
       } catch (error) {
         if (error._server_messages) {
           const messages = JSON.parse(error._server_messages);
@@ -127,14 +103,6 @@ export const useInvoiceDataStore = defineStore("invoiceData", {
           this.alert.createAlert("Message", message.message, "OK");
         }
       }
-      this.call
-        .get("ury.ury_pos.api.getModeOfPayment")
-        .then((result) => {
-          this.modeOfPaymentList = result.message;
-        })
-        .catch((error) => {
-          // console.error(error)
-        });
     },
 
     // Method for creating an invoice
@@ -0,0 +1,21 @@
+import io from "socket.io-client";
+
+let host = window.location.hostname;
+let port = window.location.port;
+let protocol = window.location.protocol;
+let url = port ? `${protocol}//${host}:${port}` : `${protocol}//${host}`;
+
+let socket = null;
+
+// Shared socket connected to the site's namespace on the Frappe realtime server
+export async function getSocket() {
+  if (socket) return socket;
+
+  const response = await fetch("/api/method/ury.ury.api.ury_kot_display.get_site_name");
+  const data = await response.json();
+  socket = io(`${url}/${data.message.site_name}`, { withCredentials: true });
+  socket.on("connect_error", (err) => {
+    console.error("Socket connection error:", err);
+  });
+  return socket;
+}
@@ -8,6 +8,7 @@ import { useInvoiceDataStore } from "./invoiceData.js";
 import { useTableStore } from "./Table.js";
 import { useAlert } from "./Alert.js";
 import frappe from "./frappeSdk.js";
+import { getSocket } from "./realtime.js";
 
 export const usetoggleRecentOrder = defineStore("recentOrders", {
   state: () => ({
@@ -24,6 +25,8 @@ export const usetoggleRecentOrder = defineStore("recentOrders", {
     grandTotal: 0,
     billAmount: 0,
     currentPage: 1,
+    pageCursors: [null],
+    invoiceChannel: null,
     paymentMethod: 0,
     editPrintedInvoice: 0,
     selectedStatus: "Draft",
@@ -101,20 +104,20 @@ export const usetoggleRecentOrder = defineStore("recentOrders", {
     },
   },
   actions: {
-    async getPosInvoice(selectedStatus, limit, startLimit) {
+    async getPosInvoice(selectedStatus, limit, cursor = null) {
       if(this.invoiceData.multipleCashier){
         const recentOrder = {
           status: selectedStatus,
           limit: limit,
-          limit_start: startLimit,
-          cashier:this.invoiceData.cashier
+          cashier:this.invoiceData.cashier,
+          ...(cursor && { cursor: JSON.stringify(cursor) }),
         };
         this.call
           .get("ury.ury_pos.api.getInvoiceForCashier", recentOrder)
           .then((result) => {
-            console.log(result.message.data,"result.message.data")
             this.recentOrderList = result.message.data;
             this.next = result.message.next;
+            this.pageCursors[this.currentPage] = result.message.cursor;
             return this.recentOrderList, this.next;
           })
           .catch((error) => console.error(error));
@@ -123,28 +126,53 @@ export const usetoggleRecentOrder = defineStore("recentOrders", {
       const recentOrder = {
         status: selectedStatus,
         limit: limit,
-        limit_start: startLimit,
+        ...(cursor && { cursor: JSON.stringify(cursor) }),
       };
       this.call
         .get("ury.ury_pos.api.getPosInvoice", recentOrder)
         .then((result) => {
           this.recentOrderList = result.message.data;
           this.next = result.message.next;
+          this.pageCursors[this.currentPage] = result.message.cursor;
           return this.recentOrderList, this.next;
         })
         .catch((error) => console.error(error));
       }
     },
+    async subscribeInvoiceUpdates(branch) {
+      const channel = `pos_invoice_${branch}`;
+      if (!branch || this.invoiceChannel === channel) return;
+      this.invoiceChannel = channel;
+
+      const socket = await getSocket();
+      socket.on(channel, (row) => this.applyInvoiceDelta(row));
+    },
+    applyInvoiceDelta(row) {
+      if (this.invoiceData.multipleCashier && row.cashier !== this.invoiceData.cashier) return;
+
+      const index = this.recentOrderList.findIndex((order) => order.name === row.name);
+      if (row.list_status !== this.selectedStatus) {
+        if (index !== -1) this.recentOrderList.splice(index, 1);
+        return;
+      }
+      if (index !== -1) {
+        this.recentOrderList.splice(index, 1);
+      }
+      // Lists are ordered by modified desc, so changed rows move to the top of page one
+      if (this.currentPage === 1) {
+        this.recentOrderList.unshift(row);
+      }
+    },
     async handleStatusChange() {
       this.currentPage = 1;
+      this.pageCursors = [null];
       let limit = 0;
-      let startLimit = 0;
       if (this.selectedStatus === "Recently Paid") {
         limit = this.invoiceData.paidLimit;
-        this.getPosInvoice(this.selectedStatus, limit, startLimit);
+        this.getPosInvoice(this.selectedStatus, limit);
       } else {
         limit = 10;
-        this.getPosInvoice(this.selectedStatus, limit, startLimit);
+        this.getPosInvoice(this.selectedStatus, limit);
       }
     },
     async searchPosInvoice(query) {
@@ -190,14 +218,12 @@ export const usetoggleRecentOrder = defineStore("recentOrders", {
     nextPageClick() {
       this.currentPage += 1;
       const limit = 10;
-      const startLimit = (this.currentPage - 1) * limit;
-      this.getPosInvoice(this.selectedStatus, limit, startLimit);
+      this.getPosInvoice(this.selectedStatus, limit, this.pageCursors[this.currentPage - 1]);
     },
     previousPageClick() {
       this.currentPage -= 1;
       const limit = 10;
-      const startLimit = (this.currentPage - 1) * limit;
-      this.getPosInvoice(this.selectedStatus, limit, startLimit);
+      this.getPosInvoice(this.selectedStatus, limit, this.pageCursors[this.currentPage - 1]);
     },
     matchesSearchOrder(order) {
       const query = this.searchOrder.toLowerCase();
@@ -525,7 +551,8 @@ export const usetoggleRecentOrder = defineStore("recentOrders", {
           )
           .then(() => {
             this.notification.createNotification("Payment Completed");
-            this.getPosInvoice(this.selectedStatus, 10, 0);
+            // Back to page one; cursors of the old list no longer apply
+            this.handleStatusChange();
             this.clearData();
           })
           .catch((error) => {